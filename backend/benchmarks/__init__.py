@@ -0,0 +1 @@
+# Offline benchmarks of the API hot paths; run with `python -m benchmarks`
@@ -0,0 +1,117 @@
+"""
+Run the offline benchmarks and compare them against a baseline.
+
+    python -m benchmarks                          # all scenarios
+    python -m benchmarks --only message_list --scale 0.2
+    python -m benchmarks --baseline benchmarks/results/baseline.json
+    python -m benchmarks --save-baseline          # record a new baseline
+
+Exits with status 1 when a case regressed past its threshold.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+from .harness import (
+    compare,
+    format_comparisons,
+    format_results,
+    load_results,
+    write_results,
+)
+
+DEFAULT_BASELINE = os.path.join("benchmarks", "results", "baseline.json")
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results", "latest.json")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "--only", help="Comma-separated scenarios to run (default: all)"
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Multiplier on iteration counts; lower for a quick run",
+    )
+    parser.add_argument(
+        "--model-latency",
+        type=float,
+        default=0.0,
+        help="Seconds before each fake model response",
+    )
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Also write the results to the baseline path",
+    )
+    parser.add_argument("--p50-threshold", type=float, default=0.25)
+    parser.add_argument("--p99-threshold", type=float, default=0.5)
+    parser.add_argument("--throughput-threshold", type=float, default=0.25)
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace):
+    # Imported here so the offline environment variables are set first
+    from .environment import OfflineEnvironment
+    from .scenarios import SCENARIOS
+
+    names = args.only.split(",") if args.only else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="benchmarks-") as root:
+        env = OfflineEnvironment(root, model_latency=args.model_latency)
+        try:
+            for name in names:
+                print(f"Running {name}...", file=sys.stderr)
+                results += await SCENARIOS[name](env, args.scale)
+        finally:
+            await env.close()
+    return results
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    results = asyncio.run(run(args))
+    print(format_results(results))
+
+    write_results(args.output, results)
+    print(f"\nResults written to {args.output}")
+
+    status = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        comparisons = compare(
+            results,
+            load_results(args.baseline),
+            p50_threshold=args.p50_threshold,
+            p99_threshold=args.p99_threshold,
+            throughput_threshold=args.throughput_threshold,
+        )
+        print(f"\nAgainst {args.baseline}:")
+        print(format_comparisons(comparisons))
+        regressions = [c for c in comparisons if c.regressed]
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed", file=sys.stderr)
+            status = 1
+    elif not args.save_baseline:
+        print(
+            f"\nNo baseline at {args.baseline}; run with --save-baseline to record one"
+        )
+
+    if args.save_baseline:
+        write_results(args.baseline, results)
+        print(f"Baseline written to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI
+from google.adk.agents import BaseAgent, LlmAgent
+
+from src.agents.prompts import ROOT_FINANCIAL_AGENT_PROMPT
+from src.agents.response_router import FormatterRouterAgent
+from src.agents.sub_agents.finalise_response_agent.agent import (
+    chart_tool,
+    dynamic_form_tool,
+    table_tool,
+)
+from src.agents.sub_agents.finalise_response_agent.prompt import (
+    FINALIZE_RESPONSE_FORMATTER_AGENT,
+)
+from src.config.firebase_config import use_in_memory_firebase
+from src.config.setup_app import setup_app
+from src.dependencies.services import get_runner_manager_service
+from src.models.chat_session import ChatSessionCreate
+from src.models.message import Message, MessageEvent, MessageRole, UsageMetadata
+from src.models.user import User, UserProfile
+from src.observability.logs import configure_logging
+from src.repositories import (
+    ChatSessionRepository,
+    MessageRepository,
+    UsageRepository,
+    UserRepository,
+)
+from src.services.message_service import MessageService
+from src.services.runner_manager_service import RunnerManagerService
+from src.services.usage_service import UsageService
+from src.testing import Distribution, FakeLlm
+
+# Environment of an offline run; anything already set wins
+OFFLINE_ENVIRONMENT = {
+    "FIREBASE_BACKEND": "memory",
+    "ARTIFACT_STORAGE_BACKEND": "local",
+    "RATE_LIMIT_ENABLED": "false",
+    "RESPONSE_CACHE_ENABLED": "false",
+    "RETENTION_SWEEP_ENABLED": "false",
+    "AGENT_ENGINE_ID": "benchmarks",
+}
+
+ASSISTANT_ANSWER = (
+    "Over the last three months you spent ₹42,300 on average, with rent at "
+    "₹18,000 and groceries at ₹7,450. Dining out grew 12% month on month; "
+    "capping it at ₹4,000 would free up enough for a ₹3,000 monthly SIP."
+)
+
+
+def build_fake_agent(latency: float = 0.0) -> BaseAgent:
+    """The production agent layout, answered by scripted fake models"""
+    fixed_latency = Distribution(mean=latency)
+    return FormatterRouterAgent(
+        name="root_agent",
+        answer_agent=LlmAgent(
+            name="root_agent",
+            model=FakeLlm.answering(
+                ASSISTANT_ANSWER,
+                model="gemini-2.0-flash",
+                first_token_latency=fixed_latency,
+            ),
+            instruction=ROOT_FINANCIAL_AGENT_PROMPT,
+        ),
+        formatter_agent=LlmAgent(
+            name="finalise_response_agent",
+            model=FakeLlm(model="gemini-2.0-flash", first_token_latency=fixed_latency),
+            instruction=FINALIZE_RESPONSE_FORMATTER_AGENT,
+            tools=[dynamic_form_tool, chart_tool, table_tool],
+        ),
+        description="Offline benchmark agent",
+    )
+
+
+class OfflineEnvironment:
+    """The API wired to in-memory Firestore and Auth, local storage and
+    fake models, with helpers to seed users, sessions and messages"""
+
+    def __init__(self, root: str, model_latency: float = 0.0):
+        for name, value in OFFLINE_ENVIRONMENT.items():
+            os.environ.setdefault(name, value)
+        os.environ.setdefault("ARTIFACT_STORAGE_PATH", os.path.join(root, "artifacts"))
+        os.environ.setdefault(
+            "TRANSACTION_STORE_PATH", os.path.join(root, "transactions")
+        )
+        # Per-turn info logs would be measured along with the code
+        configure_logging(level=os.getenv("LOG_LEVEL", "WARNING"))
+
+        self.db, self.auth = use_in_memory_firebase()
+        self.users = UserRepository(db=self.db)
+        self.sessions = ChatSessionRepository(db=self.db)
+        self.messages = MessageRepository(db=self.db)
+        self.runner_manager = RunnerManagerService(
+            MessageService(self.messages),
+            self.auth,
+            usage_service=UsageService(UsageRepository(db=self.db)),
+            agent=build_fake_agent(model_latency),
+        )
+
+        self.app = FastAPI()
+        setup_app(self.app)
+        self.app.dependency_overrides[get_runner_manager_service] = (
+            lambda: self.runner_manager
+        )
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=self.app), base_url="http://offline"
+        )
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    async def create_user(self, uid: Optional[str] = None) -> str:
+        """Store a user profile and return an ID token for it"""
+        uid = uid or uuid.uuid4().hex[:28]
+        user = User(
+            uid=uid, profile=UserProfile(name="Bench User", email=f"{uid}@example.com")
+        )
+        # Keyed by uid, which is where get_current_user looks profiles up
+        self.db.collection("users").document(uid).set(user.model_dump())
+        return self.auth.issue_id_token(uid)
+
+    @staticmethod
+    def headers(token: str) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {token}"}
+
+    def uid(self, token: str) -> str:
+        return self.auth.verify_id_token(token)["uid"]
+
+    async def create_session(self, user_id: str) -> str:
+        session = await self.sessions.create_session(ChatSessionCreate(user_id=user_id))
+        return session.id
+
+    async def seed_messages(self, session_id: str, user_id: str, count: int) -> None:
+        """Alternate user questions and two-event assistant answers"""
+        started = datetime.utcnow() - timedelta(seconds=count)
+        for i in range(count):
+            created_at = started + timedelta(seconds=i)
+            message = Message(
+                id=uuid.uuid4().hex,
+                session_id=session_id,
+                user_id=user_id,
+                created_at=created_at,
+                updated_at=created_at,
+                **(
+                    {
+                        "role": MessageRole.USER,
+                        "human_content": f"How much did I spend on groceries in month {i}?",
+                    }
+                    if i % 2 == 0
+                    else {
+                        "role": MessageRole.ASSISTANT,
+                        "events": self._assistant_events(created_at),
+                        "metadata": {
+                            "processing_complete": True,
+                            "authors": ["root_agent"],
+                        },
+                    }
+                ),
+            )
+            await self.messages.create(message)
+
+    @staticmethod
+    def _assistant_events(timestamp: datetime) -> List[MessageEvent]:
+        return [
+            MessageEvent(
+                event_id=uuid.uuid4().hex,
+                timestamp=timestamp,
+                sequence_number=sequence,
+                author="root_agent",
+                content=ASSISTANT_ANSWER if sequence == 2 else None,
+                tool_calls=(
+                    [{"name": "query_transactions", "args": {"months": 3}, "id": "c1"}]
+                    if sequence == 1
+                    else None
+                ),
+                metadata={"turn_complete": sequence == 2, "partial": False},
+                usage_metadata=UsageMetadata(
+                    prompt_token_count=1800,
+                    response_token_count=120,
+                    total_token_count=1920,
+                    model_name="gemini-2.0-flash",
+                ),
+            )
+            for sequence in (1, 2)
+        ]
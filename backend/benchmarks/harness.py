@@ -0,0 +1,256 @@
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+RESULTS_SCHEMA_VERSION = 1
+
+
+@dataclass
+class BenchmarkResult:
+    """Throughput and latency of one benchmark case"""
+
+    name: str
+    iterations: int
+    concurrency: int
+    duration_s: float
+    throughput_per_s: float
+    latency_ms: Dict[str, float]
+    params: Dict[str, Any] = field(default_factory=dict)
+    # Named phases an operation reported, e.g. time to first event
+    timings_ms: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+
+@dataclass
+class Comparison:
+    """One metric of a case against the baseline"""
+
+    name: str
+    metric: str
+    baseline: float
+    current: float
+    threshold: float
+
+    @property
+    def change(self) -> float:
+        """Relative change, positive when the metric got worse"""
+        if not self.baseline:
+            return 0.0
+        if self.metric == "throughput_per_s":
+            return (self.baseline - self.current) / self.baseline
+        return (self.current - self.baseline) / self.baseline
+
+    @property
+    def regressed(self) -> bool:
+        return self.change > self.threshold
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Linear-interpolated percentile (q in 0-100) of sorted values"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+def summarize_latencies(latencies: List[float]) -> Dict[str, float]:
+    """p50/p90/p99, mean, min and max in milliseconds"""
+    values = sorted(latency * 1000 for latency in latencies)
+    return {
+        "p50": round(percentile(values, 50), 4),
+        "p90": round(percentile(values, 90), 4),
+        "p99": round(percentile(values, 99), 4),
+        "mean": round(sum(values) / len(values), 4) if values else 0.0,
+        "min": round(values[0], 4) if values else 0.0,
+        "max": round(values[-1], 4) if values else 0.0,
+    }
+
+
+async def measure(
+    name: str,
+    operation: Callable[[int], Awaitable[Any]],
+    iterations: int,
+    concurrency: int = 1,
+    warmup: int = 3,
+    params: Optional[Dict[str, Any]] = None,
+) -> BenchmarkResult:
+    """Time `iterations` calls of operation(i), `concurrency` at a time.
+
+    Warm-up calls run first, with negative indexes, and aren't recorded.
+    Throughput is completed calls per second of wall time; latency is per
+    call, so with concurrency it includes time spent waiting on the event
+    loop. An operation may return a dict of phase durations in seconds,
+    which are summarized under timings_ms.
+    """
+    for i in range(warmup):
+        await operation(-1 - i)
+
+    latencies: List[float] = []
+    timings: Dict[str, List[float]] = {}
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < iterations:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            phases = await operation(index)
+            latencies.append(time.perf_counter() - started)
+            if isinstance(phases, dict):
+                for phase, seconds in phases.items():
+                    timings.setdefault(phase, []).append(seconds)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    return BenchmarkResult(
+        name=name,
+        iterations=iterations,
+        concurrency=concurrency,
+        duration_s=round(duration, 4),
+        throughput_per_s=round(iterations / duration, 2) if duration else 0.0,
+        latency_ms=summarize_latencies(latencies),
+        params=params or {},
+        timings_ms={
+            phase: summarize_latencies(values) for phase, values in timings.items()
+        },
+    )
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_info() -> Dict[str, Any]:
+    """Where the results came from; only compare runs from similar machines"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": _git_commit(),
+    }
+
+
+def write_results(path: str, results: List[BenchmarkResult]) -> Dict[str, Any]:
+    """Write results as JSON, keyed by case name"""
+    document = {
+        "schema_version": RESULTS_SCHEMA_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment_info(),
+        "results": {result.name: asdict(result) for result in results},
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return document
+
+
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+    """Read a results file written by write_results"""
+    with open(path) as f:
+        document = json.load(f)
+    if document.get("schema_version") != RESULTS_SCHEMA_VERSION:
+        raise ValueError(
+            f"Unsupported results schema {document.get('schema_version')!r} in {path}"
+        )
+    return document["results"]
+
+
+def compare(
+    results: List[BenchmarkResult],
+    baseline: Dict[str, Dict[str, Any]],
+    p50_threshold: float = 0.25,
+    p99_threshold: float = 0.5,
+    throughput_threshold: float = 0.25,
+) -> List[Comparison]:
+    """Compare the cases present in both runs.
+
+    Thresholds are the relative slowdown tolerated before a metric counts as
+    a regression; p99 is noisier than p50, so it gets more room.
+    """
+    comparisons = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        for metric, current, before, threshold in (
+            (
+                "p50_ms",
+                result.latency_ms["p50"],
+                previous["latency_ms"]["p50"],
+                p50_threshold,
+            ),
+            (
+                "p99_ms",
+                result.latency_ms["p99"],
+                previous["latency_ms"]["p99"],
+                p99_threshold,
+            ),
+            (
+                "throughput_per_s",
+                result.throughput_per_s,
+                previous["throughput_per_s"],
+                throughput_threshold,
+            ),
+        ):
+            comparisons.append(
+                Comparison(
+                    name=result.name,
+                    metric=metric,
+                    baseline=before,
+                    current=current,
+                    threshold=threshold,
+                )
+            )
+    return comparisons
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    """Plain-text table of the results"""
+    lines = [
+        f"{'case':<44} {'ops/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'n':>6} {'conc':>5}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result.name:<44} {result.throughput_per_s:>10.1f} "
+            f"{result.latency_ms['p50']:>10.3f} {result.latency_ms['p99']:>10.3f} "
+            f"{result.iterations:>6} {result.concurrency:>5}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparisons(comparisons: List[Comparison]) -> str:
+    """Plain-text table of the changes against the baseline"""
+    lines = [
+        f"{'case':<44} {'metric':<17} {'baseline':>10} {'current':>10} {'slower':>8}"
+    ]
+    for comparison in comparisons:
+        marker = "  REGRESSION" if comparison.regressed else ""
+        lines.append(
+            f"{comparison.name:<44} {comparison.metric:<17} "
+            f"{comparison.baseline:>10.3f} {comparison.current:>10.3f} "
+            f"{comparison.change:>+8.1%}{marker}"
+        )
+    return "\n".join(lines)
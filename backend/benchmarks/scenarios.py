@@ -0,0 +1,217 @@
+import os
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.utils import create_model_field
+
+from src.apis.responses import PydanticJSONResponse
+from src.auth.firebase_auth import get_current_user
+from src.models.message import MessageResponse
+
+from .environment import OfflineEnvironment
+from .harness import BenchmarkResult, measure
+
+Scenario = Callable[[OfflineEnvironment, float], Awaitable[List[BenchmarkResult]]]
+
+MESSAGE_COUNTS = (10, 1_000, 10_000)
+UPLOAD_SIZES = {"10kb": 10 * 1024, "1mb": 1024 * 1024, "8mb": 8 * 1024 * 1024}
+
+
+def _iterations(count: int, scale: float) -> int:
+    return max(5, int(count * scale))
+
+
+async def chat_stream(env: OfflineEnvironment, scale: float) -> List[BenchmarkResult]:
+    """Whole chat turns through the runner with fake models, one turn per
+    session; plain answers skip the formatter, chart requests run it"""
+    token = await env.create_user()
+    user_id = env.uid(token)
+    results = []
+    for route, question in (
+        ("plain", "How much did I spend last month?"),
+        ("formatted", "Show me a chart of my spending by category"),
+    ):
+        for concurrency in (1, 8):
+            iterations = _iterations(200, scale)
+            sessions = [
+                await env.create_session(user_id) for _ in range(iterations + 3)
+            ]
+
+            async def turn(index: int) -> Dict[str, float]:
+                started = time.perf_counter()
+                first_event = None
+                async for _ in env.runner_manager.process_user_message(
+                    user_id=user_id,
+                    session_id=sessions[index],
+                    message_content=question,
+                    backend_session_id=sessions[index],
+                ):
+                    if first_event is None:
+                        first_event = time.perf_counter() - started
+                return {"first_event": first_event}
+
+            results.append(
+                await measure(
+                    f"chat_stream[route={route},concurrency={concurrency}]",
+                    turn,
+                    iterations,
+                    concurrency=concurrency,
+                    params={"route": route},
+                )
+            )
+    return results
+
+
+async def message_list(env: OfflineEnvironment, scale: float) -> List[BenchmarkResult]:
+    """GET /sessions/{id}/messages for sessions of 10, 1k and 10k messages"""
+    token = await env.create_user()
+    user_id = env.uid(token)
+    results = []
+    for count in MESSAGE_COUNTS:
+        session_id = await env.create_session(user_id)
+        await env.seed_messages(session_id, user_id, count)
+
+        async def list_messages(index: int) -> None:
+            response = await env.client.get(
+                f"/sessions/{session_id}/messages", headers=env.headers(token)
+            )
+            response.raise_for_status()
+
+        iterations = _iterations(max(5, 20_000 // count), scale)
+        results.append(
+            await measure(
+                f"message_list[messages={count}]",
+                list_messages,
+                iterations,
+                warmup=1,
+                params={"messages": count},
+            )
+        )
+    return results
+
+
+async def response_encoding(
+    env: OfflineEnvironment, scale: float
+) -> List[BenchmarkResult]:
+    """Encoding a message history already read and validated by the handler:
+    FastAPI's default response_model round trip against PydanticJSONResponse"""
+    token = await env.create_user()
+    user_id = env.uid(token)
+    field = create_model_field(
+        "Response_messages", List[MessageResponse], mode="serialization"
+    )
+    results = []
+    for count in MESSAGE_COUNTS:
+        session_id = await env.create_session(user_id)
+        await env.seed_messages(session_id, user_id, count)
+        messages = [
+            MessageResponse.model_validate(message)
+            for message in await env.messages.get_session_messages(session_id, user_id)
+        ]
+
+        async def revalidated(index: int) -> None:
+            content = await serialize_response(field=field, response_content=messages)
+            JSONResponse(content)
+
+        async def direct(index: int) -> None:
+            PydanticJSONResponse(messages)
+
+        iterations = _iterations(max(5, 50_000 // count), scale)
+        for encoder, operation in (("revalidated", revalidated), ("direct", direct)):
+            results.append(
+                await measure(
+                    f"response_encoding[encoder={encoder},messages={count}]",
+                    operation,
+                    iterations,
+                    params={"encoder": encoder, "messages": count},
+                )
+            )
+    return results
+
+
+async def artifact_upload(
+    env: OfflineEnvironment, scale: float
+) -> List[BenchmarkResult]:
+    """Multipart uploads to local storage; content is unique per upload so
+    every one is hashed and stored rather than deduplicated"""
+    token = await env.create_user()
+    session_id = await env.create_session(env.uid(token))
+    results = []
+    for label, size in UPLOAD_SIZES.items():
+        filler = b"x" * size
+
+        async def upload(index: int) -> None:
+            content = os.urandom(16) + filler[16:]
+            response = await env.client.post(
+                f"/sessions/{session_id}/artifacts/upload",
+                headers=env.headers(token),
+                data={"message_id": "bench"},
+                files={"file": ("notes.txt", content, "text/plain")},
+            )
+            response.raise_for_status()
+
+        iterations = _iterations(max(10, 200 * 1024 * 1024 // size // 10), scale)
+        results.append(
+            await measure(
+                f"artifact_upload[size={label}]",
+                upload,
+                min(iterations, 500),
+                params={"bytes": size},
+            )
+        )
+    return results
+
+
+async def auth_verification(
+    env: OfflineEnvironment, scale: float
+) -> List[BenchmarkResult]:
+    """get_current_user: RS256 ID token verification plus the profile read"""
+    token = await env.create_user()
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    async def authenticate(index: int) -> None:
+        await get_current_user(env.users, credentials)
+
+    return [await measure("auth_verification", authenticate, _iterations(2_000, scale))]
+
+
+async def repository_reads(
+    env: OfflineEnvironment, scale: float
+) -> List[BenchmarkResult]:
+    """Point reads and equality queries through the repository layer"""
+    token = await env.create_user()
+    user_id = env.uid(token)
+    session_ids = [await env.create_session(user_id) for _ in range(50)]
+    for other in range(200):
+        await env.create_session(f"other-{other}")
+
+    async def get_by_id(index: int) -> None:
+        await env.sessions.get_by_id(session_ids[index % len(session_ids)])
+
+    async def user_sessions(index: int) -> None:
+        await env.sessions.get_user_sessions(user_id)
+
+    return [
+        await measure(
+            "repository_read[get_by_id]", get_by_id, _iterations(5_000, scale)
+        ),
+        await measure(
+            "repository_read[user_sessions]",
+            user_sessions,
+            _iterations(1_000, scale),
+            params={"sessions": len(session_ids), "collection_size": 250},
+        ),
+    ]
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "chat_stream": chat_stream,
+    "message_list": message_list,
+    "response_encoding": response_encoding,
+    "artifact_upload": artifact_upload,
+    "auth_verification": auth_verification,
+    "repository_reads": repository_reads,
+}
@@ -0,0 +1,88 @@
+"""
+Multi-worker serving: gunicorn -c gunicorn.conf.py src.main:app
+
+One uvicorn worker per core (WEB_CONCURRENCY overrides). The app is
+imported once in the master and the agent runtime loaded there before
+forking, so workers share those pages and start warm. Nothing opens a
+connection at import time; Firebase and the ADK session store are created
+in each worker.
+
+State that must agree across workers is externalized when more than one
+worker runs (anything already set wins):
+- ADK sessions: a SQLite file shared by the workers of this container
+  (ADK_SESSION_BACKEND=database). Use a Postgres URL or vertex across
+  containers, or route by session id (see the README).
+- Rate limits: Firestore buckets (RATE_LIMIT_BACKEND=firestore).
+- Metrics: Prometheus multiprocess files, aggregated by /metrics.
+- Retention sweeps: one worker at a time, holding a file lock
+  (RETENTION_SWEEP_LOCK); another takes over if it exits.
+
+Some state stays per process:
+- Response cache: each worker warms its own; a miss only costs a model call.
+- Transaction store: the columns live on this container's disk under
+  TRANSACTION_STORE_PATH, written under per-user file locks, but every
+  worker keeps its own memory-mapped cache. Other containers don't see
+  them; point the path at shared storage, or rebuild from ingestion results.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+# Chat turns stream for up to a minute or two
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "180"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+forwarded_allow_ips = "*"
+accesslog = None
+
+if workers > 1:
+    state_dir = os.getenv("WORKER_STATE_DIR") or tempfile.mkdtemp(prefix="ttym-")
+    os.environ.setdefault("ADK_SESSION_BACKEND", "database")
+    os.environ.setdefault(
+        "ADK_SESSION_DB_URL", f"sqlite:///{os.path.join(state_dir, 'adk_sessions.db')}"
+    )
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "firestore")
+    os.environ.setdefault(
+        "RETENTION_SWEEP_LOCK", os.path.join(state_dir, "retention.lock")
+    )
+
+    # Must be set before prometheus_client is imported, and start empty
+    metrics_dir = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(state_dir, "metrics")
+    )
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def when_ready(server):
+    """Load the agent runtime and prepare the session store before forking"""
+    from src.services.runner_manager_service import (
+        create_session_service,
+        load_agent_runtime,
+    )
+
+    load_agent_runtime()
+    # Creates the tables once, rather than racing to in every worker
+    session_service = create_session_service()
+    engine = getattr(session_service, "db_engine", None)
+    if engine is not None:
+        engine.dispose()
+    server.log.info(
+        "Agent runtime loaded; %d workers, ADK sessions in %s",
+        workers,
+        os.getenv("ADK_SESSION_BACKEND", "memory"),
+    )
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
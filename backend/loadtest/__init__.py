@@ -0,0 +1 @@
+# Closed-loop load generator for a local API server; run with `python -m loadtest`
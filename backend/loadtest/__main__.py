@@ -0,0 +1,123 @@
+"""
+Closed-loop load tests against a local API server.
+
+    python -m loadtest serve --users 500          # in-memory server on :8000
+    python -m loadtest run --profile chat --users 10,50,100 --duration 60
+
+`serve` runs one uvicorn worker on in-memory Firestore and Auth with fake
+models, and writes ID tokens of its seeded users to loadtest/tokens.json.
+`run` holds each user population for --duration seconds in turn and prints
+where throughput stops growing.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from dataclasses import asdict
+
+import httpx
+
+from .generator import LoadGenerator, format_report, format_saturation
+from .profiles import PROFILES
+
+DEFAULT_TOKENS = os.path.join("loadtest", "tokens.json")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m loadtest")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run an in-memory server")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--users", type=int, default=200, help="Users to seed")
+    serve.add_argument("--tokens", default=DEFAULT_TOKENS)
+
+    run = commands.add_parser("run", help="Generate load against a server")
+    run.add_argument("--target", default="http://127.0.0.1:8000")
+    run.add_argument("--tokens", default=DEFAULT_TOKENS)
+    run.add_argument("--profile", choices=sorted(PROFILES), default="chat")
+    run.add_argument(
+        "--users",
+        default="10",
+        help="Comma-separated user populations, one stage each",
+    )
+    run.add_argument("--duration", type=float, default=60.0, help="Seconds per stage")
+    run.add_argument(
+        "--arrival-rate",
+        type=float,
+        default=0.0,
+        help="New users per second (default: all start at once)",
+    )
+    run.add_argument(
+        "--think-time", type=float, help="Override the profile's mean think time"
+    )
+    run.add_argument(
+        "--stall-threshold",
+        type=float,
+        default=1.0,
+        help="Seconds between stream chunks counted as a stall",
+    )
+    run.add_argument("--timeout", type=float, default=120.0)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--output", help="Also write the reports as JSON here")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace):
+    with open(args.tokens, encoding="utf-8") as f:
+        tokens = [user["token"] for user in json.load(f)]
+    profile = PROFILES[args.profile]
+    if args.think_time is not None:
+        profile.think_time = args.think_time
+
+    populations = [int(users) for users in args.users.split(",")]
+    limits = httpx.Limits(max_connections=max(populations) * 2)
+    async with httpx.AsyncClient(
+        base_url=args.target, timeout=args.timeout, limits=limits
+    ) as client:
+        generator = LoadGenerator(
+            client,
+            tokens,
+            profile,
+            arrival_rate=args.arrival_rate,
+            stall_threshold=args.stall_threshold,
+            seed=args.seed,
+        )
+        reports = []
+        for users in populations:
+            print(
+                f"Stage: {users} users, {args.duration:.0f}s, profile {profile.name}",
+                file=sys.stderr,
+            )
+            report = await generator.run_stage(
+                users,
+                args.duration,
+                progress=lambda line: print(line, file=sys.stderr),
+            )
+            print(format_report(report) + "\n")
+            reports.append(report)
+    return reports
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.command == "serve":
+        from .server import serve
+
+        serve(args.host, args.port, args.users, args.tokens)
+        return 0
+
+    reports = asyncio.run(run(args))
+    print(format_saturation(reports))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump([asdict(report) for report in reports], f, indent=2)
+        print(f"\nReports written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
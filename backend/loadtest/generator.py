@@ -0,0 +1,353 @@
+import asyncio
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.harness import summarize_latencies
+
+from .profiles import TrafficProfile
+
+
+@dataclass
+class StageReport:
+    """What one stage (a user population held for a duration) measured"""
+
+    users: int
+    duration_s: float
+    visits: int
+    # Per operation: count, errors, throughput_per_s and latency_ms
+    operations: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # Chat streams: first_byte_ms and max_stall_ms summaries, stall count
+    chat: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def requests(self) -> int:
+        return sum(op["count"] for op in self.operations.values())
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+
+class Recorder:
+    """Collects latencies, stream timings and errors of a stage"""
+
+    def __init__(self, stall_threshold: float):
+        self.stall_threshold = stall_threshold
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.first_bytes: List[float] = []
+        self.max_stalls: List[float] = []
+        self.stalls = 0
+        self.visits = 0
+        self.completed = 0
+
+    def record(self, operation: str, seconds: float, error: Optional[str] = None):
+        self.latencies[operation].append(seconds)
+        self.completed += 1
+        if error:
+            self.errors[f"{operation}: {error}"] += 1
+
+    def record_stream(self, first_byte: float, chunk_gaps: List[float]) -> None:
+        """Time to first byte and the gaps between later chunks of a stream"""
+        self.first_bytes.append(first_byte)
+        self.max_stalls.append(max(chunk_gaps, default=0.0))
+        self.stalls += sum(1 for gap in chunk_gaps if gap > self.stall_threshold)
+
+    def report(self, users: int, duration: float) -> StageReport:
+        operations = {}
+        for operation, latencies in sorted(self.latencies.items()):
+            errors = sum(
+                count
+                for key, count in self.errors.items()
+                if key.startswith(f"{operation}:")
+            )
+            operations[operation] = {
+                "count": len(latencies),
+                "errors": errors,
+                "throughput_per_s": round(len(latencies) / duration, 3),
+                "latency_ms": summarize_latencies(latencies),
+            }
+        chat = {}
+        if self.first_bytes:
+            chat = {
+                "first_byte_ms": summarize_latencies(self.first_bytes),
+                "max_stall_ms": summarize_latencies(self.max_stalls),
+                "stalls": self.stalls,
+                "stall_threshold_s": self.stall_threshold,
+            }
+        return StageReport(
+            users=users,
+            duration_s=round(duration, 3),
+            visits=self.visits,
+            operations=operations,
+            chat=chat,
+            errors=dict(self.errors.most_common()),
+        )
+
+
+class LoadGenerator:
+    """Closed-loop load: each simulated user waits for a response before
+    its next action, so offered load tracks what the server sustains.
+
+    Users arrive as a Poisson process at `arrival_rate` per second (all at
+    once when 0) and run visits back to back until the stage ends. Requests
+    in flight at the end are finished and counted.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        tokens: List[str],
+        profile: TrafficProfile,
+        arrival_rate: float = 0.0,
+        stall_threshold: float = 1.0,
+        seed: int = 0,
+    ):
+        if not tokens:
+            raise ValueError("At least one user token is needed")
+        self.client = client
+        self.tokens = tokens
+        self.profile = profile
+        self.arrival_rate = arrival_rate
+        self.stall_threshold = stall_threshold
+        self.seed = seed
+
+    async def run_stage(
+        self,
+        users: int,
+        duration: float,
+        progress: Optional[Callable[[str], None]] = None,
+        progress_interval: float = 5.0,
+    ) -> StageReport:
+        """Hold `users` simulated users for `duration` seconds"""
+        recorder = Recorder(self.stall_threshold)
+        started = time.perf_counter()
+        deadline = started + duration
+        active = [0]
+
+        arrivals = []
+        arrival = 0.0
+        arrival_rng = random.Random(f"{self.seed}:arrivals")
+        for _ in range(users):
+            arrivals.append(arrival)
+            if self.arrival_rate > 0:
+                arrival += arrival_rng.expovariate(self.arrival_rate)
+
+        tasks = [
+            asyncio.create_task(
+                self._user(index, started + arrivals[index], deadline, recorder, active)
+            )
+            for index in range(users)
+        ]
+        reporter = None
+        if progress is not None:
+            reporter = asyncio.create_task(
+                self._report_progress(
+                    progress, progress_interval, started, recorder, active
+                )
+            )
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+        return recorder.report(users, time.perf_counter() - started)
+
+    async def _report_progress(self, progress, interval, started, recorder, active):
+        while True:
+            await asyncio.sleep(interval)
+            elapsed = time.perf_counter() - started
+            progress(
+                f"  {elapsed:6.1f}s  active users {active[0]:>5}  "
+                f"requests {recorder.completed:>7}  "
+                f"({recorder.completed / elapsed:.1f}/s)  "
+                f"errors {sum(recorder.errors.values())}"
+            )
+
+    async def _user(self, index, arrives_at, deadline, recorder, active) -> None:
+        rng = random.Random(f"{self.seed}:{index}")
+        headers = {"Authorization": f"Bearer {self.tokens[index % len(self.tokens)]}"}
+        if not await self._sleep_until(arrives_at, deadline):
+            return
+        active[0] += 1
+        try:
+            while time.perf_counter() < deadline:
+                recorder.visits += 1
+                await self._visit(rng, headers, deadline, recorder)
+        finally:
+            active[0] -= 1
+
+    @staticmethod
+    async def _sleep_until(moment: float, deadline: float) -> bool:
+        """Sleep until `moment`; False when the stage ends first"""
+        delay = min(moment, deadline) - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return time.perf_counter() < deadline
+
+    async def _visit(self, rng, headers, deadline, recorder) -> None:
+        profile = self.profile
+        response = await self._request(
+            recorder, "create_session", "POST", "/sessions/", headers=headers
+        )
+        if response is None:
+            return
+        session_id = response.json()["id"]
+
+        for _ in range(rng.randint(*profile.turns)):
+            think = rng.expovariate(1 / profile.think_time) if profile.think_time else 0
+            if not await self._sleep_until(time.perf_counter() + think, deadline):
+                return
+            await self._chat(
+                recorder, headers, session_id, rng.choice(profile.questions)
+            )
+
+            polls = int(profile.history_polls)
+            polls += rng.random() < profile.history_polls - polls
+            for _ in range(polls):
+                await self._request(
+                    recorder,
+                    "history",
+                    "GET",
+                    f"/sessions/{session_id}/messages",
+                    headers=headers,
+                )
+            if rng.random() < profile.upload_probability:
+                await self._upload(recorder, headers, session_id, profile.upload_bytes)
+            if rng.random() < profile.consent_probability:
+                await self._consent(rng, recorder, headers, session_id)
+
+    async def _request(
+        self, recorder: Recorder, operation: str, method: str, url: str, **kwargs
+    ) -> Optional[httpx.Response]:
+        """Send a request and record it; None when it failed"""
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            recorder.record(operation, time.perf_counter() - started, type(e).__name__)
+            return None
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            recorder.record(operation, elapsed, f"HTTP {response.status_code}")
+            return None
+        recorder.record(operation, elapsed)
+        return response
+
+    async def _chat(self, recorder, headers, session_id, question) -> None:
+        started = time.perf_counter()
+        first_byte = None
+        last_chunk = None
+        gaps: List[float] = []
+        try:
+            async with self.client.stream(
+                "POST",
+                f"/sessions/{session_id}/chat",
+                headers=headers,
+                json={"content": question},
+            ) as response:
+                async for _ in response.aiter_raw():
+                    now = time.perf_counter()
+                    if first_byte is None:
+                        first_byte = now - started
+                    else:
+                        gaps.append(now - last_chunk)
+                    last_chunk = now
+        except httpx.HTTPError as e:
+            recorder.record("chat", time.perf_counter() - started, type(e).__name__)
+            return
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            recorder.record("chat", elapsed, f"HTTP {response.status_code}")
+            return
+        recorder.record("chat", elapsed)
+        if first_byte is not None:
+            recorder.record_stream(first_byte, gaps)
+
+    async def _upload(self, recorder, headers, session_id, size) -> None:
+        # Unique content, so every upload is hashed and stored
+        content = os.urandom(16) + b"x" * max(0, size - 16)
+        await self._request(
+            recorder,
+            "upload",
+            "POST",
+            f"/sessions/{session_id}/artifacts/upload",
+            headers=headers,
+            data={"message_id": "loadtest"},
+            files={"file": ("statement.txt", content, "text/plain")},
+        )
+
+    async def _consent(self, rng, recorder, headers, session_id) -> None:
+        response = await self._request(
+            recorder,
+            "consent_list",
+            "GET",
+            f"/sessions/{session_id}/artifacts/consent-required",
+            headers=headers,
+        )
+        if response is None:
+            return
+        for artifact in response.json():
+            await self._request(
+                recorder,
+                "consent",
+                "POST",
+                f"/sessions/{session_id}/artifacts/{artifact['id']}/consent",
+                headers=headers,
+                json={
+                    "artifact_id": artifact["id"],
+                    "grant_consent": rng.random() < 0.8,
+                },
+            )
+
+
+def format_report(report: StageReport) -> str:
+    """Plain-text tables of one stage"""
+    lines = [
+        f"users {report.users}, {report.duration_s:.1f}s, {report.visits} visits, "
+        f"{report.requests} requests, {report.error_count} errors",
+        f"{'operation':<16} {'count':>7} {'ops/s':>8} {'p50 ms':>9} {'p90 ms':>9} "
+        f"{'p99 ms':>9} {'errors':>7}",
+    ]
+    for name, op in report.operations.items():
+        latency = op["latency_ms"]
+        lines.append(
+            f"{name:<16} {op['count']:>7} {op['throughput_per_s']:>8.1f} "
+            f"{latency['p50']:>9.1f} {latency['p90']:>9.1f} {latency['p99']:>9.1f} "
+            f"{op['errors']:>7}"
+        )
+    if report.chat:
+        first_byte, stall = report.chat["first_byte_ms"], report.chat["max_stall_ms"]
+        lines.append(
+            f"chat first byte p50/p99 {first_byte['p50']:.1f}/{first_byte['p99']:.1f} ms, "
+            f"max stall p50/p99 {stall['p50']:.1f}/{stall['p99']:.1f} ms, "
+            f"{report.chat['stalls']} stalls over {report.chat['stall_threshold_s']}s"
+        )
+    for error, count in report.errors.items():
+        lines.append(f"  {count:>6} x {error}")
+    return "\n".join(lines)
+
+
+def format_saturation(reports: List[StageReport]) -> str:
+    """One line per stage, to spot where throughput stops growing"""
+    lines = [
+        f"{'users':>6} {'req/s':>9} {'chat/s':>8} {'chat p50':>10} {'chat p99':>10} "
+        f"{'errors':>8}"
+    ]
+    for report in reports:
+        chat = report.operations.get("chat", {"throughput_per_s": 0.0})
+        latency = chat.get("latency_ms", {"p50": 0.0, "p99": 0.0})
+        error_rate = report.error_count / report.requests if report.requests else 0.0
+        lines.append(
+            f"{report.users:>6} {report.requests / report.duration_s:>9.1f} "
+            f"{chat['throughput_per_s']:>8.1f} {latency['p50']:>10.1f} "
+            f"{latency['p99']:>10.1f} {error_rate:>8.1%}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,50 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+QUESTIONS = [
+    "How much did I spend last month?",
+    "What is an SIP and how does it work?",
+    "Show me a chart of my spending by category",
+    "Give me a breakdown table of my expenses",
+    "Help me plan a savings goal for a car",
+    "Am I spending too much on dining out?",
+]
+
+
+@dataclass
+class TrafficProfile:
+    """How one simulated user behaves during a visit.
+
+    A visit creates a session and chats for a number of turns drawn from
+    `turns`, thinking for an exponentially distributed time (mean
+    `think_time` seconds) before each turn. After each turn the user polls
+    the history `history_polls` times on average, uploads a file with
+    `upload_probability` and checks for artifacts awaiting consent with
+    `consent_probability`.
+    """
+
+    name: str
+    turns: Tuple[int, int] = (2, 6)
+    think_time: float = 3.0
+    history_polls: float = 1.0
+    upload_probability: float = 0.0
+    upload_bytes: int = 64 * 1024
+    consent_probability: float = 0.0
+    questions: List[str] = field(default_factory=lambda: list(QUESTIONS))
+
+
+PROFILES: Dict[str, TrafficProfile] = {
+    # Mostly chat, the way the app is used day to day
+    "chat": TrafficProfile(name="chat"),
+    # Chat with statement uploads and consent prompts in between
+    "mixed": TrafficProfile(
+        name="mixed",
+        upload_probability=0.2,
+        upload_bytes=256 * 1024,
+        consent_probability=0.3,
+    ),
+    # Clients that keep polling the history, e.g. several open tabs
+    "polling": TrafficProfile(name="polling", turns=(1, 3), history_polls=5.0),
+    # No think time; saturates the server with the fewest users
+    "stress": TrafficProfile(name="stress", think_time=0.0, history_polls=0.5),
+}
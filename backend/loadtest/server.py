@@ -0,0 +1,72 @@
+import json
+import os
+import sys
+import tempfile
+import uuid
+from typing import Dict, List
+
+# Environment of the load test server; anything already set wins
+SERVER_ENVIRONMENT = {
+    "FIREBASE_BACKEND": "memory",
+    "AGENT_MODEL_BACKEND": "fake",
+    "ARTIFACT_STORAGE_BACKEND": "local",
+    "RATE_LIMIT_ENABLED": "false",
+    "RESPONSE_CACHE_ENABLED": "false",
+    "RETENTION_SWEEP_ENABLED": "false",
+    "AGENT_ENGINE_ID": "loadtest",
+    "LOG_LEVEL": "WARNING",
+    # Gemini-like latencies and token counts
+    "FAKE_LLM_CONFIG": os.path.join(os.path.dirname(__file__), "fake_llm.json"),
+}
+
+
+def seed_users(db, auth_client, count: int) -> List[Dict[str, str]]:
+    """Store `count` user profiles and issue an ID token for each"""
+    from src.models.user import User, UserProfile
+
+    users = []
+    for index in range(count):
+        uid = f"loadtest-{index:05d}-{uuid.uuid4().hex[:8]}"
+        user = User(
+            uid=uid,
+            profile=UserProfile(name=f"Load User {index}", email=f"{uid}@example.com"),
+        )
+        # Keyed by uid, which is where get_current_user looks profiles up
+        db.collection("users").document(uid).set(user.model_dump())
+        users.append({"uid": uid, "token": auth_client.issue_id_token(uid)})
+    return users
+
+
+def serve(
+    host: str,
+    port: int,
+    users: int,
+    tokens_path: str,
+    token_lifetime: int = 24 * 3600,
+) -> None:
+    """Run one uvicorn worker on in-memory Firestore and Auth, fake models
+    and local storage, with `users` seeded users whose tokens are written
+    to `tokens_path` for the load generator"""
+    root = tempfile.mkdtemp(prefix="loadtest-")
+    for name, value in SERVER_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+    os.environ.setdefault("ARTIFACT_STORAGE_PATH", os.path.join(root, "artifacts"))
+    os.environ.setdefault("TRANSACTION_STORE_PATH", os.path.join(root, "transactions"))
+
+    # Configured before the app is imported, so its startup keeps these
+    from src.config.firebase_config import use_in_memory_firebase
+    from src.testing import FakeAuth
+
+    db, auth_client = use_in_memory_firebase(
+        auth_client=FakeAuth(token_lifetime=token_lifetime)
+    )
+    seeded = seed_users(db, auth_client, users)
+    with open(tokens_path, "w", encoding="utf-8") as f:
+        json.dump(seeded, f)
+    print(f"Seeded {users} users; tokens written to {tokens_path}", file=sys.stderr)
+
+    import uvicorn
+
+    from src.main import app
+
+    uvicorn.run(app, host=host, port=port, log_level="warning", access_log=False)
@@ -4,6 +4,7 @@ Run script for the Talk to Your Money Backend
 """
 
 import os
+import sys
 
 import uvicorn
 from dotenv import load_dotenv
@@ -16,6 +17,26 @@ if __name__ == "__main__":
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8000"))
     reload = os.getenv("DEBUG", "false").lower() == "true"
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+    if workers > 1 and not reload:
+        # Several processes: gunicorn with uvicorn workers, see gunicorn.conf.py
+        print(
+            f"Starting Talk to Your Money Backend on {host}:{port} ({workers} workers)"
+        )
+        os.execvp(
+            sys.executable,
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                "-c",
+                "gunicorn.conf.py",
+                "--bind",
+                f"{host}:{port}",
+                "src.main:app",
+            ],
+        )
 
     print(f"Starting Talk to Your Money Backend on {host}:{port}")
     print(f"Debug mode: {reload}")
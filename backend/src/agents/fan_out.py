@@ -0,0 +1,142 @@
+import asyncio
+import time
+from typing import Any, AsyncGenerator, Awaitable, Dict, Optional, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from pydantic import BaseModel, Field
+
+# Session state key holding the merged outputs of the data gathering branches
+GATHERED_DATA_STATE_KEY = "gathered_data"
+
+
+class BranchResult(BaseModel):
+    """Outcome of one fan-out branch"""
+
+    status: str = Field(..., description="'ok', 'timeout' or 'error'")
+    output: Optional[Any] = Field(None, description="Final output of the branch")
+    error: Optional[str] = Field(None, description="Error message if failed")
+    latency_ms: float = Field(..., description="Branch wall time")
+
+
+async def gather_with_deadlines(
+    calls: Dict[str, Awaitable[Any]],
+    timeout_seconds: float,
+    timeouts: Optional[Dict[str, float]] = None,
+) -> Dict[str, BranchResult]:
+    """Await independent calls concurrently, each with its own deadline.
+
+    Meant for tool functions that fetch from several sources; a slow or failing
+    source is reported in its BranchResult instead of failing the whole call.
+    """
+    timeouts = timeouts or {}
+
+    async def _run(name: str, call: Awaitable[Any]) -> Tuple[str, BranchResult]:
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(timeouts.get(name, timeout_seconds)):
+                output = await call
+            status, error = "ok", None
+        except TimeoutError:
+            output, status, error = None, "timeout", None
+        except Exception as e:
+            output, status, error = None, "error", str(e)
+        latency_ms = (time.perf_counter() - started) * 1000
+        return name, BranchResult(
+            status=status, output=output, error=error, latency_ms=latency_ms
+        )
+
+    results = await asyncio.gather(*(_run(name, call) for name, call in calls.items()))
+    return dict(results)
+
+
+def _create_branch_ctx(
+    agent: BaseAgent, sub_agent: BaseAgent, ctx: InvocationContext
+) -> InvocationContext:
+    """Give every branch an isolated conversation history"""
+    branch_ctx = ctx.model_copy()
+    suffix = f"{agent.name}.{sub_agent.name}"
+    branch_ctx.branch = f"{ctx.branch}.{suffix}" if ctx.branch else suffix
+    return branch_ctx
+
+
+class DeadlineParallelAgent(BaseAgent):
+    """Runs independent sub-agents concurrently, each with a deadline.
+
+    Works like ADK's ParallelAgent (isolated branches, interleaved events, and
+    every branch waits until the runner has processed its last event) but a
+    branch that overruns its deadline is cancelled instead of holding up the
+    turn. When all branches have finished, one event merges their final text
+    outputs into session state under `output_key`, for the agents that run
+    next. Turn latency is bounded by the slowest branch or the deadline.
+    """
+
+    timeout_seconds: float = 20.0
+    branch_timeouts: Dict[str, float] = Field(default_factory=dict)
+    output_key: str = GATHERED_DATA_STATE_KEY
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        queue: asyncio.Queue = asyncio.Queue()
+        outputs: Dict[str, str] = {}
+        results: Dict[str, BranchResult] = {}
+
+        async def _pump(sub_agent: BaseAgent) -> None:
+            started = time.perf_counter()
+            status, error = "ok", None
+            try:
+                async with asyncio.timeout(
+                    self.branch_timeouts.get(sub_agent.name, self.timeout_seconds)
+                ):
+                    async for event in sub_agent.run_async(
+                        _create_branch_ctx(self, sub_agent, ctx)
+                    ):
+                        processed = asyncio.Event()
+                        await queue.put((sub_agent.name, event, processed))
+                        await processed.wait()
+            except TimeoutError:
+                status = "timeout"
+            except Exception as e:
+                status, error = "error", str(e)
+            results[sub_agent.name] = BranchResult(
+                status=status,
+                output=outputs.get(sub_agent.name) or None,
+                error=error,
+                latency_ms=(time.perf_counter() - started) * 1000,
+            )
+            await queue.put((sub_agent.name, None, None))
+
+        tasks = [asyncio.create_task(_pump(sub_agent)) for sub_agent in self.sub_agents]
+        try:
+            running = len(tasks)
+            while running:
+                name, event, processed = await queue.get()
+                if event is None:
+                    running -= 1
+                    continue
+                if not event.partial and event.content and event.content.parts:
+                    text = "".join(
+                        part.text for part in event.content.parts if part.text
+                    )
+                    if text:
+                        outputs[name] = text
+                yield event
+                processed.set()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(
+                state_delta={
+                    self.output_key: {
+                        name: result.model_dump() for name, result in results.items()
+                    }
+                }
+            ),
+        )
@@ -0,0 +1,20 @@
+import os
+from typing import Union
+
+from google.adk.models.base_llm import BaseLlm
+
+
+def use_fake_models() -> bool:
+    """Whether agents run on the scripted offline model (load tests)"""
+    return os.getenv("AGENT_MODEL_BACKEND", "gemini").lower() == "fake"
+
+
+def get_model(model: str) -> Union[str, BaseLlm]:
+    """The model an agent runs on: `model` itself, or with
+    AGENT_MODEL_BACKEND=fake a scripted stand-in keeping its name"""
+    if use_fake_models():
+        # Imported on use: the testing package is not needed in production
+        from ..testing.llm import FakeLlm
+
+        return FakeLlm.from_env(model)
+    return model
@@ -0,0 +1,220 @@
+import os
+import re
+import time
+from typing import AsyncGenerator, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from pydantic import BaseModel, Field
+
+# Session state key (turn-scoped) holding the routing decision of the turn
+FORMATTER_ROUTING_STATE_KEY = "temp:formatter_routing"
+
+_NUMBER = re.compile(r"(?:₹|\$|rs\.?\s?)?\d[\d,]*(?:\.\d+)?%?", re.IGNORECASE)
+_TABLE_ROW = re.compile(r"^\s*\|.*\|\s*$", re.MULTILINE)
+_LIST_ITEM = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+", re.MULTILINE)
+_STRUCTURE_WORDS = re.compile(
+    r"\b(chart|graph|plot|table|breakdown|allocation|compare|comparison|"
+    r"trend|over time|projection|monthly|yearly|year-wise|month-wise|vs)\b",
+    re.IGNORECASE,
+)
+_REQUESTED_STRUCTURE = re.compile(r"\b(chart|graph|plot|table|form)s?\b", re.IGNORECASE)
+_FORM_CUES = re.compile(
+    r"\b(please (?:provide|share|tell|enter|fill)|could you (?:share|provide|"
+    r"tell)|can you (?:share|provide|tell)|what is your|what are your|"
+    r"let me know your|i need (?:some|a few|more) details)\b",
+    re.IGNORECASE,
+)
+
+_CLASSIFIER_PROMPT = """Decide whether the assistant answer below would be
+clearer for the user with a chart, a table or an input form, rather than as
+plain text. Reply with exactly one word: YES or NO.
+
+User question:
+{question}
+
+Assistant answer:
+{answer}
+"""
+
+
+class RoutingDecision(BaseModel):
+    """Whether the formatter runs for a turn, and why"""
+
+    route: str = Field(..., description="'format' or 'skip'")
+    classifier: str = Field(..., description="'heuristic' or 'model'")
+    reason: str = Field(..., description="Signal that decided the route")
+    score: int = Field(..., description="Heuristic structure score")
+    formatter_latency_ms: Optional[float] = Field(
+        None, description="Formatter wall time when it ran"
+    )
+    estimated_latency_saved_ms: Optional[float] = Field(
+        None, description="Average formatter wall time when it was skipped"
+    )
+
+
+def classify_response(question: str, answer: str) -> RoutingDecision:
+    """Cheap heuristic over the main agent output.
+
+    Returns a decision with classifier 'heuristic', or route 'uncertain' when
+    the signals are too weak either way.
+    """
+    if not answer.strip():
+        return RoutingDecision(
+            route="skip", classifier="heuristic", reason="empty_answer", score=0
+        )
+
+    if _REQUESTED_STRUCTURE.search(question):
+        return RoutingDecision(
+            route="format",
+            classifier="heuristic",
+            reason="structure_requested",
+            score=3,
+        )
+
+    score = 0
+    reasons = []
+    if len(_TABLE_ROW.findall(answer)) >= 2:
+        score += 2
+        reasons.append("markdown_table")
+    if len(_NUMBER.findall(answer)) >= 6:
+        score += 2
+        reasons.append("many_figures")
+    if len(_LIST_ITEM.findall(answer)) >= 3 and _NUMBER.search(answer):
+        score += 1
+        reasons.append("numeric_list")
+    if _STRUCTURE_WORDS.search(answer) or _STRUCTURE_WORDS.search(question):
+        score += 1
+        reasons.append("structure_words")
+    if _FORM_CUES.search(answer):
+        score += 2
+        reasons.append("asks_for_details")
+
+    if score >= 2:
+        route, reason = "format", "+".join(reasons)
+    elif score == 0 and len(answer) < 1200:
+        route, reason = "skip", "plain_text"
+    else:
+        route, reason = "uncertain", "+".join(reasons) or "long_text"
+    return RoutingDecision(
+        route=route, classifier="heuristic", reason=reason, score=score
+    )
+
+
+async def classify_with_model(model: str, question: str, answer: str) -> bool:
+    """Ask a small model whether structured output would help"""
+    from google import genai
+
+    client = genai.Client()
+    response = await client.aio.models.generate_content(
+        model=model,
+        contents=_CLASSIFIER_PROMPT.format(question=question, answer=answer[:4000]),
+    )
+    return (response.text or "").strip().upper().startswith("YES")
+
+
+class FormatterRouterAgent(BaseAgent):
+    """Runs the answering agent, then the formatter only when it is useful.
+
+    The formatter is an extra LLM round trip, so plain-text answers skip it.
+    Each turn emits an event whose state delta carries the RoutingDecision,
+    including the formatter time saved (estimated from recent formatter runs).
+    """
+
+    answer_agent: BaseAgent
+    formatter_agent: BaseAgent
+    classifier_model: Optional[str] = None
+    # Exponential moving average of formatter wall time, in milliseconds
+    average_formatter_latency_ms: Optional[float] = None
+
+    def __init__(
+        self,
+        name: str,
+        answer_agent: BaseAgent,
+        formatter_agent: BaseAgent,
+        classifier_model: Optional[str] = None,
+        description: str = "",
+    ):
+        super().__init__(
+            name=name,
+            description=description,
+            answer_agent=answer_agent,
+            formatter_agent=formatter_agent,
+            classifier_model=classifier_model,
+            sub_agents=[answer_agent, formatter_agent],
+        )
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        answer_text = ""
+        async for event in self.answer_agent.run_async(ctx):
+            if (
+                event.author == self.answer_agent.name
+                and not event.partial
+                and event.content
+            ):
+                answer_text += "".join(
+                    part.text for part in event.content.parts or [] if part.text
+                )
+            yield event
+
+        question = ""
+        if ctx.user_content:
+            question = "".join(
+                part.text for part in ctx.user_content.parts or [] if part.text
+            )
+
+        decision = await self._decide(question, answer_text)
+
+        if decision.route == "format":
+            started = time.perf_counter()
+            async for event in self.formatter_agent.run_async(ctx):
+                yield event
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            decision.formatter_latency_ms = elapsed_ms
+            self.average_formatter_latency_ms = (
+                elapsed_ms
+                if self.average_formatter_latency_ms is None
+                else 0.8 * self.average_formatter_latency_ms + 0.2 * elapsed_ms
+            )
+        else:
+            decision.estimated_latency_saved_ms = self.average_formatter_latency_ms
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(
+                state_delta={FORMATTER_ROUTING_STATE_KEY: decision.model_dump()}
+            ),
+        )
+
+    async def _decide(self, question: str, answer: str) -> RoutingDecision:
+        decision = classify_response(question, answer)
+        if decision.route != "uncertain":
+            return decision
+
+        if self.classifier_model:
+            try:
+                use_formatter = await classify_with_model(
+                    self.classifier_model, question, answer
+                )
+                decision.classifier = "model"
+                decision.route = "format" if use_formatter else "skip"
+                return decision
+            except Exception as e:
+                decision.reason += f"+model_error:{type(e).__name__}"
+
+        # Without a confident answer keep the previous always-format behaviour
+        decision.route = "format"
+        return decision
+
+
+def get_classifier_model() -> Optional[str]:
+    """Small model used when the heuristic is uncertain, if configured"""
+    # The classifier calls Gemini directly, which fake-model runs must not do
+    if os.getenv("AGENT_MODEL_BACKEND", "gemini").lower() == "fake":
+        return None
+    return os.getenv("FORMATTER_ROUTER_MODEL") or None
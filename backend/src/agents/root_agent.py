@@ -1,18 +1,26 @@
-from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.agents import LlmAgent
 from google.adk.tools import AgentTool
 
+from .models import get_model
 from .prompts import ROOT_FINANCIAL_AGENT_PROMPT
+from .response_router import FormatterRouterAgent, get_classifier_model
 from .sub_agents import finalise_response_agent
+from .transaction_tools import transaction_tools
 
 main_agent = LlmAgent(
-    model="gemini-2.0-flash",
+    model=get_model("gemini-2.0-flash"),
     name="root_agent",
     description="An helpful assistant that can answer questions and help with any task.",
     instruction=ROOT_FINANCIAL_AGENT_PROMPT,
+    tools=transaction_tools,
 )
 
-root_agent = SequentialAgent(
+# Only hands the answer to the formatter when a chart, table or form is likely
+# to help; plain-text answers skip the second LLM round trip
+root_agent = FormatterRouterAgent(
     name="root_agent",
-    sub_agents=[main_agent, finalise_response_agent],
+    answer_agent=main_agent,
+    formatter_agent=finalise_response_agent,
+    classifier_model=get_classifier_model(),
     description="An helpful assistant that can answer questions and help with any task.",
 )
@@ -1,12 +1,17 @@
+import logging
+import uuid
 from enum import Enum
-from turtle import st
 from typing import Literal, Optional
 
 from google.adk.agents import LlmAgent
+from google.adk.tools import ToolContext
 from pydantic import BaseModel, Field, ValidationError
 
+from ...models import get_model
 from .prompt import FINALIZE_RESPONSE_FORMATTER_AGENT
 
+logger = logging.getLogger(__name__)
+
 
 class FormField(BaseModel):
     id: str = Field(description="The id of the form field.")
@@ -79,11 +84,26 @@ class ChartTool(BaseModel):
     chart_description: str
 
 
-def chart_tool(chart: ChartTool):
+async def chart_tool(chart: ChartTool, tool_context: ToolContext):
     """
     Use this tool to create a chart for the user to view.
     """
-    return chart
+    # Imported on use: the services package imports the agents at load time
+    from ....dependencies.services import get_artifact_storage
+    from ....services.artifact_service import compact_chart_payload
+
+    chart = ChartTool.model_validate(chart)
+    try:
+        # Long series are downsampled; the full data is kept in storage
+        chart.chart_data = await compact_chart_payload(
+            get_artifact_storage(),
+            tool_context._invocation_context.user_id,
+            chart.chart_data,
+            chart.chart_type,
+        )
+    except Exception as e:
+        logger.warning("Error compacting chart: %s", e)
+    return chart.model_dump()
 
 
 class TableTool(BaseModel):
@@ -92,15 +112,45 @@ class TableTool(BaseModel):
     table_description: str
 
 
-def table_tool(table: TableTool):
+async def table_tool(table: TableTool, tool_context: ToolContext):
     """
     Use this tool to create a table for the user to view.
     """
-    return table
+    # Imported on use: the services package imports the agents at load time
+    from ....dependencies.services import get_artifact_storage
+    from ....services.table_store import (
+        TABLE_PAGE_ROWS,
+        TableStore,
+        normalize_table,
+    )
+
+    table = TableTool.model_validate(table)
+    columns, rows = normalize_table(table.table_headers, table.table_data)
+    # Tables that fit on one page are returned inline
+    if len(rows) <= TABLE_PAGE_ROWS:
+        return table.model_dump()
+
+    # Large tables are stored once; the message only carries the first page
+    # and the UI pages through the rest via the table artifact
+    store = TableStore(get_artifact_storage())
+    user_id = tool_context._invocation_context.user_id
+    table_id = uuid.uuid4().hex
+    try:
+        schema = await store.save(user_id, table_id, columns, rows)
+        first_page = await store.get_page(user_id, table_id, schema=schema)
+    except Exception as e:
+        logger.warning("Error storing table: %s", e)
+        return table.model_dump()
+    return {
+        "table_id": table_id,
+        "table_description": table.table_description,
+        "schema": schema,
+        **first_page,
+    }
 
 
 agent = LlmAgent(
-    model="gemini-2.0-flash",
+    model=get_model("gemini-2.0-flash"),
     name="finalise_response_agent",
     description="You are a helpful assistant that helps the user to get a formatted response from the other agents.",
     instruction=FINALIZE_RESPONSE_FORMATTER_AGENT,
@@ -0,0 +1,114 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from google.adk.tools import ToolContext
+
+
+def get_transaction_store():
+    # Imported on use: the services package imports the agents at load time
+    from ..services.transaction_store import get_transaction_store
+
+    return get_transaction_store()
+
+
+def _user_id(tool_context: ToolContext) -> str:
+    return tool_context._invocation_context.user_id
+
+
+async def get_transaction_overview(tool_context: ToolContext) -> Dict[str, Any]:
+    """
+    Describe the transaction data available from the user's uploaded statements:
+    how many transactions, the date range covered and the spending categories.
+    Call this first to know which periods and categories can be queried.
+    """
+    store = get_transaction_store()
+    return await asyncio.to_thread(store.get_overview, _user_id(tool_context))
+
+
+async def summarize_transactions(
+    tool_context: ToolContext,
+    group_by: List[str],
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    categories: Optional[List[str]] = None,
+    direction: Optional[str] = None,
+    search: Optional[str] = None,
+    top: int = 10,
+) -> Dict[str, Any]:
+    """
+    Total and count the user's transactions, computed over all their parsed
+    statements. Use this instead of reading statements to answer questions like
+    "how much did I spend on food last quarter" or "my monthly spending trend".
+
+    Args:
+        group_by: Zero, one or two of "category", "month", "quarter", "year",
+            "description". With two, each group is broken down by the second.
+        start_date: Inclusive start date, YYYY-MM-DD.
+        end_date: Inclusive end date, YYYY-MM-DD.
+        categories: Only these categories, e.g. ["food", "groceries"].
+        direction: "out" for spending, "in" for income, omit for both.
+        search: Only transactions whose description contains this text.
+        top: Maximum number of groups per level.
+
+    Returns:
+        {"total", "count", "groups": [{"key", "total", "count", "groups"?}]}.
+        Spending is negative, income positive.
+    """
+    store = get_transaction_store()
+    try:
+        return await asyncio.to_thread(
+            store.summarize,
+            _user_id(tool_context),
+            group_by=group_by[:2],
+            start_date=start_date,
+            end_date=end_date,
+            categories=categories,
+            direction=direction,
+            search=search,
+            top=min(top, 50),
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+async def find_transactions(
+    tool_context: ToolContext,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    categories: Optional[List[str]] = None,
+    direction: Optional[str] = None,
+    search: Optional[str] = None,
+    sort: str = "largest",
+    limit: int = 10,
+) -> List[Dict[str, Any]]:
+    """
+    List individual transactions from the user's parsed statements.
+
+    Args:
+        start_date: Inclusive start date, YYYY-MM-DD.
+        end_date: Inclusive end date, YYYY-MM-DD.
+        categories: Only these categories.
+        direction: "out" for spending, "in" for income, omit for both.
+        search: Only transactions whose description contains this text.
+        sort: "largest" (by absolute amount) or "latest".
+        limit: Maximum number of transactions, at most 50.
+    """
+    store = get_transaction_store()
+    return await asyncio.to_thread(
+        store.find_transactions,
+        _user_id(tool_context),
+        start_date=start_date,
+        end_date=end_date,
+        categories=categories,
+        direction=direction,
+        search=search,
+        sort=sort,
+        limit=min(limit, 50),
+    )
+
+
+transaction_tools = [
+    get_transaction_overview,
+    summarize_transactions,
+    find_transactions,
+]
@@ -1,22 +1,93 @@
-from typing import Any, Dict, List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
 
 from fastapi import (
     APIRouter,
+    BackgroundTasks,
     Depends,
     File,
     Form,
     HTTPException,
     Query,
+    Request,
     UploadFile,
 )
+from fastapi.responses import (
+    FileResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
+from fastapi.routing import APIRoute
 from pydantic import BaseModel
 
 from ..auth.firebase_auth import GetCurrentUserDep, get_current_user
-from ..dependencies import ArtifactServiceDep
+from ..dependencies import (
+    ArtifactServiceDep,
+    IngestionServiceDep,
+    PreviewServiceDep,
+)
 from ..models.artifact import ArtifactSource, ArtifactStatus, ArtifactType
+from ..services.artifact_service import (
+    UPLOAD_CHUNK_SIZE,
+    ArtifactContent,
+    UploadTooLargeError,
+    load_upload_size_limits,
+)
+from ..services.artifact_storage import ArtifactStorage
+from ..services.table_store import MAX_TABLE_PAGE_ROWS, TABLE_PAGE_ROWS
 
 router = APIRouter()
 
+# Room for the multipart boundaries, part headers and form fields of an upload
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+# Stored files never change (they are addressed by content hash), so clients
+# may keep them; "private" keeps shared caches out of per-user data
+ARTIFACT_CONTENT_CACHE_CONTROL = "private, max-age=86400, immutable"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def _serve_content(
+    request: Request, content: ArtifactContent, storage: ArtifactStorage
+) -> Response:
+    """Respond with a stored file, by redirect, 304, file or stream"""
+    # Object storage serves the bytes (and ranges) itself
+    if content.redirect_url:
+        return RedirectResponse(content.redirect_url, status_code=307)
+
+    headers = {"Cache-Control": ARTIFACT_CONTENT_CACHE_CONTROL}
+    if content.etag:
+        headers["ETag"] = content.etag
+        if _etag_matches(request.headers.get("if-none-match"), content.etag):
+            return Response(status_code=304, headers=headers)
+
+    if content.file_path:
+        # Handles Range/If-Range, and uses the server's pathsend extension
+        # for zero-copy transfer where the server supports it
+        return FileResponse(
+            content.file_path,
+            media_type=content.mime_type,
+            filename=content.filename,
+            content_disposition_type="inline",
+            headers=headers,
+        )
+
+    return StreamingResponse(
+        storage.read_stream(content.storage_key),
+        media_type=content.mime_type,
+        headers=headers,
+    )
+
 
 class ArtifactCreateRequest(BaseModel):
     message_id: str
@@ -44,8 +115,8 @@ class ArtifactResponse(BaseModel):
     title: str
     description: Optional[str]
     metadata: Optional[Dict[str, Any]]
-    created_at: str
-    updated_at: str
+    created_at: Union[str, datetime]
+    updated_at: Union[str, datetime]
     status: ArtifactStatus
     content: Optional[Dict[str, Any]]
     file_path: Optional[str]
@@ -53,7 +124,8 @@ class ArtifactResponse(BaseModel):
     mime_type: Optional[str]
     original_filename: Optional[str]
     storage_uri: Optional[str]
-    retention_expires_at: Optional[str]
+    content_hash: Optional[str] = None
+    retention_expires_at: Optional[Union[str, datetime]]
     consent_required: bool
     consent_granted: Optional[bool]
 
@@ -119,10 +191,53 @@ async def create_artifact(
         )
 
 
-@router.post("/{session_id}/artifacts/upload", response_model=ArtifactResponse)
+class UploadBodyLimitRoute(APIRoute):
+    """Route that refuses bodies larger than the largest upload limit.
+
+    FastAPI spools a multipart file to a temporary file before the handler
+    runs, so a limit checked in the handler comes too late. A declared
+    Content-Length over the limit is rejected without reading the body, and
+    a body that turns out longer is cut off once it crosses the limit. The
+    per-type limit is checked in the handler, once the filename is known.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request) -> Response:
+            max_size = max(load_upload_size_limits().values())
+            limit = max_size + UPLOAD_FORM_OVERHEAD
+            detail = f"Uploads are limited to {max_size} bytes"
+            declared = request.headers.get("content-length", "")
+            if declared.isdigit() and int(declared) > limit:
+                raise HTTPException(status_code=413, detail=detail)
+
+            received = 0
+            receive = request.receive
+
+            async def limited_receive():
+                nonlocal received
+                message = await receive()
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail=detail)
+                return message
+
+            return await handler(Request(request.scope, limited_receive))
+
+        return limited_handler
+
+
+upload_router = APIRouter(route_class=UploadBodyLimitRoute)
+
+
+@upload_router.post("/{session_id}/artifacts/upload", response_model=ArtifactResponse)
 async def upload_file_artifact(
     current_user: GetCurrentUserDep,
     artifact_service: ArtifactServiceDep,
+    ingestion_service: IngestionServiceDep,
+    preview_service: PreviewServiceDep,
+    background_tasks: BackgroundTasks,
     session_id: str,
     file: UploadFile = File(...),
     message_id: str = Form(...),
@@ -133,25 +248,47 @@ async def upload_file_artifact(
     try:
         user_id = current_user.uid
 
-        # Read file data
-        file_data = await file.read()
+        # The body was capped by UploadBodyLimitRoute; this applies the
+        # limit of the file's type before it is copied to storage
+        artifact_service.check_upload_size(file.filename, file.size)
+
+        async def file_chunks():
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                yield chunk
 
         artifact = await artifact_service.create_user_upload_artifact(
             session_id=session_id,
             user_id=user_id,
             message_id=message_id,
-            file_data=file_data,
+            file_chunks=file_chunks(),
             filename=file.filename,
             mime_type=file.content_type,
             title=title,
             description=description,
         )
 
+        # Statements are parsed after the response is sent
+        if ingestion_service.is_ingestible(artifact):
+            artifact = await ingestion_service.mark_processing(artifact)
+            background_tasks.add_task(
+                ingestion_service.ingest_artifact, artifact.id, user_id
+            )
+        # Thumbnails too, so the sidebar never fetches the full file
+        if preview_service.is_previewable(artifact):
+            background_tasks.add_task(
+                preview_service.generate_preview, artifact.id, user_id
+            )
+
         return ArtifactResponse.model_validate(artifact)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
 
 
+router.include_router(upload_router)
+
+
 @router.post("/{session_id}/artifacts/{artifact_id}/consent")
 async def handle_artifact_consent(
     session_id: str,
@@ -271,6 +408,132 @@ async def get_artifact(
         raise HTTPException(status_code=500, detail=f"Failed to get artifact: {str(e)}")
 
 
+@router.get("/artifacts/charts/{chart_hash}")
+async def get_chart_data(
+    chart_hash: str,
+    request: Request,
+    current_user: GetCurrentUserDep,
+    artifact_service: ArtifactServiceDep,
+):
+    """Get the full-resolution data of a downsampled chart"""
+    try:
+        etag = f'"{chart_hash}"'
+        headers = {"Cache-Control": ARTIFACT_CONTENT_CACHE_CONTROL, "ETag": etag}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        payload = await artifact_service.get_chart_data(current_user.uid, chart_hash)
+        if payload is None:
+            raise HTTPException(status_code=404, detail="Chart data not found")
+        return Response(payload, media_type="application/json", headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to get chart data: {str(e)}"
+        )
+
+
+@router.get("/{session_id}/artifacts/{artifact_id}/content")
+async def download_artifact_content(
+    session_id: str,
+    artifact_id: str,
+    request: Request,
+    current_user: GetCurrentUserDep,
+    artifact_service: ArtifactServiceDep,
+):
+    """Download an artifact's file, with Range and conditional request support"""
+    try:
+        user_id = current_user.uid
+        artifact = await artifact_service.get_artifact(artifact_id, user_id)
+        if not artifact or artifact.session_id != session_id:
+            raise HTTPException(status_code=404, detail="Artifact not found")
+
+        content = await artifact_service.get_artifact_content(artifact)
+        if content is None:
+            raise HTTPException(status_code=404, detail="Artifact has no stored file")
+
+        return _serve_content(request, content, artifact_service.storage)
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to download artifact: {str(e)}"
+        )
+
+
+@router.get("/{session_id}/artifacts/{artifact_id}/preview")
+async def download_artifact_preview(
+    session_id: str,
+    artifact_id: str,
+    request: Request,
+    current_user: GetCurrentUserDep,
+    artifact_service: ArtifactServiceDep,
+):
+    """Download the thumbnail of an image or PDF artifact"""
+    try:
+        user_id = current_user.uid
+        artifact = await artifact_service.get_artifact(artifact_id, user_id)
+        if not artifact or artifact.session_id != session_id:
+            raise HTTPException(status_code=404, detail="Artifact not found")
+
+        content = await artifact_service.get_preview_content(artifact)
+        if content is None:
+            raise HTTPException(status_code=404, detail="Artifact has no preview")
+
+        return _serve_content(request, content, artifact_service.storage)
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to download preview: {str(e)}"
+        )
+
+
+@router.get("/{session_id}/artifacts/{artifact_id}/rows")
+async def get_table_artifact_rows(
+    session_id: str,
+    artifact_id: str,
+    current_user: GetCurrentUserDep,
+    artifact_service: ArtifactServiceDep,
+    cursor: Optional[str] = Query(None, description="Cursor from the last page"),
+    limit: int = Query(TABLE_PAGE_ROWS, ge=1, le=MAX_TABLE_PAGE_ROWS),
+    sort: Optional[str] = Query(None, description="Column to sort by"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns"),
+):
+    """Page through a table artifact's rows, sorted and projected server-side"""
+    try:
+        user_id = current_user.uid
+        try:
+            artifact = await artifact_service.get_artifact(artifact_id, user_id)
+        except ValueError:
+            artifact = None
+        if not artifact or artifact.session_id != session_id:
+            raise HTTPException(status_code=404, detail="Artifact not found")
+
+        return await artifact_service.get_table_rows(
+            artifact,
+            cursor=cursor,
+            limit=limit,
+            sort=sort,
+            descending=order == "desc",
+            columns=[c.strip() for c in columns.split(",")] if columns else None,
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to get table rows: {str(e)}"
+        )
+
+
 @router.put("/{session_id}/artifacts/{artifact_id}", response_model=ArtifactResponse)
 async def update_artifact(
     session_id: str,
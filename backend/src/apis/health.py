@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 
 from ..dependencies import RunnerManagerServiceDep
+from ..observability.metrics import render_metrics
 
 router = APIRouter()
 
@@ -38,3 +39,10 @@ async def readiness_check(
 async def liveness_check():
     """Liveness check endpoint for Kubernetes"""
     return {"status": "alive", "service": "Talk to Your Money Backend"}
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in the text exposition format"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -5,8 +5,13 @@ from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from ..auth.firebase_auth import GetCurrentUserDep
-from ..dependencies import MessageServiceDep, RunnerManagerServiceDep
+from ..dependencies import (
+    MessageServiceDep,
+    RateLimitServiceDep,
+    RunnerManagerServiceDep,
+)
 from ..models.message import MessageResponse, MessageRole
+from .responses import PydanticJSONResponse
 
 router = APIRouter()
 
@@ -24,6 +29,9 @@ class MessageUpdateRequest(BaseModel):
 class ChatMessageRequest(BaseModel):
     content: str
     metadata: Optional[Dict[str, Any]] = None
+    # Generic questions that don't touch the user's own data may be answered
+    # from the response cache
+    requires_personal_data: bool = True
 
 
 class ChatMessageResponse(BaseModel):
@@ -51,7 +59,7 @@ async def create_message(
             human_content=request.human_content,
             metadata=request.metadata,
         )
-        return MessageResponse.model_validate(message)
+        return PydanticJSONResponse(MessageResponse.model_validate(message))
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to create message: {str(e)}"
@@ -71,7 +79,9 @@ async def get_session_messages(
         messages = await message_service.get_session_messages(
             session_id, user_id, limit
         )
-        return [MessageResponse.model_validate(message) for message in messages]
+        return PydanticJSONResponse(
+            [MessageResponse.model_validate(message) for message in messages]
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get messages: {str(e)}")
 
@@ -92,7 +102,7 @@ async def get_message(
         message = await message_service.get_message(message_id, user_id)
         if not message or message.session_id != session_id:
             raise HTTPException(status_code=404, detail="Message not found")
-        return MessageResponse.model_validate(message)
+        return PydanticJSONResponse(MessageResponse.model_validate(message))
     except HTTPException:
         raise
     except Exception as e:
@@ -118,7 +128,7 @@ async def update_message(
         )
         if not message or message.session_id != session_id:
             raise HTTPException(status_code=404, detail="Message not found")
-        return MessageResponse.model_validate(message)
+        return PydanticJSONResponse(MessageResponse.model_validate(message))
     except HTTPException:
         raise
     except Exception as e:
@@ -161,11 +171,25 @@ async def send_chat_message(
     current_user: GetCurrentUserDep,
     runner_manager_service: RunnerManagerServiceDep,
     message_service: MessageServiceDep,
+    rate_limit_service: RateLimitServiceDep,
 ):
     """Send a chat message and get AI response"""
     try:
         user_id = current_user.uid
 
+        # Checked before the turn starts so a limited user costs no model calls
+        if rate_limit_service is not None:
+            decision = await rate_limit_service.check(current_user)
+            if not decision.allowed:
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"Rate limit exceeded ({decision.limit}) for tier "
+                    f"'{decision.tier}'",
+                    headers={
+                        "Retry-After": rate_limit_service.retry_after_header(decision)
+                    },
+                )
+
         async def event_stream():
             # Process message through agent system
             async for event in runner_manager_service.process_user_message(
@@ -173,11 +197,15 @@ async def send_chat_message(
                 session_id=session_id,
                 message_content=request.content,
                 backend_session_id=session_id,
+                requires_personal_data=request.requires_personal_data,
+                rate_limit_tier=current_user.tier,
             ):
                 yield event
 
         return StreamingResponse(event_stream(), media_type="application/json")
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to process chat message: {str(e)}"
@@ -197,7 +225,9 @@ async def get_user_conversation(
         messages = await message_service.get_session_messages(
             session_id=session_id, user_id=user_id, limit=limit
         )
-        return [MessageResponse.model_validate(message) for message in messages]
+        return PydanticJSONResponse(
+            [MessageResponse.model_validate(message) for message in messages]
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to get user conversation: {str(e)}"
@@ -0,0 +1,134 @@
+import marshal
+import time
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+
+from ..auth.firebase_auth import GetAdminUserDep
+from ..dependencies import RunnerManagerServiceDep
+from ..observability.profiling import (
+    get_loop_monitor,
+    memory_profiler,
+    profile_store,
+    profiling_enabled,
+    sample_event_loop,
+)
+
+
+def require_profiling_enabled():
+    """Hide the profiling routes unless PROFILING_ENABLED is set"""
+    if not profiling_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+router = APIRouter(dependencies=[Depends(require_profiling_enabled)])
+
+
+def _collapsed_download(text: str, name: str) -> PlainTextResponse:
+    """Collapsed stacks as a file for flamegraph.pl, speedscope or inferno"""
+    return PlainTextResponse(
+        text,
+        headers={
+            "Content-Disposition": f'attachment; filename="{name}-{int(time.time())}.collapsed"'
+        },
+    )
+
+
+@router.post("/sample")
+async def sample_worker(
+    admin: GetAdminUserDep,
+    seconds: float = Query(10.0, gt=0, le=60),
+    interval_ms: float = Query(5.0, ge=1, le=100),
+):
+    """Sample this worker's event loop thread and download collapsed stacks"""
+    stacks = await sample_event_loop(seconds, interval_ms / 1000)
+    return _collapsed_download(stacks, "loop-samples")
+
+
+@router.get("/profiles")
+async def list_request_profiles(admin: GetAdminUserDep):
+    """List the recent per-request profiles (requests sent with X-Profile)"""
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}")
+async def download_request_profile(
+    profile_id: str,
+    admin: GetAdminUserDep,
+    format: Literal["collapsed", "text", "pstats"] = Query("collapsed"),
+):
+    """Download a per-request profile.
+
+    Sampled profiles are collapsed stacks; cProfile runs are available as a
+    text summary or a pstats file (for snakeviz or flameprof).
+    """
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if profile["kind"] == "sample":
+        return _collapsed_download(profile["collapsed"], f"request-{profile_id}")
+    if format == "pstats":
+        return Response(
+            marshal.dumps(profile["stats"].stats),
+            media_type="application/octet-stream",
+            headers={
+                "Content-Disposition": f'attachment; filename="request-{profile_id}.pstats"'
+            },
+        )
+    return PlainTextResponse(profile["text"])
+
+
+@router.get("/loop")
+async def get_event_loop_lag(
+    admin: GetAdminUserDep,
+    format: Literal["json", "collapsed"] = Query("json"),
+):
+    """Event-loop lag and the stacks captured while the loop was blocked"""
+    monitor = get_loop_monitor()
+    if format == "collapsed":
+        return _collapsed_download(monitor.slow_callbacks_collapsed(), "slow-callbacks")
+    return monitor.stats()
+
+
+@router.post("/memory/baseline")
+async def take_memory_baseline(
+    admin: GetAdminUserDep,
+    runner_manager_service: RunnerManagerServiceDep,
+):
+    """Start tracemalloc if needed and snapshot the current allocations"""
+    return {
+        **memory_profiler.take_baseline(),
+        "adk_sessions": runner_manager_service.session_stats(),
+    }
+
+
+@router.get("/memory/diff")
+async def get_memory_diff(
+    admin: GetAdminUserDep,
+    runner_manager_service: RunnerManagerServiceDep,
+    top: int = Query(25, ge=1, le=500),
+    format: Literal["json", "collapsed"] = Query("json"),
+):
+    """Allocation growth since the baseline, largest first"""
+    try:
+        stats = memory_profiler.diff(top)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if format == "collapsed":
+        return _collapsed_download(
+            memory_profiler.diff_collapsed(stats), "memory-growth"
+        )
+    return {
+        "adk_sessions": runner_manager_service.session_stats(),
+        "top": memory_profiler.diff_json(stats),
+    }
+
+
+@router.delete("/memory")
+async def stop_memory_tracing(admin: GetAdminUserDep):
+    """Stop tracemalloc, which slows allocations while it runs"""
+    memory_profiler.stop()
+    return {"tracing": False}
@@ -0,0 +1,19 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class PydanticJSONResponse(JSONResponse):
+    """JSON response encoded by pydantic-core in a single pass.
+
+    Accepts anything `JSONResponse` does, plus Pydantic models (or lists and
+    dicts of them), which are serialized straight to bytes without going
+    through `model_dump` and `json.dumps`. Handlers that already built their
+    response models return one of these directly, which also skips FastAPI
+    validating them against `response_model` a second time.
+    """
+
+    def render(self, content: Any) -> bytes:
+        # NaN and infinities are not JSON; json.dumps would refuse them
+        return to_json(content, by_alias=True, inf_nan_mode="null")
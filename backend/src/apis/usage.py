@@ -0,0 +1,52 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..auth.firebase_auth import GetCurrentUserDep
+from ..dependencies import UsageServiceDep
+from ..models.usage import UsageCounter
+
+router = APIRouter()
+
+
+@router.get("/today", response_model=Optional[UsageCounter])
+async def get_today_usage(
+    current_user: GetCurrentUserDep,
+    usage_service: UsageServiceDep,
+):
+    """Get the current user's token and cost totals for today (UTC)"""
+    try:
+        return await usage_service.get_user_day_usage(current_user.uid)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get usage: {str(e)}")
+
+
+@router.get("/sessions", response_model=List[UsageCounter])
+async def get_most_expensive_sessions(
+    current_user: GetCurrentUserDep,
+    usage_service: UsageServiceDep,
+    limit: int = Query(10, ge=1, le=100),
+):
+    """Get the current user's sessions ordered by estimated cost"""
+    try:
+        return await usage_service.get_most_expensive_sessions(current_user.uid, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get usage: {str(e)}")
+
+
+@router.get("/sessions/{session_id}", response_model=UsageCounter)
+async def get_session_usage(
+    session_id: str,
+    current_user: GetCurrentUserDep,
+    usage_service: UsageServiceDep,
+):
+    """Get token and cost totals for one of the current user's sessions"""
+    try:
+        usage = await usage_service.get_session_usage(session_id)
+        if not usage or usage.user_id != current_user.uid:
+            raise HTTPException(status_code=404, detail="Usage not found")
+        return usage
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get usage: {str(e)}")
@@ -1,3 +1,5 @@
+import logging
+import os
 from typing import Annotated, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -7,8 +9,11 @@ from pydantic import BaseModel
 from ..config.firebase_config import get_auth
 from ..dependencies import UserRepositoryDep
 from ..models import User, UserConsents, UserProfile
+from ..observability.tracing import traced, tracer
 from ..repositories import UserRepository
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 security = HTTPBearer()
 
@@ -42,6 +47,7 @@ class UserConsentUpdateRequest(BaseModel):
     retention_days: Optional[int] = None
 
 
+@traced("auth.get_current_user")
 async def get_current_user(
     user_repository_service: UserRepositoryDep,
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -49,18 +55,17 @@ async def get_current_user(
     """Get current user from Firebase token"""
     try:
         token = credentials.credentials
-        print(f"🔍 Received token in get_current_user: {token[:50]}...")
 
         # Get Firebase Auth client
         auth_client = get_auth()
 
         # Try to verify as ID token first (in case frontend sends ID token directly)
         try:
-            decoded_token = auth_client.verify_id_token(token)
+            with tracer.start_as_current_span("auth.verify_id_token"):
+                decoded_token = auth_client.verify_id_token(token)
             uid = decoded_token["uid"]
-            print(f"✅ Verified as ID token for UID: {uid}")
         except Exception as id_token_error:
-            print(f"❌ ID token verification failed: {id_token_error}")
+            logger.info("ID token verification failed: %s", id_token_error)
             # Custom tokens cannot be verified server-side directly
             # They are meant for Firebase client SDK
             # For now, we'll need a different approach
@@ -70,18 +75,16 @@ async def get_current_user(
             )
 
         # Fetch user from Firestore database
-        print(f"🔍 Fetching user {uid} from database...")
         user = await user_repository_service.get_user(uid)
         if not user:
-            print(f"❌ User {uid} not found in database")
+            logger.warning("Authenticated user %s not found in database", uid)
             raise HTTPException(status_code=404, detail="User not found in database")
 
-        print(f"✅ User {uid} found and returned")
         return user
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"❌ Unexpected error in get_current_user: {type(e).__name__}: {str(e)}")
+    except Exception:
+        logger.exception("Unexpected error in get_current_user")
         raise HTTPException(
             status_code=401, detail="Invalid authentication credentials"
         )
@@ -90,6 +93,22 @@ async def get_current_user(
 GetCurrentUserDep = Annotated[User, Depends(get_current_user)]
 
 
+def is_admin_uid(uid: str) -> bool:
+    """Whether a user is listed in ADMIN_UIDS (comma-separated)"""
+    admin_uids = {u.strip() for u in os.getenv("ADMIN_UIDS", "").split(",")}
+    return bool(uid) and uid in admin_uids
+
+
+async def get_admin_user(current_user: GetCurrentUserDep) -> User:
+    """Get the current user, requiring them to be an admin"""
+    if not is_admin_uid(current_user.uid):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+
+GetAdminUserDep = Annotated[User, Depends(get_admin_user)]
+
+
 def is_email(identifier: str) -> bool:
     """Check if identifier is an email address"""
     return "@" in identifier
@@ -191,35 +210,19 @@ async def login_user(request: UserLoginRequest):
 async def firebase_auth(request: GoogleSignInRequest):
     """Handle all FirebaseUI authentication (Google, Email, Phone)"""
     try:
-        print(
-            f"🔥 Firebase auth request received with ID token: {request.id_token[:50]}..."
-        )
-        print(f"📏 Token length: {len(request.id_token)}")
-        print(f"🔍 Token format check: {'eyJ' in request.id_token[:10]}")
-
         # Verify the ID token (works for all Firebase auth methods)
-        print("🔍 Verifying ID token...")
         try:
             decoded_token = get_auth().verify_id_token(request.id_token)
             uid = decoded_token["uid"]
-            print(f"✅ ID token verified successfully for UID: {uid}")
-            print(
-                f"📋 Decoded token info: name={decoded_token.get('name')}, email={decoded_token.get('email')}"
-            )
         except Exception as e:
-            print(f"❌ Invalid ID token error: {e}")
-            print(
-                f"🔍 Token details: length={len(request.id_token)}, starts_with_eyJ={'eyJ' in request.id_token[:10]}"
-            )
+            logger.info("Invalid ID token (length %d): %s", len(request.id_token), e)
             raise HTTPException(status_code=401, detail=f"Invalid ID token: {str(e)}")
 
         # Check if user exists in our database
-        print(f"🔍 Checking if user {uid} exists in database...")
         user = await UserRepository().get_user(uid)
-        print(f"👤 User found in database: {user is not None}")
 
         if not user:
-            print("📝 Creating new user profile...")
+            logger.info("Creating profile for new user %s", uid)
             # Create new user profile if they don't exist
             user_profile = UserProfile(
                 name=decoded_token.get("name", "Unknown"),
@@ -235,19 +238,15 @@ async def firebase_auth(request: GoogleSignInRequest):
             )
 
             # Save to database
-            print("💾 Saving user to database...")
             success = await UserRepository().create_user(user)
             if not success:
-                print("❌ Failed to save user to database")
+                logger.error("Failed to save profile of new user %s", uid)
                 raise HTTPException(
                     status_code=500, detail="Failed to create user profile"
                 )
-            print("✅ User saved to database successfully")
 
         # Generate custom token
-        print("🎫 Generating custom token...")
         custom_token = get_auth().create_custom_token(uid)
-        print("✅ Custom token generated successfully")
 
         return {
             "message": "Authentication successful",
@@ -259,10 +258,7 @@ async def firebase_auth(request: GoogleSignInRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Unexpected error in firebase_auth: {type(e).__name__}: {str(e)}")
-        import traceback
-
-        traceback.print_exc()
+        logger.exception("Unexpected error in firebase_auth")
         raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
 
 
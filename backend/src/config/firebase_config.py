@@ -4,7 +4,7 @@ Firebase configuration and initialization module
 
 import logging
 import os
-from typing import Optional
+from typing import Any, Optional, Tuple
 
 import firebase_admin
 from firebase_admin import auth, credentials, firestore
@@ -15,15 +15,37 @@ logger = logging.getLogger(__name__)
 # Global Firebase app reference
 _firebase_app: Optional[firebase_admin.App] = None
 
+# In-memory Firestore and Auth used instead of Firebase (FIREBASE_BACKEND=memory)
+_in_memory_clients: Optional[Tuple[Any, Any]] = None
 
-def initialize_firebase() -> firebase_admin.App:
+
+def use_in_memory_firebase(db=None, auth_client=None) -> Tuple[Any, Any]:
+    """Serve get_firestore() and get_auth() from in-memory fakes.
+
+    For offline runs (benchmarks, load tests, local development); nothing is
+    persisted and ID tokens must come from the FakeAuth instance.
+    """
+    global _in_memory_clients
+
+    from ..testing import FakeAuth, InMemoryFirestore
+
+    _in_memory_clients = (db or InMemoryFirestore(), auth_client or FakeAuth())
+    return _in_memory_clients
+
+
+def initialize_firebase() -> Optional[firebase_admin.App]:
     """Initialize Firebase Admin SDK"""
     global _firebase_app
 
-    if _firebase_app is not None:
+    if _firebase_app is not None or _in_memory_clients is not None:
         logger.info("Firebase already initialized")
         return _firebase_app
 
+    if os.getenv("FIREBASE_BACKEND", "firebase").lower() == "memory":
+        use_in_memory_firebase()
+        logger.warning("Using in-memory Firestore and Auth; nothing is persisted")
+        return None
+
     FIREBASE_CRED_PATH = os.getenv("FIREBASE_CRED_PATH")
     if not FIREBASE_CRED_PATH:
         raise ValueError("FIREBASE_CRED_PATH environment variable is not set")
@@ -37,7 +59,9 @@ def initialize_firebase() -> firebase_admin.App:
         # Explicitly use service account credentials to avoid default credentials
         cred = credentials.Certificate(FIREBASE_CRED_PATH)
         _firebase_app = firebase_admin.initialize_app(cred)
-        logger.info(f"Firebase initialized with credentials from: {FIREBASE_CRED_PATH}")
+        logger.info(
+            "Firebase initialized with credentials from: %s", FIREBASE_CRED_PATH
+        )
 
         # Verify the project ID
         with open(FIREBASE_CRED_PATH, "r") as f:
@@ -45,12 +69,12 @@ def initialize_firebase() -> firebase_admin.App:
 
             service_account = json.load(f)
             project_id = service_account.get("project_id")
-            logger.info(f"Firebase project ID: {project_id}")
+            logger.info("Firebase project ID: %s", project_id)
 
         return _firebase_app
 
     except Exception as e:
-        logger.error(f"Firebase initialization failed: {e}")
+        logger.error("Firebase initialization failed: %s", e)
         raise
 
 
@@ -65,6 +89,8 @@ def get_firebase_app() -> firebase_admin.App:
 
 def get_auth() -> auth.Client:
     """Get Firebase Auth client"""
+    if _in_memory_clients is not None:
+        return _in_memory_clients[1]
     if _firebase_app is None:
         raise RuntimeError(
             "Firebase app not initialized. Call initialize_firebase() first."
@@ -74,6 +100,8 @@ def get_auth() -> auth.Client:
 
 def get_firestore() -> Client:
     """Get Firestore client"""
+    if _in_memory_clients is not None:
+        return _in_memory_clients[0]
     if _firebase_app is None:
         raise RuntimeError(
             "Firebase app not initialized. Call initialize_firebase() first."
@@ -83,17 +111,18 @@ def get_firestore() -> Client:
 
 def cleanup_firebase():
     """Clean up Firebase resources"""
-    global _firebase_app
+    global _firebase_app, _in_memory_clients
 
+    _in_memory_clients = None
     if _firebase_app is not None:
         try:
             firebase_admin.delete_app(_firebase_app)
             _firebase_app = None
             logger.info("Firebase app deleted successfully")
         except Exception as e:
-            logger.warning(f"Error cleaning up Firebase: {e}")
+            logger.warning("Error cleaning up Firebase: %s", e)
 
 
 def is_initialized() -> bool:
     """Check if Firebase is initialized"""
-    return _firebase_app is not None
+    return _firebase_app is not None or _in_memory_clients is not None
@@ -1,13 +1,26 @@
 # Import and include routers AFTER app creation
 from fastapi import FastAPI
 
-from src.apis import artifacts, chat_sessions, health, messages
+from src.apis import artifacts, chat_sessions, health, messages, profiling, usage
+from src.apis.responses import PydanticJSONResponse
 from src.auth import firebase_auth
 
 
 def setup_app(app: FastAPI):
-    app.include_router(firebase_auth.router, prefix="/auth", tags=["Authentication"])
-    app.include_router(chat_sessions.router, prefix="/sessions", tags=["Chat Sessions"])
-    app.include_router(messages.router, prefix="/sessions", tags=["Messages"])
-    app.include_router(artifacts.router, prefix="/sessions", tags=["Artifacts"])
-    app.include_router(health.router, tags=["Health"])
+    # Every route encodes its JSON with pydantic-core rather than json.dumps
+    routers = [
+        (firebase_auth.router, "/auth", "Authentication"),
+        (chat_sessions.router, "/sessions", "Chat Sessions"),
+        (messages.router, "/sessions", "Messages"),
+        (artifacts.router, "/sessions", "Artifacts"),
+        (usage.router, "/usage", "Usage"),
+        (health.router, "", "Health"),
+        (profiling.router, "/admin/profiling", "Admin"),
+    ]
+    for router, prefix, tag in routers:
+        app.include_router(
+            router,
+            prefix=prefix,
+            tags=[tag],
+            default_response_class=PydanticJSONResponse,
+        )
@@ -3,27 +3,39 @@ Dependencies package for FastAPI dependency injection
 """
 
 from .repositories import (
+    ArtifactBlobRepositoryDep,
     ArtifactRepositoryDep,
     ChatSessionRepositoryDep,
     MessageRepositoryDep,
+    UsageRepositoryDep,
     UserRepositoryDep,
 )
 from .services import (
     ArtifactServiceDep,
     ArtifactServiceWithDepsDep,
     ChatSessionServiceDep,
+    IngestionServiceDep,
     MessageServiceDep,
+    PreviewServiceDep,
+    RateLimitServiceDep,
     RunnerManagerServiceDep,
+    UsageServiceDep,
 )
 
 __all__ = [
+    "ArtifactBlobRepositoryDep",
     "ArtifactRepositoryDep",
     "ChatSessionRepositoryDep",
     "MessageRepositoryDep",
+    "UsageRepositoryDep",
     "UserRepositoryDep",
     "ArtifactServiceDep",
     "ArtifactServiceWithDepsDep",
     "ChatSessionServiceDep",
+    "IngestionServiceDep",
     "MessageServiceDep",
+    "PreviewServiceDep",
+    "RateLimitServiceDep",
     "RunnerManagerServiceDep",
+    "UsageServiceDep",
 ]
@@ -8,9 +8,11 @@ from typing import Annotated
 from fastapi import Depends
 
 from ..config.firebase_config import get_firestore
+from ..repositories.artifact_blob_repository import ArtifactBlobRepository
 from ..repositories.artifact_repository import ArtifactRepository
 from ..repositories.chat_session_repository import ChatSessionRepository
 from ..repositories.message_repository import MessageRepository
+from ..repositories.usage_repository import UsageRepository
 from ..repositories.user_repository import UserRepository
 
 
@@ -21,6 +23,13 @@ def get_artifact_repository() -> ArtifactRepository:
     return ArtifactRepository(db=db)
 
 
+@cache
+def get_artifact_blob_repository() -> ArtifactBlobRepository:
+    """Get ArtifactBlobRepository instance with dependency injection"""
+    db = get_firestore()
+    return ArtifactBlobRepository(db=db)
+
+
 @cache
 def get_chat_session_repository() -> ChatSessionRepository:
     """Get ChatSessionRepository instance with dependency injection"""
@@ -42,12 +51,22 @@ def get_user_repository() -> UserRepository:
     return UserRepository(db=db)
 
 
+@cache
+def get_usage_repository() -> UsageRepository:
+    """Get UsageRepository instance with dependency injection"""
+    db = get_firestore()
+    return UsageRepository(db=db)
+
+
 ArtifactRepositoryDep = Annotated[
     ArtifactRepository,
     Depends(
         get_artifact_repository,
     ),
 ]
+ArtifactBlobRepositoryDep = Annotated[
+    ArtifactBlobRepository, Depends(get_artifact_blob_repository)
+]
 ChatSessionRepositoryDep = Annotated[
     ChatSessionRepository, Depends(get_chat_session_repository)
 ]
@@ -58,3 +77,4 @@ MessageRepositoryDep = Annotated[
     ),
 ]
 UserRepositoryDep = Annotated[UserRepository, Depends(get_user_repository)]
+UsageRepositoryDep = Annotated[UsageRepository, Depends(get_usage_repository)]
@@ -2,22 +2,43 @@
 Service dependencies for FastAPI dependency injection
 """
 
+import os
 from functools import cache
-from typing import Annotated
+from typing import Annotated, Optional
 
 from fastapi import Depends
 
 from ..config.firebase_config import get_auth
 from ..dependencies.repositories import (
+    ArtifactBlobRepositoryDep,
     ArtifactRepositoryDep,
     ChatSessionRepositoryDep,
     MessageRepositoryDep,
+    UsageRepositoryDep,
     UserRepositoryDep,
+    get_artifact_blob_repository,
+    get_artifact_repository,
+    get_message_repository,
+    get_user_repository,
 )
 from ..services.artifact_service import ArtifactService
+from ..services.artifact_storage import ArtifactStorage, create_artifact_storage
 from ..services.chat_session_service import ChatSessionService
+from ..services.ingestion_service import IngestionService
 from ..services.message_service import MessageService
+from ..services.preview_service import PreviewService
+from ..services.rate_limit_service import RateLimitService
+from ..services.response_cache_service import ResponseCacheService
+from ..services.retention_service import RetentionService
 from ..services.runner_manager_service import RunnerManagerService
+from ..services.transaction_store import TransactionStore, get_transaction_store
+from ..services.usage_service import UsageService
+
+
+@cache
+def get_artifact_storage() -> ArtifactStorage:
+    """Get the artifact storage backend selected by the environment"""
+    return create_artifact_storage()
 
 
 @cache
@@ -25,9 +46,14 @@ def get_artifact_service(
     artifact_repo: ArtifactRepositoryDep,
     message_repo: MessageRepositoryDep,
     user_repo: UserRepositoryDep,
+    blob_repo: ArtifactBlobRepositoryDep,
+    storage: ArtifactStorage = Depends(get_artifact_storage),
+    transaction_store: TransactionStore = Depends(get_transaction_store),
 ) -> ArtifactService:
     """Get ArtifactService instance with dependency injection"""
-    return ArtifactService(artifact_repo, message_repo, user_repo)
+    return ArtifactService(
+        artifact_repo, message_repo, user_repo, storage, blob_repo, transaction_store
+    )
 
 
 @cache
@@ -35,14 +61,38 @@ def get_artifact_service_with_deps(
     artifact_repo: ArtifactRepositoryDep,
     message_repo: MessageRepositoryDep,
     user_repo: UserRepositoryDep,
+    blob_repo: ArtifactBlobRepositoryDep,
+    storage: ArtifactStorage = Depends(get_artifact_storage),
+    transaction_store: TransactionStore = Depends(get_transaction_store),
 ) -> ArtifactService:
     """Get ArtifactService instance with all dependencies"""
     # Create a service that has access to all repositories it needs
-    service = ArtifactService(artifact_repo, message_repo, user_repo)
+    service = ArtifactService(
+        artifact_repo, message_repo, user_repo, storage, blob_repo, transaction_store
+    )
 
     return service
 
 
+@cache
+def get_ingestion_service(
+    artifact_repo: ArtifactRepositoryDep,
+    storage: ArtifactStorage = Depends(get_artifact_storage),
+    transaction_store: TransactionStore = Depends(get_transaction_store),
+) -> IngestionService:
+    """Get IngestionService instance with dependency injection"""
+    return IngestionService(artifact_repo, storage, transaction_store=transaction_store)
+
+
+@cache
+def get_preview_service(
+    artifact_repo: ArtifactRepositoryDep,
+    storage: ArtifactStorage = Depends(get_artifact_storage),
+) -> PreviewService:
+    """Get PreviewService instance with dependency injection"""
+    return PreviewService(artifact_repo, storage)
+
+
 @cache
 def get_chat_session_service(
     chat_session_repo: ChatSessionRepositoryDep,
@@ -69,15 +119,61 @@ def get_message_service(
     return MessageService(message_repo)
 
 
+@cache
+def get_usage_service(
+    usage_repo: UsageRepositoryDep,
+) -> UsageService:
+    """Get UsageService instance with dependency injection"""
+    return UsageService(usage_repo)
+
+
+@cache
+def get_response_cache_service() -> Optional[ResponseCacheService]:
+    """Get the shared ResponseCacheService, or None when caching is disabled"""
+    return ResponseCacheService.from_env()
+
+
+@cache
+def get_rate_limit_service() -> Optional[RateLimitService]:
+    """Get the shared RateLimitService, or None when rate limiting is disabled"""
+    return RateLimitService.from_env()
+
+
+@cache
+def get_retention_service() -> Optional[RetentionService]:
+    """Get the background RetentionService, or None when sweeping is disabled"""
+    if os.getenv("RETENTION_SWEEP_ENABLED", "true").lower() != "true":
+        return None
+    artifact_service = get_artifact_service(
+        get_artifact_repository(),
+        get_message_repository(),
+        get_user_repository(),
+        get_artifact_blob_repository(),
+        get_artifact_storage(),
+        get_transaction_store(),
+    )
+    return RetentionService.from_env(artifact_service)
+
+
 @cache
 def get_runner_manager_service(
     message_service: MessageService = Depends(get_message_service),
+    response_cache: Optional[ResponseCacheService] = Depends(
+        get_response_cache_service
+    ),
+    usage_service: UsageService = Depends(get_usage_service),
+    rate_limit_service: Optional[RateLimitService] = Depends(get_rate_limit_service),
+    artifact_service: ArtifactService = Depends(get_artifact_service),
 ) -> RunnerManagerService:
     """Get RunnerManagerService instance with dependency injection"""
     auth_client = get_auth()
     return RunnerManagerService(
         message_service,
         auth_client,
+        response_cache=response_cache,
+        usage_service=usage_service,
+        rate_limit_service=rate_limit_service,
+        artifact_service=artifact_service,
     )
 
 
@@ -91,7 +187,13 @@ ChatSessionServiceDep = Annotated[
         get_chat_session_service,
     ),
 ]
+IngestionServiceDep = Annotated[IngestionService, Depends(get_ingestion_service)]
+PreviewServiceDep = Annotated[PreviewService, Depends(get_preview_service)]
 MessageServiceDep = Annotated[MessageService, Depends(get_message_service)]
 RunnerManagerServiceDep = Annotated[
     RunnerManagerService, Depends(get_runner_manager_service)
 ]
+RateLimitServiceDep = Annotated[
+    Optional[RateLimitService], Depends(get_rate_limit_service)
+]
+UsageServiceDep = Annotated[UsageService, Depends(get_usage_service)]
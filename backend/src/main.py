@@ -1,4 +1,6 @@
+import asyncio
 import logging
+import os
 from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
@@ -10,11 +12,23 @@ from fastapi.responses import JSONResponse
 # Load environment variables from .env if present
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure structured logging (LOG_LEVEL, LOG_FORMAT, LOG_LEVELS)
+from src.observability.logs import RequestIdMiddleware, configure_logging
+
+configure_logging()
 logger = logging.getLogger(__name__)
 
 
+def _log_warmup(task: "asyncio.Task") -> None:
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        logger.warning("Agent warm-up failed: %s", error, exc_info=error)
+    else:
+        logger.info("Agent runtime loaded")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
@@ -26,19 +40,63 @@ async def lifespan(app: FastAPI):
         initialize_firebase()
         logger.info("✅ Firebase initialized successfully")
     except Exception as e:
-        logger.error(f"❌ Failed to initialize Firebase: {e}")
+        logger.error("❌ Failed to initialize Firebase: %s", e)
         logger.error("Application will start but Firebase features will not work")
 
+    retention_service = None
+    try:
+        from src.dependencies.services import get_retention_service
+
+        retention_service = get_retention_service()
+        if retention_service is not None:
+            retention_service.start()
+            logger.info("Started artifact retention sweeper")
+    except Exception as e:
+        logger.warning("Artifact retention sweeper not started: %s", e)
+
+    # The agent graph loads in a worker thread while the server takes
+    # requests, so cold starts don't wait on the ADK import. The loop only
+    # holds tasks weakly, so app.state keeps the warm-up alive until it ends
+    app.state.warmup_task = None
+    if os.getenv("AGENT_WARMUP", "true").lower() == "true":
+        from src.services.runner_manager_service import load_agent_runtime
+
+        app.state.warmup_task = asyncio.create_task(
+            asyncio.to_thread(load_agent_runtime)
+        )
+        app.state.warmup_task.add_done_callback(_log_warmup)
+
+    loop_monitor = None
+    from src.observability.profiling import get_loop_monitor, profiling_enabled
+
+    if profiling_enabled():
+        loop_monitor = get_loop_monitor()
+        loop_monitor.start()
+        logger.info("Started event loop lag monitor")
+
     yield
 
+    if app.state.warmup_task is not None and not app.state.warmup_task.done():
+        app.state.warmup_task.cancel()
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+    if retention_service is not None:
+        await retention_service.stop()
+
     # Shutdown: Clean up Firebase
     logger.info("Shutting down Talk to Your Money Backend...")
+    from src.services.ingestion_service import shutdown_ingestion_executor
+
+    shutdown_ingestion_executor()
+    from src.observability.tracing import shutdown_tracing
+
+    shutdown_tracing()
     try:
         from src.config.firebase_config import cleanup_firebase
 
         cleanup_firebase()
     except Exception as e:
-        logger.warning(f"Error during Firebase cleanup: {e}")
+        logger.warning("Error during Firebase cleanup: %s", e)
 
 
 # Create FastAPI app instance
@@ -58,6 +116,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Time every request for /metrics
+from src.observability.metrics import MetricsMiddleware, metrics_enabled
+
+if metrics_enabled():
+    app.add_middleware(MetricsMiddleware)
+
+# Trace requests when TRACING_EXPORTER selects an exporter
+from src.observability.tracing import TracingMiddleware, configure_tracing
+
+if configure_tracing() is not None:
+    app.add_middleware(TracingMiddleware)
+
+# Per-request profiling for admins, opt-in with PROFILING_ENABLED
+from src.observability.profiling import ProfilingMiddleware, profiling_enabled
+
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
+# Outermost, so every log record of a request carries its id
+app.add_middleware(RequestIdMiddleware)
+
 # # Add trusted host middleware for security
 # app.add_middleware(
 #     TrustedHostMiddleware,
@@ -68,7 +147,7 @@ app.add_middleware(
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler"""
-    logger.error(f"Unhandled exception: {exc}")
+    logger.error("Unhandled exception: %s", exc, exc_info=exc)
     return JSONResponse(status_code=500, content={"detail": "Internal server error"})
 
 
@@ -1,5 +1,5 @@
 # Models module
-from .artifact import Artifact, ArtifactCreate, ArtifactUpdate
+from .artifact import Artifact, ArtifactBlob, ArtifactCreate, ArtifactUpdate
 from .chat_session import ChatSession, ChatSessionCreate, ChatSessionUpdate
 from .message import (
     Message,
@@ -8,10 +8,12 @@ from .message import (
     MessageRole,
     MessageUpdate,
 )
+from .usage import UsageCounter, UsageScope
 from .user import User, UserConsents, UserProfile
 
 __all__ = [
     "Artifact",
+    "ArtifactBlob",
     "ArtifactCreate",
     "ArtifactUpdate",
     "ChatSession",
@@ -22,6 +24,8 @@ __all__ = [
     "MessageUpdate",
     "MessageRole",
     "MessageEvent",
+    "UsageCounter",
+    "UsageScope",
     "User",
     "UserConsents",
     "UserProfile",
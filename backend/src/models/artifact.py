@@ -13,6 +13,7 @@ class ArtifactType(str, Enum):
     RECOMMENDATION = "recommendation"
     VISUALIZATION = "visualization"
     DATA_EXPORT = "data_export"
+    TABLE = "table"
 
     # User Uploaded Artifacts
     PDF = "pdf"
@@ -59,7 +60,9 @@ class ArtifactBase(BaseModel):
 
 
 class ArtifactCreate(ArtifactBase):
-    pass
+    retention_expires_at: Optional[datetime] = Field(
+        None, description="When this artifact should be automatically deleted"
+    )
 
 
 class ArtifactUpdate(BaseModel):
@@ -69,6 +72,12 @@ class ArtifactUpdate(BaseModel):
     content: Optional[Dict[str, Any]] = None
     metadata: Optional[Dict[str, Any]] = None
     consent_granted: Optional[bool] = None
+    file_path: Optional[str] = None
+    file_size: Optional[int] = None
+    mime_type: Optional[str] = None
+    original_filename: Optional[str] = None
+    storage_uri: Optional[str] = None
+    content_hash: Optional[str] = None
 
 
 class Artifact(ArtifactBase):
@@ -91,6 +100,24 @@ class Artifact(ArtifactBase):
     retention_expires_at: Optional[datetime] = Field(
         None, description="When this artifact should be automatically deleted"
     )
+    content_hash: Optional[str] = Field(
+        None, description="SHA-256 of the stored file, shared by duplicate uploads"
+    )
+
+    class Config:
+        from_attributes = True
+
+
+class ArtifactBlob(BaseModel):
+    """Content-addressed file shared by every artifact with the same bytes"""
+
+    id: str = Field(..., description="SHA-256 of the content")
+    storage_key: str = Field(..., description="Key of the content in storage")
+    size: int = Field(..., description="Content size in bytes")
+    mime_type: Optional[str] = Field(None, description="MIME type of the content")
+    ref_count: int = Field(..., description="Number of artifacts referencing it")
+    created_at: datetime = Field(..., description="When the content was stored")
+    updated_at: datetime = Field(..., description="Last reference change")
 
     class Config:
         from_attributes = True
@@ -96,6 +96,11 @@ class MessageCreate(MessageBase):
         default=None, description="Additional metadata"
     )
 
+    # Aggregated usage metadata (for assistant messages)
+    total_usage_metadata: Optional[UsageMetadata] = Field(
+        None, description="Aggregated usage metadata from all events"
+    )
+
 
 class MessageUpdate(BaseModel):
     human_content: Optional[str] = None
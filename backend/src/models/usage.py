@@ -0,0 +1,32 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class UsageScope(str, Enum):
+    SESSION = "session"
+    USER_DAY = "user_day"
+
+
+class UsageCounter(BaseModel):
+    """Running usage totals, maintained incrementally after every turn"""
+
+    id: str = Field(..., description="Counter document ID")
+    scope: UsageScope = Field(..., description="What the counter aggregates")
+    user_id: str = Field(..., description="User the usage belongs to")
+    session_id: Optional[str] = Field(None, description="Session for session scope")
+    day: Optional[str] = Field(None, description="UTC day (YYYY-MM-DD) for day scope")
+    turn_count: int = Field(default=0, description="Number of assistant turns")
+    prompt_token_count: int = Field(default=0, description="Prompt tokens")
+    response_token_count: int = Field(default=0, description="Response tokens")
+    total_token_count: int = Field(default=0, description="Total tokens")
+    cost_estimate: float = Field(default=0.0, description="Estimated cost in USD")
+    processing_time: float = Field(
+        default=0.0, description="Total turn wall time in seconds"
+    )
+    updated_at: Optional[datetime] = Field(None, description="Last increment time")
+
+    class Config:
+        from_attributes = True
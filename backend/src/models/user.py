@@ -34,6 +34,7 @@ class User(BaseModel):
     consents: UserConsents = Field(
         default_factory=UserConsents, description="User consent preferences"
     )
+    tier: str = Field(default="standard", description="Rate limit tier")
 
 
 class UserCreate(BaseModel):
@@ -0,0 +1,50 @@
+"""
+Instrumentation of repository classes with spans and metrics.
+"""
+
+import functools
+import inspect
+import time
+from typing import Callable
+
+from ..observability.metrics import REPOSITORY_CALL_DURATION, REPOSITORY_CALL_ERRORS
+from ..observability.tracing import tracer
+
+
+def _instrumented_repository_method(method: Callable) -> Callable:
+    @functools.wraps(method)
+    async def instrumented(self, *args, **kwargs):
+        labels = (type(self).__name__, method.__name__)
+        started = time.perf_counter()
+        with tracer.start_as_current_span(
+            f"{labels[0]}.{labels[1]}", attributes={"db.system": "firestore"}
+        ):
+            try:
+                return await method(self, *args, **kwargs)
+            except Exception:
+                REPOSITORY_CALL_ERRORS.labels(*labels).inc()
+                raise
+            finally:
+                REPOSITORY_CALL_DURATION.labels(*labels).observe(
+                    time.perf_counter() - started
+                )
+
+    instrumented._instrumented = True
+    return instrumented
+
+
+def instrument_repository_methods(cls: type) -> None:
+    """Trace and time the public async methods a repository class defines.
+
+    Names and labels use the runtime class, so inherited BaseRepository
+    methods are reported under the repository that called them.
+    """
+    for name, method in list(vars(cls).items()):
+        if (
+            name.startswith("_")
+            or isinstance(method, (staticmethod, classmethod))
+            or not inspect.iscoroutinefunction(method)
+            or getattr(method, "_instrumented", False)
+        ):
+            continue
+        setattr(cls, name, _instrumented_repository_method(method))
@@ -0,0 +1,232 @@
+"""
+Structured logging with request ids, sampling and redaction.
+
+Modules log through `logging.getLogger(__name__)` with %-style arguments,
+so messages below the configured level are never formatted. Records that
+reach the handler get the request id of the current context, are dropped
+according to their `sample_rate`, have tokens and amounts redacted, and are
+written as one JSON object per line (LOG_FORMAT=text for local runs).
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from opentelemetry import trace
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Fraction of high-frequency debug events (e.g. every agent event) kept
+EVENT_SAMPLE_RATE = float(os.getenv("LOG_EVENT_SAMPLE_RATE", "0.1"))
+
+REQUEST_ID_HEADER = "x-request-id"
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+REDACTED = "[REDACTED]"
+SENSITIVE_FIELDS = {
+    "amount",
+    "authorization",
+    "balance",
+    "closing_balance",
+    "credit",
+    "debit",
+    "id_token",
+    "password",
+    "token",
+}
+_NUMBER = r"-?\d[\d,]*(?:\.\d+)?"
+# Only numbers marked as money are masked, so durations, versions, addresses
+# and the like stay readable
+_REDACTIONS = [
+    (re.compile(r"(?i)\bbearer\s+[\w.~+/-]+=*"), "Bearer [TOKEN]"),
+    (re.compile(r"\beyJ[\w-]+\.[\w-]+\.[\w-]*"), "[TOKEN]"),
+    # ₹ 1,299.00 / Rs.450 / 1,50,000 INR
+    (
+        re.compile(
+            rf"(?:[₹$€£]|\b(?:INR|USD|EUR|GBP|Rs\.?))\s?{_NUMBER}"
+            rf"|\b{_NUMBER}\s?(?:INR|USD|EUR|GBP|Rs)\b",
+            re.IGNORECASE,
+        ),
+        "[AMOUNT]",
+    ),
+    # balance 1,50,000 / amount=-450.0 / "debit": 99
+    (
+        re.compile(
+            r"(?i)\b(amount|amt|balance|credit|debit|deposit|withdrawal|spent|paid)"
+            rf"(\"?\s*[:=]?\s*){_NUMBER}"
+        ),
+        r"\1\2[AMOUNT]",
+    ),
+]
+
+# Attributes every LogRecord has; anything else was passed in `extra`
+_RECORD_ATTRIBUTES = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {
+    "message",
+    "asctime",
+    "request_id",
+}
+
+
+def redact(text: str) -> str:
+    """Mask tokens and monetary amounts in free text"""
+    for pattern, replacement in _REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _redact_value(key: str, value: Any) -> Any:
+    if key.lower() in SENSITIVE_FIELDS:
+        return REDACTED
+    if isinstance(value, str):
+        return redact(value)
+    if isinstance(value, dict):
+        return {k: _redact_value(str(k), v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_redact_value(key, v) for v in value]
+    return value
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {
+        key: value
+        for key, value in record.__dict__.items()
+        if key not in _RECORD_ATTRIBUTES
+    }
+
+
+class ContextFilter(logging.Filter):
+    """Adds the current request id to each record"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a record with probability `sample_rate`, when it sets one"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sample_rate = getattr(record, "sample_rate", None)
+        return sample_rate is None or random.random() < sample_rate
+
+
+class RedactionFilter(logging.Filter):
+    """Redacts the formatted message and the extra fields of a record"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = redact(record.getMessage())
+        record.args = None
+        for key, value in _extra_fields(record).items():
+            setattr(record, key, _redact_value(key, value))
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the trace it belongs to"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(
+                record.created, tz=timezone.utc
+            ).isoformat(),
+            "severity": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.is_valid:
+            entry["trace_id"] = format(span_context.trace_id, "032x")
+            entry["span_id"] = format(span_context.span_id, "016x")
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            # Tracebacks are code paths and line numbers, not user data
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def _parse_levels(spec: str) -> dict:
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.strip().partition("=")
+        if name and level:
+            levels[name] = level.strip().upper()
+    return levels
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    log_format: Optional[str] = None,
+    module_levels: Optional[str] = None,
+) -> None:
+    """Install the root handler.
+
+    Defaults come from LOG_LEVEL, LOG_FORMAT (json or text) and LOG_LEVELS,
+    a comma-separated list of per-module levels such as
+    "src.repositories=WARNING,google_adk=INFO".
+    """
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    log_format = (log_format or os.getenv("LOG_FORMAT", "json")).lower()
+
+    handler = logging.StreamHandler(sys.stdout)
+    for log_filter in (SamplingFilter(), ContextFilter(), RedactionFilter()):
+        handler.addFilter(log_filter)
+    if log_format == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(
+            logging.Formatter(
+                "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+            )
+        )
+    logging.basicConfig(level=level, handlers=[handler], force=True)
+
+    for name, module_level in _parse_levels(
+        module_levels if module_levels is not None else os.getenv("LOG_LEVELS", "")
+    ).items():
+        logging.getLogger(name).setLevel(module_level)
+
+
+_VALID_REQUEST_ID = re.compile(r"^[\w.-]{1,64}$")
+
+
+class RequestIdMiddleware:
+    """Gives each request an id, for its log records and the response.
+
+    A well-formed incoming X-Request-ID (e.g. from the load balancer) is
+    reused so logs correlate across services.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(REQUEST_ID_HEADER.encode(), b"")
+        request_id = incoming.decode("latin-1")
+        if not _VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER.encode(), request_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
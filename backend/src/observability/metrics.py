@@ -0,0 +1,139 @@
+"""
+Prometheus metrics for the API, the repositories and the agent runner.
+
+Metrics live in the process-wide default registry and are served at
+/metrics. Under several workers (PROMETHEUS_MULTIPROC_DIR set, see
+gunicorn.conf.py) every worker writes its samples to that directory and
+/metrics aggregates all of them, whichever worker serves the scrape.
+Label values are bounded (route templates, class and method names, model
+names), and recording one sample is a dict lookup and an atomic add, so
+instrumentation stays on in production.
+"""
+
+import os
+import time
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Chat turns stream for tens of seconds, so the API buckets reach further
+# than the client library's defaults
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RPC_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+FIRST_EVENT_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60)
+EVENT_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to complete an HTTP request, including streamed bodies",
+    ["method", "route", "status"],
+    buckets=REQUEST_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum",
+)
+REPOSITORY_CALL_DURATION = Histogram(
+    "firestore_repository_call_duration_seconds",
+    "Latency of repository methods, which each issue one or more Firestore RPCs",
+    ["repository", "method"],
+    buckets=RPC_BUCKETS,
+)
+REPOSITORY_CALL_ERRORS = Counter(
+    "firestore_repository_call_errors_total",
+    "Repository methods that raised",
+    ["repository", "method"],
+)
+RUNNER_TIME_TO_FIRST_EVENT = Histogram(
+    "runner_time_to_first_event_seconds",
+    "Time from starting an agent turn to its first event",
+    buckets=FIRST_EVENT_BUCKETS,
+)
+RUNNER_EVENTS_PER_TURN = Histogram(
+    "runner_events_per_turn",
+    "Events produced by one agent turn",
+    buckets=EVENT_COUNT_BUCKETS,
+)
+RUNNER_TURNS = Counter("runner_turns_total", "Agent turns by outcome", ["outcome"])
+RUNNER_ACTIVE_STREAMS = Gauge(
+    "runner_active_streams",
+    "Agent turns currently streaming events",
+    multiprocess_mode="livesum",
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Tokens used by model calls", ["model", "kind"]
+)
+
+
+def metrics_enabled() -> bool:
+    """Whether request metrics are collected (METRICS_ENABLED)"""
+    return os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with its content type"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def record_tokens(
+    model_name: Optional[str],
+    prompt_tokens: Optional[int],
+    response_tokens: Optional[int],
+) -> None:
+    """Count the tokens of one model call"""
+    model = model_name or "unknown"
+    if prompt_tokens:
+        LLM_TOKENS.labels(model, "prompt").inc(prompt_tokens)
+    if response_tokens:
+        LLM_TOKENS.labels(model, "response").inc(response_tokens)
+
+
+class MetricsMiddleware:
+    """Times every HTTP request, labelled by its route template.
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware, so streamed
+    responses pass through untouched and are timed until their last chunk.
+    Requests that match no route share one label to bound the cardinality.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # The router stores the matched route in the shared scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(scope["method"], route, str(status)).observe(
+                time.perf_counter() - started
+            )
@@ -0,0 +1,429 @@
+"""
+Opt-in profiling of live workers: stack sampling, per-request cProfile,
+event-loop lag and tracemalloc diffs.
+
+Everything here is off unless PROFILING_ENABLED=true, and the routes that
+expose it are admin-only. Stack samples are rendered in the collapsed
+format ("frame;frame;frame count" lines) that flamegraph.pl, speedscope
+and inferno read directly.
+"""
+
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a timer scheduled by the lag monitor",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+# Deepest stack kept per sample; keeps pathological recursion bounded
+MAX_STACK_DEPTH = 128
+
+
+def profiling_enabled() -> bool:
+    """Whether the profiling surface is on (PROFILING_ENABLED)"""
+    return os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+def collapse_frame(frame) -> str:
+    """A thread's stack, root first, in collapsed format"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def render_collapsed(stacks: Counter) -> str:
+    """Collapsed-stack text, heaviest stacks first"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class StackSampler:
+    """Samples one thread's stack from a background thread.
+
+    Pointed at the event loop thread it shows which coroutine holds the CPU,
+    like py-spy but in-process and without ptrace privileges.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_frame(frame)] += 1
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+
+class ProfileStore:
+    """The last few per-request profiles, for download by id"""
+
+    def __init__(self, capacity: int = 20):
+        self.capacity = capacity
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def add(self, profile_id: str, profile: Dict[str, Any]) -> None:
+        self._profiles[profile_id] = profile
+        while len(self._profiles) > self.capacity:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [
+            {"id": profile_id, "kind": p["kind"], "path": p["path"]}
+            for profile_id, p in reversed(self._profiles.items())
+        ]
+
+
+profile_store = ProfileStore()
+PROFILE_KINDS = {"cprofile", "sample"}
+# cProfile can't nest, and concurrent samplers would double the overhead
+_profile_lock = threading.Lock()
+
+
+def pstats_text(profile: cProfile.Profile, limit: int = 50) -> str:
+    """Top functions of a cProfile run by cumulative time"""
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+class RequestProfiler:
+    """Profiles one request, selected by the X-Profile header.
+
+    "cprofile" records deterministic call stats, "sample" samples the loop
+    thread. Both see every coroutine that runs on the loop meanwhile, so
+    profile on a quiet worker.
+    """
+
+    def __init__(self, kind: str, path: str, interval: float = 0.001):
+        self.kind = kind
+        self.path = path
+        self.interval = interval
+        self.profile_id = uuid.uuid4().hex
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+
+    def __enter__(self) -> "RequestProfiler":
+        if self.kind == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = StackSampler(threading.get_ident(), self.interval).start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._profile is not None:
+            self._profile.disable()
+        else:
+            self._sampler.stop()
+
+    def save(self) -> None:
+        """Store the result under `profile_id`"""
+        profile: Dict[str, Any] = {"kind": self.kind, "path": self.path}
+        if self._profile is not None:
+            profile["stats"] = pstats.Stats(self._profile)
+            profile["text"] = pstats_text(self._profile)
+        else:
+            profile["collapsed"] = render_collapsed(self._sampler.stacks)
+        profile_store.add(self.profile_id, profile)
+
+
+async def sample_event_loop(seconds: float, interval: float = 0.005) -> str:
+    """Sample the calling event loop for `seconds`; returns collapsed stacks"""
+    sampler = StackSampler(threading.get_ident(), interval).start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        stacks = sampler.stop()
+    # Idle time shows up as the selector's stack
+    return render_collapsed(stacks)
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag and captures the stacks of stalls.
+
+    A timer task records how late the loop runs it. A watchdog thread
+    notices when that task hasn't run for `slow_threshold` and samples the
+    loop thread right then, catching the blocking callback in the act.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        slow_threshold: float = 0.25,
+        max_slow_callbacks: int = 50,
+    ):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.slow_callbacks: deque = deque(maxlen=max_slow_callbacks)
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self._last_tick = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "LoopLagMonitor":
+        """Build the monitor from PROFILING_* environment variables"""
+        return cls(
+            interval=float(os.getenv("PROFILING_LOOP_INTERVAL", "0.1")),
+            slow_threshold=float(os.getenv("PROFILING_SLOW_CALLBACK_SECONDS", "0.25")),
+        )
+
+    async def _tick(self) -> None:
+        while True:
+            scheduled = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_tick = now
+            lag = max(now - scheduled - self.interval, 0.0)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            EVENT_LOOP_LAG.observe(lag)
+
+    def _watch(self) -> None:
+        stalled_since: Optional[float] = None
+        while not self._stop.wait(self.interval):
+            blocked_for = time.monotonic() - self._last_tick
+            if blocked_for < self.slow_threshold + self.interval:
+                stalled_since = None
+                continue
+            if stalled_since == self._last_tick:
+                # Already captured this stall
+                continue
+            stalled_since = self._last_tick
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = collapse_frame(frame) if frame is not None else ""
+            self.slow_callbacks.append(
+                {"at": time.time(), "blocked_for": blocked_for, "stack": stack}
+            )
+            logger.warning("Event loop blocked for %.3fs", blocked_for)
+
+    def start(self) -> None:
+        """Start monitoring the running event loop"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the timer task and the watchdog"""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "interval": self.interval,
+            "slow_threshold": self.slow_threshold,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "slow_callbacks": list(self.slow_callbacks),
+        }
+
+    def slow_callbacks_collapsed(self) -> str:
+        return render_collapsed(
+            Counter(c["stack"] for c in self.slow_callbacks if c["stack"])
+        )
+
+
+class MemoryProfiler:
+    """tracemalloc snapshots, diffed against a baseline to find growth"""
+
+    def __init__(self, frames: int = 16):
+        self.frames = frames
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    def take_baseline(self) -> Dict[str, Any]:
+        """Start tracing if needed and remember the current allocations"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._baseline = self._snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        return {"traced_bytes": current, "peak_bytes": peak}
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self._baseline = None
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ]
+        )
+
+    def diff(self, top: int = 25) -> List[tracemalloc.StatisticDiff]:
+        """Largest allocation growth since the baseline, by traceback"""
+        if self._baseline is None:
+            raise ValueError("No baseline snapshot; take one first")
+        return self._snapshot().compare_to(self._baseline, "traceback")[:top]
+
+    @staticmethod
+    def diff_json(stats: List[tracemalloc.StatisticDiff]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "size_diff": stat.size_diff,
+                "size": stat.size,
+                "count_diff": stat.count_diff,
+                "traceback": [f"{f.filename}:{f.lineno}" for f in stat.traceback],
+            }
+            for stat in stats
+        ]
+
+    @staticmethod
+    def diff_collapsed(stats: List[tracemalloc.StatisticDiff]) -> str:
+        """Growth in bytes per allocation stack, in collapsed format"""
+        stacks: Counter = Counter()
+        for stat in stats:
+            if stat.size_diff > 0:
+                # Tracebacks run oldest frame first, as collapsed stacks do
+                stack = ";".join(
+                    f"{os.path.basename(f.filename)}:{f.lineno}" for f in stat.traceback
+                )
+                stacks[stack] += stat.size_diff
+        return render_collapsed(stacks)
+
+
+_loop_monitor: Optional[LoopLagMonitor] = None
+memory_profiler = MemoryProfiler()
+
+
+def get_loop_monitor() -> LoopLagMonitor:
+    """The process-wide event-loop lag monitor"""
+    global _loop_monitor
+    if _loop_monitor is None:
+        _loop_monitor = LoopLagMonitor.from_env()
+    return _loop_monitor
+
+
+class ProfilingMiddleware:
+    """Profiles requests that ask for it with an X-Profile header.
+
+    Only honoured while PROFILING_ENABLED is on, for admin users (checked
+    from the bearer token in a worker thread, and only when the header is
+    present) and one request at a time. The response
+    carries X-Profile-Id; the result is downloaded from the admin API.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        kind = headers.get(b"x-profile", b"").decode("latin-1").lower()
+        if (
+            kind not in PROFILE_KINDS
+            or not profiling_enabled()
+            or not await _is_admin_request(headers)
+        ):
+            await self.app(scope, receive, send)
+            return
+        if not _profile_lock.acquire(blocking=False):
+            await self.app(scope, receive, _with_header(send, b"x-profile-id", b"busy"))
+            return
+
+        try:
+            profiler = RequestProfiler(kind, scope["path"])
+            with profiler:
+                await self.app(
+                    scope,
+                    receive,
+                    _with_header(send, b"x-profile-id", profiler.profile_id.encode()),
+                )
+            profiler.save()
+        finally:
+            _profile_lock.release()
+
+
+def _with_header(send: Send, name: bytes, value: bytes) -> Send:
+    async def send_with_header(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            message = {
+                **message,
+                "headers": [*message.get("headers", []), (name, value)],
+            }
+        await send(message)
+
+    return send_with_header
+
+
+async def _is_admin_request(headers: Dict[bytes, bytes]) -> bool:
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    from ..auth.firebase_auth import is_admin_uid
+    from ..config.firebase_config import get_auth
+
+    try:
+        # Verification can fetch Google's signing keys, so keep it off the loop
+        decoded_token = await asyncio.to_thread(get_auth().verify_id_token, token)
+        uid = decoded_token["uid"]
+    except Exception:
+        return False
+    return is_admin_uid(uid)
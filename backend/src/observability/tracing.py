@@ -0,0 +1,195 @@
+"""
+OpenTelemetry tracing for routes, services, repositories and agent turns.
+
+`configure_tracing` installs the process-wide tracer provider with the
+exporter selected by TRACING_EXPORTER. The ADK emits its own spans for
+invocations, agent runs, model calls and tool calls; since they use the
+global provider, they nest under the request's span. Without a configured
+exporter spans are non-recording and cost next to nothing.
+"""
+
+import functools
+import inspect
+import os
+from typing import Callable, Optional
+
+from opentelemetry import context, propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SimpleSpanProcessor,
+    SpanExporter,
+)
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+SERVICE_NAME = "talk-to-your-money-backend"
+
+tracer = trace.get_tracer("talk_to_your_money")
+
+_provider: Optional[TracerProvider] = None
+_memory_exporter: Optional[InMemorySpanExporter] = None
+
+
+def _create_exporter(name: str) -> SpanExporter:
+    global _memory_exporter
+    if name == "memory":
+        _memory_exporter = _memory_exporter or InMemorySpanExporter()
+        return _memory_exporter
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "gcp":
+        from opentelemetry.exporter.cloud_trace import CloudTraceSpanExporter
+
+        return CloudTraceSpanExporter()
+    if name == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+        except ImportError:
+            raise RuntimeError(
+                "The otlp exporter requires opentelemetry-exporter-otlp-proto-http"
+            )
+        # Endpoint and headers come from the standard OTEL_EXPORTER_OTLP_* vars
+        return OTLPSpanExporter()
+    raise ValueError(f"Unknown tracing exporter: {name}")
+
+
+def configure_tracing(
+    exporter: Optional[str] = None, sample_ratio: Optional[float] = None
+) -> Optional[TracerProvider]:
+    """Install the tracer provider once; returns None when tracing is off.
+
+    `exporter` defaults to TRACING_EXPORTER: none, console, gcp, otlp or
+    memory (for tests). Root spans are sampled at TRACING_SAMPLE_RATIO;
+    requests that arrive with a sampled parent are always traced.
+    """
+    global _provider
+    exporter = exporter or os.getenv("TRACING_EXPORTER", "none").lower()
+    if _provider is not None or exporter == "none":
+        return _provider
+
+    if sample_ratio is None:
+        sample_ratio = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+    )
+    span_exporter = _create_exporter(exporter)
+    if exporter in ("memory", "console"):
+        provider.add_span_processor(SimpleSpanProcessor(span_exporter))
+    else:
+        # Export off the request path, in batches
+        provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+    _provider = provider
+    return provider
+
+
+def get_memory_exporter() -> Optional[InMemorySpanExporter]:
+    """The in-memory exporter, when tracing was configured with it"""
+    return _memory_exporter
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans"""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator running an async function inside a span"""
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(span_name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def trace_methods(cls: type) -> type:
+    """Class decorator tracing every public async method as Class.method"""
+    for attr, method in list(vars(cls).items()):
+        if (
+            attr.startswith("_")
+            or isinstance(method, (staticmethod, classmethod))
+            or not inspect.iscoroutinefunction(method)
+        ):
+            continue
+        setattr(cls, attr, traced(f"{cls.__name__}.{attr}")(method))
+    return cls
+
+
+class TracingMiddleware:
+    """Opens the server span of each HTTP request.
+
+    The parent context is extracted from the incoming W3C `traceparent`
+    header, so a trace started by the frontend or a proxy continues here.
+    The span is renamed to the matched route template once routing is done.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in scope["headers"]
+        }
+        parent = propagate.extract(carrier)
+        with tracer.start_as_current_span(
+            scope["method"],
+            context=parent,
+            kind=trace.SpanKind.SERVER,
+            attributes={
+                "http.request.method": scope["method"],
+                "url.path": scope["path"],
+            },
+        ) as span:
+
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(trace.StatusCode.ERROR)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.update_name(f"{scope['method']} {route}")
+                    span.set_attribute("http.route", route)
+
+
+def start_detached_span(name: str, **attributes) -> tuple[trace.Span, object]:
+    """Start a span and make it current until `end_detached_span`.
+
+    For async generators, where a `with` block would have to wrap the whole
+    body; the span ends where the generator finishes.
+    """
+    span = tracer.start_span(name, attributes=attributes)
+    return span, context.attach(trace.set_span_in_context(span))
+
+
+def end_detached_span(span: trace.Span, token: object) -> None:
+    """End a span started with `start_detached_span`"""
+    context.detach(token)
+    span.end()
@@ -1,12 +1,16 @@
 # Repositories module
+from .artifact_blob_repository import ArtifactBlobRepository
 from .artifact_repository import ArtifactRepository
 from .chat_session_repository import ChatSessionRepository
 from .message_repository import MessageRepository
+from .usage_repository import UsageRepository
 from .user_repository import UserRepository
 
 __all__ = [
     "MessageRepository",
     "ArtifactRepository",
+    "ArtifactBlobRepository",
     "ChatSessionRepository",
     "UserRepository",
+    "UsageRepository",
 ]
@@ -0,0 +1,95 @@
+from typing import Any, Dict, Optional
+
+from firebase_admin import firestore
+
+from ..models.artifact import ArtifactBlob
+from .base_repository import BaseRepository
+
+
+class ArtifactBlobRepository(BaseRepository[ArtifactBlob, ArtifactBlob, ArtifactBlob]):
+    """Repository for reference-counted, content-addressed artifact files"""
+
+    def __init__(self, db=None):
+        super().__init__("artifact_blobs", db=db)
+
+    def _get_key(self, item: ArtifactBlob) -> str:
+        """Get the unique key for a blob"""
+        return item.id
+
+    def _validate_create_item(self, item: ArtifactBlob) -> bool:
+        """Validate a blob before storage"""
+        return item.id is not None and item.storage_key is not None
+
+    def _validate_update_item(self, item: ArtifactBlob) -> bool:
+        """Validate a blob before storage"""
+        return item.id is not None
+
+    def _reconstruct_item(self, data: Dict[str, Any]) -> ArtifactBlob:
+        """Reconstruct an ArtifactBlob from stored data"""
+        return ArtifactBlob(**data)
+
+    async def acquire(
+        self,
+        content_hash: str,
+        storage_key: str,
+        size: int,
+        mime_type: Optional[str] = None,
+    ) -> bool:
+        """Add a reference to a blob, creating its record on first use.
+
+        Returns True when this was the first reference.
+        """
+        doc_ref = self.collection.document(content_hash)
+
+        @firestore.transactional
+        def _acquire(transaction) -> bool:
+            snapshot = doc_ref.get(transaction=transaction)
+            now = self._get_timestamp()
+            if snapshot.exists:
+                transaction.update(
+                    doc_ref, {"ref_count": firestore.Increment(1), "updated_at": now}
+                )
+                return False
+            transaction.set(
+                doc_ref,
+                {
+                    "id": content_hash,
+                    "storage_key": storage_key,
+                    "size": size,
+                    "mime_type": mime_type,
+                    "ref_count": 1,
+                    "created_at": now,
+                    "updated_at": now,
+                },
+            )
+            return True
+
+        return _acquire(self.db.transaction())
+
+    async def release(self, content_hash: str) -> Optional[ArtifactBlob]:
+        """Drop a reference to a blob.
+
+        Returns the blob record when that was its last reference (the record
+        is deleted and the stored file should be removed), otherwise None.
+        """
+        doc_ref = self.collection.document(content_hash)
+
+        @firestore.transactional
+        def _release(transaction) -> Optional[ArtifactBlob]:
+            snapshot = doc_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return None
+            blob = self._reconstruct_item(snapshot.to_dict())
+            if blob.ref_count <= 1:
+                transaction.delete(doc_ref)
+                return blob
+            transaction.update(
+                doc_ref,
+                {
+                    "ref_count": firestore.Increment(-1),
+                    "updated_at": self._get_timestamp(),
+                },
+            )
+            return None
+
+        return _release(self.db.transaction())
@@ -1,7 +1,8 @@
-import os
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+from firebase_admin import firestore
+
 from ..models.artifact import (
     Artifact,
     ArtifactCreate,
@@ -54,8 +55,9 @@ class ArtifactRepository(
 
     async def create_artifact(self, artifact_data: ArtifactCreate) -> Artifact:
         """Create a new artifact"""
+        now = self._get_timestamp()
         artifact = Artifact(
-            id=None,  # Will be set by base repository
+            id=self._generate_id(),
             session_id=artifact_data.session_id,
             user_id=artifact_data.user_id,
             message_id=artifact_data.message_id,
@@ -66,8 +68,8 @@ class ArtifactRepository(
             metadata=artifact_data.metadata,
             consent_required=artifact_data.consent_required,
             consent_granted=artifact_data.consent_granted,
-            created_at=None,  # Will be set by base repository
-            updated_at=None,  # Will be set by base repository
+            created_at=now,
+            updated_at=now,
             status=ArtifactStatus.PENDING,
             content=None,
             file_path=None,
@@ -75,7 +77,8 @@ class ArtifactRepository(
             mime_type=None,
             original_filename=None,
             storage_uri=None,
-            retention_expires_at=None,
+            retention_expires_at=artifact_data.retention_expires_at,
+            content_hash=None,
         )
         return await self.create(artifact)
 
@@ -124,16 +127,60 @@ class ArtifactRepository(
             artifact.metadata = update_data.metadata
         if update_data.consent_granted is not None:
             artifact.consent_granted = update_data.consent_granted
+        if update_data.file_path is not None:
+            artifact.file_path = update_data.file_path
+        if update_data.file_size is not None:
+            artifact.file_size = update_data.file_size
+        if update_data.mime_type is not None:
+            artifact.mime_type = update_data.mime_type
+        if update_data.original_filename is not None:
+            artifact.original_filename = update_data.original_filename
+        if update_data.storage_uri is not None:
+            artifact.storage_uri = update_data.storage_uri
+        if update_data.content_hash is not None:
+            artifact.content_hash = update_data.content_hash
 
         return await self.update(artifact)
 
+    async def set_metadata_entry(
+        self,
+        artifact_id: str,
+        user_id: str,
+        key: str,
+        value: Any,
+        status: Optional[ArtifactStatus] = None,
+    ) -> Optional[Artifact]:
+        """Set one metadata entry, and optionally the status (ensures ownership).
+
+        Only those fields are written, so background workers updating the same
+        artifact don't overwrite each other's entries.
+        """
+        artifact = await self.get_artifact_by_user(artifact_id, user_id)
+        if not artifact:
+            return None
+
+        fields: Dict[str, Any] = {
+            f"metadata.{key}": value,
+            "updated_at": self._get_timestamp(),
+        }
+        if status is not None:
+            fields["status"] = status.value
+            artifact.status = status
+        self.collection.document(artifact_id).update(fields)
+        artifact.metadata = {**(artifact.metadata or {}), key: value}
+        return artifact
+
     async def delete_artifact(self, artifact_id: str, user_id: str) -> bool:
-        """Delete an artifact (ensures ownership)"""
+        """Delete an artifact (ensures ownership).
+
+        False when it doesn't exist, including when a concurrent delete got
+        there first, so only one caller goes on to release its file.
+        """
         artifact = await self.get_artifact_by_user(artifact_id, user_id)
         if not artifact:
             return False
 
-        return await self.delete(artifact_id)
+        return bool(await self.delete_artifacts([artifact]))
 
     async def get_message_artifacts(
         self, message_id: str, user_id: str
@@ -201,25 +248,57 @@ class ArtifactRepository(
 
         return artifacts
 
-    async def delete_expired_artifacts(self) -> int:
-        """Delete artifacts that have exceeded their retention period"""
-        all_artifacts = await self.get_all()
-        deleted_count = 0
-
-        for artifact in all_artifacts:
-            if (
-                artifact.retention_expires_at
-                and artifact.retention_expires_at < datetime.now()
-            ):
-                success = await self.delete(artifact.id)
-                if success:
-                    deleted_count += 1
-
-                    # Also delete the file if it exists
-                    if artifact.file_path and os.path.exists(artifact.file_path):
-                        try:
-                            os.remove(artifact.file_path)
-                        except OSError:
-                            pass  # File might already be deleted
-
-        return deleted_count
+    async def get_expired_artifacts(self, now: datetime, limit: int) -> List[Artifact]:
+        """Artifacts whose retention expired by `now`, oldest expiry first.
+
+        A range query on retention_expires_at, served by Firestore's automatic
+        single-field index, so only expired documents are read.
+        """
+        query = (
+            self.collection.where("retention_expires_at", "<=", now)
+            .order_by("retention_expires_at")
+            .limit(limit)
+        )
+        return [self._reconstruct_item(doc.to_dict()) for doc in query.stream()]
+
+    async def delete_artifacts(self, artifacts: List[Artifact]) -> List[Artifact]:
+        """Delete artifact documents in one transaction (at most 500).
+
+        Returns the artifacts whose documents still existed. A plain delete
+        succeeds either way, so without the check two overlapping deletes
+        would both release the artifact's blob reference.
+        """
+        refs = [self.collection.document(artifact.id) for artifact in artifacts]
+
+        @firestore.transactional
+        def _delete(transaction) -> List[Artifact]:
+            # One batched read; snapshots come back in no particular order
+            existing_ids = {
+                snapshot.id for snapshot in transaction.get_all(refs) if snapshot.exists
+            }
+            existing = [
+                (artifact, ref)
+                for artifact, ref in zip(artifacts, refs)
+                if artifact.id in existing_ids
+            ]
+            for _, ref in existing:
+                transaction.delete(ref)
+            return [artifact for artifact, _ in existing]
+
+        return _delete(self.db.transaction())
+
+    async def delete_expired_artifacts(
+        self, now: Optional[datetime] = None, limit: int = 200
+    ) -> List[Artifact]:
+        """Delete one page of artifacts that have exceeded their retention period.
+
+        Returns the artifacts this call deleted, leaving out any another
+        sweep or a user deleted meanwhile; their stored files may be shared
+        with other artifacts, so removing those is left to the caller.
+        """
+        expired = await self.get_expired_artifacts(
+            now or self._get_timestamp(), min(limit, 500)
+        )
+        if not expired:
+            return []
+        return await self.delete_artifacts(expired)
@@ -7,6 +7,8 @@ from firebase_admin import firestore
 from google.cloud.firestore_v1.client import Client
 from pydantic import BaseModel
 
+from ..observability.instrumentation import instrument_repository_methods
+
 # Constrain T to be a Pydantic BaseModel
 T = TypeVar("T", bound=BaseModel)
 CreateT = TypeVar("CreateT", bound=BaseModel)
@@ -31,6 +33,11 @@ class BaseRepository(ABC, Generic[T, CreateT, UpdateT]):
         self.collection = self.db.collection(collection_name)
         self._item_type: Optional[Type[T]] = None  # Will be set by subclasses
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Every repository reports Firestore latency per method
+        instrument_repository_methods(cls)
+
     def _generate_id(self) -> str:
         """Generate a unique ID"""
         return str(uuid.uuid4())
@@ -63,19 +70,15 @@ class BaseRepository(ABC, Generic[T, CreateT, UpdateT]):
 
         # Generate ID and timestamps if not present
         if not create_item.get("id"):
-            print("Generating ID")
             create_item["id"] = self._generate_id()
 
         if not create_item.get("created_at"):
-            print("Generating created_at")
             create_item["created_at"] = self._get_timestamp()
 
         if not create_item.get("updated_at"):
-            print("Generating updated_at")
             create_item["updated_at"] = self._get_timestamp()
 
         # Convert to dict and store in Firestore
-        print("Item data", create_item)
         doc_ref = self.collection.document(create_item["id"])
         doc_ref.set(create_item)
 
@@ -150,12 +153,10 @@ class BaseRepository(ABC, Generic[T, CreateT, UpdateT]):
 
         # Handle Firestore timestamp conversion
         for key, value in data.items():
-            print(f"Key: {key}, Value: {value}")
             if hasattr(value, "timestamp"):
                 # Convert Firestore timestamp to datetime
                 data[key] = value.timestamp()
 
-        print(f"Data: {data}")
         return self._item_type(**data)
 
     async def get_by_field(self, field: str, value: Any) -> List[T]:
@@ -219,3 +220,6 @@ class BaseRepository(ABC, Generic[T, CreateT, UpdateT]):
             items.append(self._reconstruct_item(data))
 
         return items
+
+
+instrument_repository_methods(BaseRepository)
@@ -0,0 +1,107 @@
+from typing import Any, Dict, List, Optional
+
+from firebase_admin import firestore
+
+from ..models.message import UsageMetadata
+from ..models.usage import UsageCounter, UsageScope
+from .base_repository import BaseRepository
+
+
+class UsageRepository(BaseRepository[UsageCounter, UsageCounter, UsageCounter]):
+    """Repository for incrementally maintained usage counters"""
+
+    def __init__(self, db=None):
+        super().__init__("usage_counters", db=db)
+
+    def _get_key(self, item: UsageCounter) -> str:
+        """Get the unique key for a usage counter"""
+        return item.id
+
+    def _validate_create_item(self, item: UsageCounter) -> bool:
+        """Validate a usage counter before storage"""
+        return item.id is not None and item.user_id is not None
+
+    def _validate_update_item(self, item: UsageCounter) -> bool:
+        """Validate a usage counter before storage"""
+        return item.id is not None
+
+    def _reconstruct_item(self, data: Dict[str, Any]) -> UsageCounter:
+        """Reconstruct a UsageCounter from stored data"""
+        return UsageCounter(**data)
+
+    @staticmethod
+    def session_counter_id(session_id: str) -> str:
+        return f"session:{session_id}"
+
+    @staticmethod
+    def user_day_counter_id(user_id: str, day: str) -> str:
+        return f"user_day:{user_id}:{day}"
+
+    async def increment_turn_usage(
+        self, user_id: str, session_id: str, day: str, usage: UsageMetadata
+    ) -> None:
+        """Add one turn's usage to the session and user-day counters.
+
+        Uses server-side increments in a single batch, so concurrent turns
+        never lose updates and no counter document has to be read first.
+        """
+        increments = {
+            "turn_count": firestore.Increment(1),
+            "prompt_token_count": firestore.Increment(usage.prompt_token_count or 0),
+            "response_token_count": firestore.Increment(
+                usage.response_token_count or 0
+            ),
+            "total_token_count": firestore.Increment(usage.total_token_count or 0),
+            "cost_estimate": firestore.Increment(usage.cost_estimate or 0.0),
+            "processing_time": firestore.Increment(usage.processing_time or 0.0),
+            "updated_at": self._get_timestamp(),
+        }
+
+        batch = self.db.batch()
+        session_counter_id = self.session_counter_id(session_id)
+        batch.set(
+            self.collection.document(session_counter_id),
+            {
+                "id": session_counter_id,
+                "scope": UsageScope.SESSION.value,
+                "user_id": user_id,
+                "session_id": session_id,
+                **increments,
+            },
+            merge=True,
+        )
+        user_day_counter_id = self.user_day_counter_id(user_id, day)
+        batch.set(
+            self.collection.document(user_day_counter_id),
+            {
+                "id": user_day_counter_id,
+                "scope": UsageScope.USER_DAY.value,
+                "user_id": user_id,
+                "day": day,
+                **increments,
+            },
+            merge=True,
+        )
+        batch.commit()
+
+    async def get_session_usage(self, session_id: str) -> Optional[UsageCounter]:
+        """Get the usage counter of a session"""
+        return await self.get_by_id(self.session_counter_id(session_id))
+
+    async def get_user_day_usage(
+        self, user_id: str, day: str
+    ) -> Optional[UsageCounter]:
+        """Get the usage counter of a user for one UTC day"""
+        return await self.get_by_id(self.user_day_counter_id(user_id, day))
+
+    async def get_most_expensive_sessions(
+        self, user_id: str, limit: int = 10
+    ) -> List[UsageCounter]:
+        """Get a user's session counters ordered by estimated cost"""
+        query = (
+            self.collection.where("user_id", "==", user_id)
+            .where("scope", "==", UsageScope.SESSION.value)
+            .order_by("cost_estimate", direction=firestore.Query.DESCENDING)
+            .limit(limit)
+        )
+        return [self._reconstruct_item(doc.to_dict()) for doc in query.stream()]
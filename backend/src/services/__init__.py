@@ -1,12 +1,28 @@
 # Services module
 from .artifact_service import ArtifactService
+from .artifact_storage import ArtifactStorage
 from .chat_session_service import ChatSessionService
+from .ingestion_service import IngestionService
 from .message_service import MessageService
+from .preview_service import PreviewService
+from .rate_limit_service import RateLimitService
+from .response_cache_service import ResponseCacheService
+from .retention_service import RetentionService
 from .runner_manager_service import RunnerManagerService
+from .transaction_store import TransactionStore
+from .usage_service import UsageService
 
 __all__ = [
     "ArtifactService",
+    "ArtifactStorage",
     "ChatSessionService",
+    "IngestionService",
     "MessageService",
+    "PreviewService",
+    "RateLimitService",
+    "ResponseCacheService",
+    "RetentionService",
     "RunnerManagerService",
+    "TransactionStore",
+    "UsageService",
 ]
@@ -1,6 +1,13 @@
+import asyncio
+import hashlib
+import json
+import logging
 import os
 import uuid
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
 
 from ..models.artifact import (
     Artifact,
@@ -10,9 +17,109 @@ from ..models.artifact import (
     ArtifactType,
     ArtifactUpdate,
 )
+from ..models.user import User, UserConsents
+from ..repositories.artifact_blob_repository import ArtifactBlobRepository
 from ..repositories.artifact_repository import ArtifactRepository
 from ..repositories.message_repository import MessageRepository
 from ..repositories.user_repository import UserRepository
+from ..services.artifact_storage import ArtifactStorage, LocalArtifactStorage
+from ..services.ingestion_service import IngestionService
+from ..services.table_store import TABLE_PAGE_ROWS, TableStore, decode_cursor
+from ..services.transaction_store import TransactionStore
+from ..utils.chart_compaction import compact_chart
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the request per chunk; bounds the memory used by an upload
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Stored files deleted at once by the retention cleanup
+FILE_DELETE_CONCURRENCY = 8
+
+# Maximum upload size per artifact type in MB, override with the
+# UPLOAD_SIZE_LIMITS_MB environment variable (JSON, e.g. {"pdf": 100})
+DEFAULT_UPLOAD_SIZE_LIMITS_MB: Dict[ArtifactType, int] = {
+    ArtifactType.PDF: 50,
+    ArtifactType.CSV: 20,
+    ArtifactType.IMAGE: 10,
+    ArtifactType.DOCUMENT: 20,
+    ArtifactType.SPREADSHEET: 20,
+    ArtifactType.OTHER: 10,
+}
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the size limit of its artifact type"""
+
+    def __init__(self, artifact_type: ArtifactType, max_size: int):
+        self.artifact_type = artifact_type
+        self.max_size = max_size
+        super().__init__(
+            f"{artifact_type.value} uploads are limited to {max_size} bytes"
+        )
+
+
+class ArtifactContent(BaseModel):
+    """Where and how to serve an artifact's stored file"""
+
+    storage_key: Optional[str] = None
+    file_path: Optional[str] = None
+    redirect_url: Optional[str] = None
+    etag: Optional[str] = None
+    size: Optional[int] = None
+    mime_type: str = "application/octet-stream"
+    filename: Optional[str] = None
+
+
+class StoredUpload(BaseModel):
+    """Result of streaming an upload to storage"""
+
+    storage_key: str
+    storage_uri: str
+    file_path: Optional[str]
+    file_size: int
+    sha256: str
+
+
+def load_upload_size_limits() -> Dict[ArtifactType, int]:
+    """Upload size limits in bytes, with overrides from the environment"""
+    limits_mb = dict(DEFAULT_UPLOAD_SIZE_LIMITS_MB)
+    override = os.getenv("UPLOAD_SIZE_LIMITS_MB")
+    if override:
+        for artifact_type, limit in json.loads(override).items():
+            limits_mb[ArtifactType(artifact_type)] = limit
+    return {
+        artifact_type: int(limit * 1024 * 1024)
+        for artifact_type, limit in limits_mb.items()
+    }
+
+
+def chart_data_key(user_id: str, chart_hash: str) -> str:
+    """Storage key of a chart's full-resolution payload"""
+    return f"charts/{user_id}/{chart_hash[:2]}/{chart_hash}.json"
+
+
+async def compact_chart_payload(
+    storage: ArtifactStorage,
+    user_id: str,
+    chart_data: Dict[str, Any],
+    chart_type: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Compact a chart for streaming and storing.
+
+    When points were dropped, the original payload is stored by hash and the
+    compacted chart's "compaction" entry says where to fetch it.
+    """
+    compacted, compaction = compact_chart(chart_data, chart_type)
+    if compaction is None:
+        return compacted
+
+    payload = json.dumps(chart_data, separators=(",", ":"), default=str).encode()
+    chart_hash = hashlib.sha256(payload).hexdigest()
+    key = chart_data_key(user_id, chart_hash)
+    if not await storage.exists(key):
+        await storage.write_bytes(key, payload, "application/json")
+    return {**compacted, "compaction": {**compaction, "full_data_hash": chart_hash}}
 
 
 class ArtifactService:
@@ -23,31 +130,58 @@ class ArtifactService:
         artifact_repository: ArtifactRepository,
         message_repository: MessageRepository,
         user_repository: UserRepository,
+        storage: Optional[ArtifactStorage] = None,
+        blob_repository: Optional[ArtifactBlobRepository] = None,
+        transaction_store: Optional[TransactionStore] = None,
     ):
         self.repository = artifact_repository
         self.message_repository = message_repository
+        self.user_repository = user_repository
+        self.storage = storage or LocalArtifactStorage()
+        self.tables = TableStore(self.storage)
+        self.blob_repository = blob_repository
+        self.transaction_store = transaction_store
+        self.upload_size_limits = load_upload_size_limits()
+
+    def get_upload_size_limit(self, filename: str) -> int:
+        """Maximum upload size in bytes for a filename's artifact type"""
+        artifact_type = self._get_artifact_type_from_filename(filename)
+        return self.upload_size_limits.get(
+            artifact_type, self.upload_size_limits[ArtifactType.OTHER]
+        )
+
+    def check_upload_size(self, filename: str, size: Optional[int]) -> None:
+        """Reject an upload early when its declared size is over the limit"""
+        if size is not None and size > self.get_upload_size_limit(filename):
+            raise UploadTooLargeError(
+                self._get_artifact_type_from_filename(filename),
+                self.get_upload_size_limit(filename),
+            )
 
     async def create_user_upload_artifact(
         self,
         session_id: str,
         user_id: str,
         message_id: str,
-        file_data: bytes,
+        file_chunks: AsyncIterator[bytes],
         filename: str,
         mime_type: str,
         title: Optional[str] = None,
         description: Optional[str] = None,
     ) -> Artifact:
-        """Create an artifact from user file upload"""
+        """Create an artifact from user file upload, streamed chunk by chunk"""
         # Determine artifact type from file extension
         artifact_type = self._get_artifact_type_from_filename(filename)
 
-        # Generate unique filename
+        # The content hash is only known once the upload has been read, so it
+        # lands on a staging key first
         file_extension = os.path.splitext(filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
+        staging_key = f"staging/{uuid.uuid4()}{file_extension}"
 
-        # Save file to local storage (or cloud storage)
-        file_path = await self._save_uploaded_file(file_data, unique_filename)
+        upload = await self._save_uploaded_file(
+            file_chunks, staging_key, self.get_upload_size_limit(filename)
+        )
+        upload, deduplicated = await self._store_content_addressed(upload, mime_type)
 
         artifact_data = ArtifactCreate(
             session_id=session_id,
@@ -57,10 +191,14 @@ class ArtifactService:
             source=ArtifactSource.USER_UPLOAD,
             title=title or filename,
             description=description,
+            retention_expires_at=await self._retention_expires_at(user_id),
             metadata={
                 "original_filename": filename,
-                "file_size": len(file_data),
+                "file_size": upload.file_size,
                 "mime_type": mime_type,
+                "sha256": upload.sha256,
+                "storage_key": upload.storage_key,
+                "deduplicated": deduplicated,
             },
             consent_required=False,  # User uploads don't need consent
             consent_granted=True,  # User implicitly consents by uploading
@@ -73,8 +211,10 @@ class ArtifactService:
             artifact.id,
             user_id,
             ArtifactUpdate(
-                file_path=file_path,
-                file_size=len(file_data),
+                file_path=upload.file_path,
+                storage_uri=upload.storage_uri,
+                content_hash=upload.sha256,
+                file_size=upload.file_size,
                 mime_type=mime_type,
                 original_filename=filename,
                 status=ArtifactStatus.COMPLETED,
@@ -110,6 +250,7 @@ class ArtifactService:
             metadata=metadata or {},
             consent_required=consent_required,
             consent_granted=not consent_required,  # Auto-grant if user has consent
+            retention_expires_at=await self._retention_expires_at(user_id, user),
         )
 
         artifact = await self.repository.create_artifact(artifact_data)
@@ -209,9 +350,42 @@ class ArtifactService:
             session_id, user_id, source
         )
 
-    async def cleanup_expired_artifacts(self) -> int:
-        """Clean up artifacts that have exceeded retention period"""
-        return await self.repository.delete_expired_artifacts()
+    async def cleanup_expired_artifacts(
+        self, batch_size: int = 200, now: Optional[datetime] = None
+    ) -> int:
+        """Delete one page of artifacts past their retention date, with their files"""
+        deleted = await self.repository.delete_expired_artifacts(now, batch_size)
+        semaphore = asyncio.Semaphore(FILE_DELETE_CONCURRENCY)
+
+        async def release(artifact: Artifact) -> None:
+            async with semaphore:
+                await self._release_stored_file(artifact)
+
+        results = await asyncio.gather(
+            *(release(artifact) for artifact in deleted), return_exceptions=True
+        )
+        for artifact, result in zip(deleted, results):
+            if isinstance(result, Exception):
+                logger.warning(
+                    "Error deleting files of artifact %s: %s", artifact.id, result
+                )
+        return len(deleted)
+
+    async def _retention_expires_at(
+        self, user_id: str, user: Optional[User] = None
+    ) -> Optional[datetime]:
+        """Expiry for a new artifact from the user's retention consent.
+
+        A retention of zero days or less keeps artifacts until deleted.
+        """
+        days = UserConsents().retention_days
+        if user is None and self.user_repository is not None:
+            user = await self.user_repository.get_user(user_id)
+        if user is not None:
+            days = user.consents.retention_days
+        if days <= 0:
+            return None
+        return datetime.utcnow() + timedelta(days=days)
 
     def _get_artifact_type_from_filename(self, filename: str) -> ArtifactType:
         """Determine artifact type from filename extension"""
@@ -233,18 +407,130 @@ class ArtifactService:
 
         return type_mapping.get(ext, ArtifactType.OTHER)
 
-    async def _save_uploaded_file(self, file_data: bytes, filename: str) -> str:
-        """Save uploaded file to storage and return file path"""
-        # For now, save to local storage
-        # In production, this should save to cloud storage (GCS, S3, etc.)
-        upload_dir = "uploads"
-        os.makedirs(upload_dir, exist_ok=True)
+    async def _save_uploaded_file(
+        self, file_chunks: AsyncIterator[bytes], key: str, max_size: int
+    ) -> StoredUpload:
+        """Stream an upload to storage, hashing and counting it on the way.
+
+        Each chunk is handed to storage as it arrives, so memory per upload
+        stays bounded by the chunk size. Nothing is stored when the upload
+        fails or exceeds `max_size`.
+        """
+        digest = hashlib.sha256()
+        file_size = 0
+
+        async def _measured_chunks() -> AsyncIterator[bytes]:
+            nonlocal file_size
+            async for chunk in file_chunks:
+                file_size += len(chunk)
+                if file_size > max_size:
+                    raise UploadTooLargeError(
+                        self._get_artifact_type_from_filename(key), max_size
+                    )
+                # hashlib releases the GIL for large buffers
+                await asyncio.to_thread(digest.update, chunk)
+                yield chunk
+
+        await self.storage.write_stream(key, _measured_chunks())
+
+        return StoredUpload(
+            storage_key=key,
+            storage_uri=self.storage.storage_uri(key),
+            file_path=self.storage.local_path(key),
+            file_size=file_size,
+            sha256=digest.hexdigest(),
+        )
+
+    @staticmethod
+    def content_key(content_hash: str, generation: Optional[str] = None) -> str:
+        """Storage key of content-addressed files.
+
+        Each time content is stored anew after its last reference was
+        released it gets a new generation, so a release still deleting the
+        old file can't remove the new one. Blobs stored before generations
+        existed have none.
+        """
+        key = f"blobs/{content_hash[:2]}/{content_hash}"
+        return f"{key}.{generation}" if generation else key
+
+    @staticmethod
+    def preview_key(storage_key: str) -> str:
+        """Storage key of the preview rendered from a content-addressed file"""
+        return f"{storage_key}.preview.webp"
+
+    async def _store_content_addressed(
+        self, upload: StoredUpload, mime_type: Optional[str]
+    ) -> Tuple[StoredUpload, bool]:
+        """Move a staged upload to its content key, or drop it as a duplicate.
+
+        Returns the upload at its final key and whether it was a duplicate.
+        Without a blob repository uploads aren't shared and stay where they
+        were staged.
+        """
+        if self.blob_repository is None:
+            return upload, False
+
+        # Moved before the record points at it, so a concurrent duplicate
+        # never references a file that isn't there yet
+        key = self.content_key(upload.sha256, uuid.uuid4().hex[:12])
+        await self.storage.move(upload.storage_key, key)
+        deduplicated = not await self.blob_repository.acquire(
+            upload.sha256, key, upload.file_size, mime_type
+        )
+        if deduplicated:
+            await self.storage.delete(key)
+            # The reference just taken keeps the record from being released
+            blob = await self.blob_repository.get_by_id(upload.sha256)
+            key = blob.storage_key
+
+        return (
+            upload.model_copy(
+                update={
+                    "storage_key": key,
+                    "storage_uri": self.storage.storage_uri(key),
+                    "file_path": self.storage.local_path(key),
+                }
+            ),
+            deduplicated,
+        )
 
-        file_path = os.path.join(upload_dir, filename)
-        with open(file_path, "wb") as f:
-            f.write(file_data)
+    async def _release_stored_file(self, artifact: Artifact) -> None:
+        """Drop an artifact's reference to its file, deleting the last copy"""
+        table_id = (artifact.metadata or {}).get("table_id")
+        if table_id and artifact.artifact_type == ArtifactType.TABLE:
+            await self.tables.delete(artifact.user_id, table_id)
+
+        compaction = (artifact.metadata or {}).get("compaction") or {}
+        chart_hash = compaction.get("full_data_hash")
+        if chart_hash and artifact.artifact_type == ArtifactType.CHART:
+            await self.storage.delete(chart_data_key(artifact.user_id, chart_hash))
+
+        if (
+            self.transaction_store is not None
+            and artifact.source == ArtifactSource.USER_UPLOAD
+        ):
+            await asyncio.to_thread(
+                self.transaction_store.replace_source,
+                artifact.user_id,
+                artifact.id,
+                None,
+            )
 
-        return file_path
+        if artifact.content_hash and self.blob_repository is not None:
+            blob = await self.blob_repository.release(artifact.content_hash)
+            if blob is not None:
+                await self.storage.delete(blob.storage_key)
+                await self.storage.delete(self.preview_key(blob.storage_key))
+                # The parsed statement is as personal as the file itself
+                await self.storage.delete(
+                    IngestionService.result_key(artifact.content_hash)
+                )
+            return
+
+        # Files stored before content addressing belong to a single artifact
+        storage_key = self.get_storage_key(artifact)
+        if storage_key:
+            await self.storage.delete(storage_key)
 
     async def create_artifact(
         self,
@@ -271,6 +557,7 @@ class ArtifactService:
             title=title,
             description=description,
             metadata=metadata,
+            retention_expires_at=await self._retention_expires_at(user_id),
         )
 
         return await self.repository.create_artifact(artifact_data)
@@ -309,8 +596,69 @@ class ArtifactService:
         return await self.repository.update_artifact(artifact_id, user_id, update_data)
 
     async def delete_artifact(self, artifact_id: str, user_id: str) -> bool:
-        """Delete an artifact (ensures ownership)"""
-        return await self.repository.delete_artifact(artifact_id, user_id)
+        """Delete an artifact and its stored file (ensures ownership)"""
+        artifact = await self.repository.get_artifact_by_user(artifact_id, user_id)
+        deleted = await self.repository.delete_artifact(artifact_id, user_id)
+        if deleted and artifact:
+            await self._release_stored_file(artifact)
+        return deleted
+
+    async def get_artifact_content(
+        self, artifact: Artifact, redirect_expires_in: Optional[timedelta] = None
+    ) -> Optional[ArtifactContent]:
+        """Resolve how an artifact's file is served, or None if it has no file.
+
+        Backends with a presigned URL are served by redirect so the bytes never
+        pass through the API; local files are served from their path.
+        """
+        storage_key = self.get_storage_key(artifact)
+        if not storage_key and not artifact.file_path:
+            return None
+
+        content_hash = artifact.content_hash or (artifact.metadata or {}).get("sha256")
+        content = ArtifactContent(
+            storage_key=storage_key,
+            etag=f'"{content_hash}"' if content_hash else None,
+            size=artifact.file_size,
+            mime_type=artifact.mime_type or "application/octet-stream",
+            filename=artifact.original_filename,
+        )
+        if storage_key:
+            content.redirect_url = await self.storage.presigned_url(
+                storage_key,
+                expires_in=redirect_expires_in or timedelta(minutes=15),
+                filename=artifact.original_filename,
+            )
+            content.file_path = self.storage.local_path(storage_key)
+        else:
+            # Files stored before ArtifactStorage existed only have a path
+            content.file_path = artifact.file_path
+        return content
+
+    async def get_preview_content(
+        self, artifact: Artifact, redirect_expires_in: Optional[timedelta] = None
+    ) -> Optional[ArtifactContent]:
+        """Resolve how an artifact's preview is served, or None if it has none"""
+        preview = (artifact.metadata or {}).get("preview") or {}
+        preview_key = preview.get("key")
+        if not preview_key:
+            return None
+
+        return ArtifactContent(
+            storage_key=preview_key,
+            etag=f'"{artifact.content_hash}-preview"',
+            size=preview.get("size"),
+            mime_type=preview.get("mime_type", "image/webp"),
+            redirect_url=await self.storage.presigned_url(
+                preview_key, expires_in=redirect_expires_in or timedelta(minutes=15)
+            ),
+            file_path=self.storage.local_path(preview_key),
+        )
+
+    @staticmethod
+    def get_storage_key(artifact: Artifact) -> Optional[str]:
+        """Key of the artifact's file in storage, if it has one"""
+        return (artifact.metadata or {}).get("storage_key")
 
     async def get_message_artifacts(
         self, message_id: str, user_id: str
@@ -357,11 +705,14 @@ class ArtifactService:
         chart_data: Dict[str, Any],
         description: Optional[str] = None,
     ) -> Artifact:
-        """Create a chart artifact"""
+        """Create a chart artifact, downsampled if it has too many points"""
+        chart_data = await compact_chart_payload(self.storage, user_id, chart_data)
         metadata = {
             "chart_type": chart_data.get("type", "unknown"),
             "chart_config": chart_data.get("config", {}),
         }
+        if "compaction" in chart_data:
+            metadata["compaction"] = chart_data["compaction"]
 
         artifact = await self.create_artifact(
             session_id=session_id,
@@ -383,6 +734,74 @@ class ArtifactService:
 
         return await self.get_artifact(artifact.id, user_id)
 
+    async def get_chart_data(self, user_id: str, chart_hash: str) -> Optional[bytes]:
+        """Full-resolution payload of a compacted chart, as JSON bytes"""
+        if len(chart_hash) != 64 or not all(
+            c in "0123456789abcdef" for c in chart_hash
+        ):
+            return None
+        key = chart_data_key(user_id, chart_hash)
+        if not await self.storage.exists(key):
+            return None
+        return await self.storage.read_bytes(key)
+
+    async def create_table_artifact(
+        self,
+        session_id: str,
+        user_id: str,
+        message_id: str,
+        title: str,
+        table_id: str,
+        description: Optional[str] = None,
+    ) -> Artifact:
+        """Register a table already stored by the table tool as an artifact"""
+        schema = await self.tables.get_schema(user_id, table_id)
+        first_page = await self.tables.get_page(user_id, table_id, schema=schema)
+        artifact = await self.create_artifact(
+            session_id=session_id,
+            user_id=user_id,
+            message_id=message_id,
+            artifact_type=ArtifactType.TABLE,
+            title=title,
+            description=description,
+            metadata={"table_id": table_id, "row_count": schema["row_count"]},
+        )
+
+        # Only the schema and first page live in the document
+        await self.update_artifact(
+            artifact_id=artifact.id,
+            user_id=user_id,
+            content={"schema": schema, **first_page},
+            status=ArtifactStatus.COMPLETED,
+        )
+        return await self.get_artifact(artifact.id, user_id)
+
+    async def get_table_rows(
+        self,
+        artifact: Artifact,
+        cursor: Optional[str] = None,
+        limit: int = TABLE_PAGE_ROWS,
+        sort: Optional[str] = None,
+        descending: bool = False,
+        columns: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """A page of a table artifact's rows; a cursor fixes offset and sort"""
+        table_id = (artifact.metadata or {}).get("table_id")
+        if artifact.artifact_type != ArtifactType.TABLE or not table_id:
+            raise ValueError(f"Artifact {artifact.id} is not a table")
+        offset = 0
+        if cursor:
+            offset, sort, descending = decode_cursor(cursor)
+        return await self.tables.get_page(
+            artifact.user_id,
+            table_id,
+            offset=offset,
+            limit=limit,
+            sort=sort,
+            descending=descending,
+            columns=columns,
+        )
+
     async def create_report_artifact(
         self,
         session_id: str,
@@ -0,0 +1,332 @@
+import asyncio
+import contextlib
+import os
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import AsyncIterator, Optional
+
+# Bytes per chunk when streaming artifact contents out of storage
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class ArtifactStorage(ABC):
+    """Blob storage for artifact files, addressed by key"""
+
+    @abstractmethod
+    async def write_stream(
+        self,
+        key: str,
+        chunks: AsyncIterator[bytes],
+        content_type: Optional[str] = None,
+    ) -> int:
+        """Write chunks to `key` as they arrive and return the size written.
+
+        Nothing is left behind under `key` when the stream raises.
+        """
+        pass
+
+    @abstractmethod
+    def read_stream(
+        self,
+        key: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        chunk_size: int = READ_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        """Stream bytes `start`..`end` (inclusive) of a blob"""
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str) -> bool:
+        """Delete a blob, returning False when it did not exist"""
+        pass
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Check whether a blob exists"""
+        pass
+
+    @abstractmethod
+    async def move(self, src_key: str, dst_key: str) -> None:
+        """Move a blob to another key, replacing any blob already there"""
+        pass
+
+    @abstractmethod
+    def storage_uri(self, key: str) -> str:
+        """Backend URI of a blob, stored on the artifact"""
+        pass
+
+    async def presigned_url(
+        self,
+        key: str,
+        expires_in: timedelta = timedelta(minutes=15),
+        filename: Optional[str] = None,
+    ) -> Optional[str]:
+        """Time-limited URL that serves the blob directly, if supported"""
+        return None
+
+    async def write_bytes(
+        self, key: str, data: bytes, content_type: Optional[str] = None
+    ) -> int:
+        """Write a small blob held in memory"""
+
+        async def _single_chunk() -> AsyncIterator[bytes]:
+            yield data
+
+        return await self.write_stream(key, _single_chunk(), content_type)
+
+    async def read_bytes(self, key: str) -> bytes:
+        """Read a whole blob into memory; meant for small derived blobs"""
+        return b"".join([chunk async for chunk in self.read_stream(key)])
+
+    async def download_to_temp_file(self, key: str) -> str:
+        """Copy a blob to a local temporary file, e.g. for a worker process.
+
+        The caller removes the file.
+        """
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in self.read_stream(key):
+                await asyncio.to_thread(f.write, chunk)
+        return path
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path on the local filesystem, for backends that have one"""
+        return None
+
+
+class LocalArtifactStorage(ArtifactStorage):
+    """Stores blobs as files under a root directory"""
+
+    def __init__(self, root: str = "uploads"):
+        self.root = root
+
+    def local_path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if os.path.commonpath([os.path.abspath(path), os.path.abspath(self.root)]) != (
+            os.path.abspath(self.root)
+        ):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def storage_uri(self, key: str) -> str:
+        return f"file://{os.path.abspath(self.local_path(key))}"
+
+    async def write_stream(
+        self,
+        key: str,
+        chunks: AsyncIterator[bytes],
+        content_type: Optional[str] = None,
+    ) -> int:
+        path = self.local_path(key)
+        # Written next to the target and renamed, so readers never see a partial
+        tmp_path = f"{path}.{uuid.uuid4().hex}.part"
+        await asyncio.to_thread(os.makedirs, os.path.dirname(path), exist_ok=True)
+
+        size = 0
+        f = await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(f.write, chunk)
+                size += len(chunk)
+            await asyncio.to_thread(f.close)
+            await asyncio.to_thread(os.replace, tmp_path, path)
+        except BaseException:
+            await asyncio.to_thread(f.close)
+            await asyncio.to_thread(os.remove, tmp_path)
+            raise
+        return size
+
+    async def read_stream(
+        self,
+        key: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        chunk_size: int = READ_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        f = await asyncio.to_thread(open, self.local_path(key), "rb")
+        try:
+            await asyncio.to_thread(f.seek, start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = await asyncio.to_thread(f.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(f.close)
+
+    async def delete(self, key: str) -> bool:
+        try:
+            await asyncio.to_thread(os.remove, self.local_path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(os.path.exists, self.local_path(key))
+
+    async def move(self, src_key: str, dst_key: str) -> None:
+        dst_path = self.local_path(dst_key)
+        await asyncio.to_thread(os.makedirs, os.path.dirname(dst_path), exist_ok=True)
+        await asyncio.to_thread(os.replace, self.local_path(src_key), dst_path)
+
+
+class GCSArtifactStorage(ArtifactStorage):
+    """Stores blobs in a Google Cloud Storage bucket.
+
+    Set `api_endpoint` to use an emulator such as fake-gcs-server; emulators
+    can't sign URLs, so their plain media URL is handed out instead.
+    """
+
+    def __init__(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        api_endpoint: Optional[str] = None,
+        project: Optional[str] = None,
+    ):
+        from google.cloud import storage
+
+        if api_endpoint:
+            from google.auth.credentials import AnonymousCredentials
+
+            client = storage.Client(
+                project=project or "local",
+                credentials=AnonymousCredentials(),
+                client_options={"api_endpoint": api_endpoint},
+            )
+        else:
+            client = storage.Client(project=project)
+        self.api_endpoint = api_endpoint
+        self.bucket = client.bucket(bucket_name)
+        self.prefix = prefix.strip("/")
+
+    def _name(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def storage_uri(self, key: str) -> str:
+        return f"gs://{self.bucket.name}/{self._name(key)}"
+
+    async def write_stream(
+        self,
+        key: str,
+        chunks: AsyncIterator[bytes],
+        content_type: Optional[str] = None,
+    ) -> int:
+        blob = self.bucket.blob(self._name(key))
+        # Resumable upload: each buffered chunk is sent as it fills, and the
+        # object only becomes visible when the writer is closed
+        writer = await asyncio.to_thread(
+            blob.open, "wb", content_type=content_type, chunk_size=READ_CHUNK_SIZE * 8
+        )
+        size = 0
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(writer.write, chunk)
+                size += len(chunk)
+            await asyncio.to_thread(writer.close)
+        except BaseException:
+            # A dropped writer still finalizes what was sent when it is
+            # collected, so close it now and delete the partial object
+            with contextlib.suppress(Exception):
+                await asyncio.to_thread(writer.close)
+            await self.delete(key)
+            raise
+        return size
+
+    async def read_stream(
+        self,
+        key: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        chunk_size: int = READ_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        blob = self.bucket.blob(self._name(key))
+        position = start
+        while end is None or position <= end:
+            chunk_end = position + chunk_size - 1
+            if end is not None:
+                chunk_end = min(chunk_end, end)
+            try:
+                chunk = await asyncio.to_thread(
+                    blob.download_as_bytes, start=position, end=chunk_end
+                )
+            except Exception as e:
+                # Range past the end of the object
+                if getattr(e, "code", None) == 416:
+                    break
+                raise
+            if chunk:
+                yield chunk
+            # A short read means the end of the object was reached
+            if len(chunk) < chunk_end - position + 1:
+                break
+            position += len(chunk)
+
+    async def delete(self, key: str) -> bool:
+        from google.api_core.exceptions import NotFound
+
+        try:
+            await asyncio.to_thread(self.bucket.blob(self._name(key)).delete)
+            return True
+        except NotFound:
+            return False
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self.bucket.blob(self._name(key)).exists)
+
+    async def move(self, src_key: str, dst_key: str) -> None:
+        # Server-side copy, then delete; the bytes never pass through the API
+        await asyncio.to_thread(
+            self.bucket.rename_blob,
+            self.bucket.blob(self._name(src_key)),
+            self._name(dst_key),
+        )
+
+    async def presigned_url(
+        self,
+        key: str,
+        expires_in: timedelta = timedelta(minutes=15),
+        filename: Optional[str] = None,
+    ) -> Optional[str]:
+        name = self._name(key)
+        if self.api_endpoint:
+            from urllib.parse import quote
+
+            return (
+                f"{self.api_endpoint.rstrip('/')}/download/storage/v1/b/"
+                f"{self.bucket.name}/o/{quote(name, safe='')}?alt=media"
+            )
+        return await asyncio.to_thread(
+            self.bucket.blob(name).generate_signed_url,
+            version="v4",
+            expiration=expires_in,
+            method="GET",
+            response_disposition=(
+                f'attachment; filename="{filename}"' if filename else None
+            ),
+        )
+
+
+def create_artifact_storage() -> ArtifactStorage:
+    """Build the storage backend selected by ARTIFACT_STORAGE_BACKEND"""
+    backend = os.getenv("ARTIFACT_STORAGE_BACKEND", "local").lower()
+    if backend == "gcs":
+        bucket_name = os.getenv("ARTIFACT_STORAGE_BUCKET")
+        if not bucket_name:
+            raise ValueError("ARTIFACT_STORAGE_BUCKET environment variable is not set")
+        return GCSArtifactStorage(
+            bucket_name,
+            prefix=os.getenv("ARTIFACT_STORAGE_PREFIX", ""),
+            api_endpoint=os.getenv("ARTIFACT_STORAGE_ENDPOINT") or None,
+            project=os.getenv("PROJECT_ID") or None,
+        )
+    if backend == "local":
+        return LocalArtifactStorage(os.getenv("ARTIFACT_STORAGE_PATH", "uploads"))
+    raise ValueError(f"Unknown artifact storage backend: {backend}")
@@ -1,3 +1,4 @@
+import logging
 from typing import List, Optional
 
 from fastapi import HTTPException
@@ -9,6 +10,8 @@ from ..models.chat_session import (
 )
 from ..repositories import ChatSessionRepository, MessageRepository
 
+logger = logging.getLogger(__name__)
+
 
 class ChatSessionService:
     """Service for chat session operations"""
@@ -30,7 +33,7 @@ class ChatSessionService:
             session_data = ChatSessionCreate(user_id=user_id)
             return await self.repository.create_session(session_data)
         except Exception as e:
-            print(f"Error creating chat session: {e}")
+            logger.exception("Error creating chat session")
             raise HTTPException(status_code=500, detail=str(e))
 
     async def get_user_sessions(
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from ..models.artifact import Artifact, ArtifactStatus, ArtifactType, ArtifactUpdate
+from ..repositories.artifact_repository import ArtifactRepository
+from ..services.artifact_storage import ArtifactStorage
+from ..services.transaction_store import TransactionStore
+from ..utils.statement_parser import MissingParserError, parse_document
+
+logger = logging.getLogger(__name__)
+
+INGESTIBLE_TYPES = {ArtifactType.PDF, ArtifactType.CSV, ArtifactType.SPREADSHEET}
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_ingestion_executor() -> ProcessPoolExecutor:
+    """Shared process pool for parsing, sized by INGESTION_WORKERS"""
+    global _executor
+    if _executor is None:
+        workers = int(os.getenv("INGESTION_WORKERS", min(2, os.cpu_count() or 1)))
+        # Spawned workers don't inherit the server's threads and gRPC channels
+        _executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_ingestion_executor() -> None:
+    """Stop the parsing workers, if they were started"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class IngestionService:
+    """Parses uploaded statements off the event loop and caches the results.
+
+    Parsing runs in a process pool so large PDFs don't hold the GIL of the
+    API worker. The full result (text excerpt and columnar transactions) is
+    stored once per content hash, so duplicate uploads are parsed once; a
+    summary goes into the artifact metadata under "ingestion". Parsed rows
+    are also added to the user's TransactionStore for the agent's queries.
+    """
+
+    def __init__(
+        self,
+        artifact_repository: ArtifactRepository,
+        storage: ArtifactStorage,
+        executor: Optional[ProcessPoolExecutor] = None,
+        transaction_store: Optional[TransactionStore] = None,
+    ):
+        self.repository = artifact_repository
+        self.storage = storage
+        self._executor = executor
+        self.transaction_store = transaction_store
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        return self._executor or get_ingestion_executor()
+
+    @staticmethod
+    def result_key(content_hash: str) -> str:
+        """Storage key of the cached parse result of some content"""
+        return f"ingested/{content_hash[:2]}/{content_hash}.json"
+
+    @staticmethod
+    def is_ingestible(artifact: Artifact) -> bool:
+        """Whether an artifact is a statement the pipeline can parse"""
+        return (
+            artifact.artifact_type in INGESTIBLE_TYPES
+            and artifact.content_hash is not None
+        )
+
+    async def mark_processing(self, artifact: Artifact) -> Artifact:
+        """Flag an upload as queued for ingestion"""
+        updated = await self.repository.update_artifact(
+            artifact.id,
+            artifact.user_id,
+            ArtifactUpdate(status=ArtifactStatus.PROCESSING),
+        )
+        return updated or artifact
+
+    async def ingest_artifact(
+        self, artifact_id: str, user_id: str
+    ) -> Optional[Artifact]:
+        """Parse an uploaded statement and record the outcome on the artifact"""
+        artifact = await self.repository.get_artifact_by_user(artifact_id, user_id)
+        if artifact is None or not self.is_ingestible(artifact):
+            return None
+
+        try:
+            result, cached = await self._load_or_parse(artifact)
+            ingestion = {
+                **result["summary"],
+                "pages": result["pages"],
+                "result_key": self.result_key(artifact.content_hash),
+                "cached": cached,
+            }
+            if self.transaction_store is not None:
+                await asyncio.to_thread(
+                    self.transaction_store.replace_source,
+                    user_id,
+                    artifact_id,
+                    result["transactions"],
+                )
+            status = ArtifactStatus.COMPLETED
+        except MissingParserError as e:
+            # The upload itself is fine; it just isn't searchable
+            logger.info("Skipped ingesting artifact %s: %s", artifact_id, e)
+            ingestion = {"skipped": str(e)}
+            status = ArtifactStatus.COMPLETED
+        except Exception as e:
+            logger.warning("Error ingesting artifact %s: %s", artifact_id, e)
+            ingestion = {"error": str(e)}
+            status = ArtifactStatus.FAILED
+
+        return await self.repository.set_metadata_entry(
+            artifact_id, user_id, "ingestion", ingestion, status=status
+        )
+
+    async def get_ingested_document(
+        self, artifact: Artifact
+    ) -> Optional[Dict[str, Any]]:
+        """Load the cached parse result of an ingested artifact"""
+        ingestion = (artifact.metadata or {}).get("ingestion") or {}
+        result_key = ingestion.get("result_key")
+        if not result_key:
+            return None
+        return json.loads(await self.storage.read_bytes(result_key))
+
+    async def _load_or_parse(self, artifact: Artifact) -> Tuple[Dict[str, Any], bool]:
+        result_key = self.result_key(artifact.content_hash)
+        if await self.storage.exists(result_key):
+            return json.loads(await self.storage.read_bytes(result_key)), True
+
+        storage_key = (artifact.metadata or {}).get("storage_key")
+        path = self.storage.local_path(storage_key)
+        downloaded = path is None
+        if downloaded:
+            path = await self.storage.download_to_temp_file(storage_key)
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.executor, parse_document, path, artifact.artifact_type.value
+            )
+        finally:
+            if downloaded:
+                await asyncio.to_thread(os.remove, path)
+
+        await self.storage.write_bytes(
+            result_key, json.dumps(result).encode(), "application/json"
+        )
+        return result, False
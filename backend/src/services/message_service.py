@@ -3,9 +3,12 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 from ..models import Message, MessageCreate, MessageEvent, MessageRole
+from ..models.message import UsageMetadata
+from ..observability.tracing import trace_methods
 from ..repositories.message_repository import MessageRepository
 
 
+@trace_methods
 class MessageService:
     """Service class for message business logic"""
 
@@ -20,6 +23,7 @@ class MessageService:
         human_content: Optional[str] = None,
         events: Optional[List[MessageEvent]] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        total_usage_metadata: Optional[UsageMetadata] = None,
     ) -> Message:
         """Create a new message with business logic validation"""
         # Validate inputs
@@ -47,6 +51,7 @@ class MessageService:
                 human_content=human_content,
                 events=events,
                 metadata=metadata,
+                total_usage_metadata=total_usage_metadata,
             )
         )
 
@@ -78,6 +83,7 @@ class MessageService:
         user_id: str,
         events: List[MessageEvent],
         metadata: Optional[Dict[str, Any]] = None,
+        total_usage_metadata: Optional[UsageMetadata] = None,
     ) -> Message:
         """Create an assistant message with events"""
         return await self.create_message(
@@ -86,6 +92,7 @@ class MessageService:
             role="assistant",
             events=events,
             metadata=metadata,
+            total_usage_metadata=total_usage_metadata,
         )
 
     async def get_session_messages(
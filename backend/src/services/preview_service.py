@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import Executor
+from typing import Any, Dict, Optional, Tuple
+
+from ..models.artifact import Artifact, ArtifactType
+from ..repositories.artifact_repository import ArtifactRepository
+from ..services.artifact_service import ArtifactService
+from ..services.artifact_storage import ArtifactStorage
+from ..services.ingestion_service import get_ingestion_executor
+from ..utils.preview_renderer import (
+    PREVIEW_MIME_TYPE,
+    MissingRendererError,
+    render_preview,
+)
+
+logger = logging.getLogger(__name__)
+
+PREVIEWABLE_TYPES = {ArtifactType.IMAGE, ArtifactType.PDF}
+
+
+class PreviewService:
+    """Renders thumbnails of uploaded images and PDFs off the event loop.
+
+    Rendering shares the ingestion process pool. A preview is stored next to
+    its content-addressed original, so duplicate uploads render once; only a
+    small "preview" entry goes into the artifact metadata, so listing a
+    session's artifacts never touches the full-size files.
+    """
+
+    def __init__(
+        self,
+        artifact_repository: ArtifactRepository,
+        storage: ArtifactStorage,
+        executor: Optional[Executor] = None,
+    ):
+        self.repository = artifact_repository
+        self.storage = storage
+        self._executor = executor
+
+    @property
+    def executor(self) -> Executor:
+        return self._executor or get_ingestion_executor()
+
+    @staticmethod
+    def is_previewable(artifact: Artifact) -> bool:
+        """Whether an artifact is an upload the renderer can preview"""
+        return (
+            artifact.artifact_type in PREVIEWABLE_TYPES
+            and artifact.content_hash is not None
+        )
+
+    async def generate_preview(
+        self, artifact_id: str, user_id: str
+    ) -> Optional[Artifact]:
+        """Render an upload's preview and record it on the artifact"""
+        artifact = await self.repository.get_artifact_by_user(artifact_id, user_id)
+        if artifact is None or not self.is_previewable(artifact):
+            return None
+
+        try:
+            preview, cached = await self._load_or_render(artifact)
+            preview["cached"] = cached
+        except MissingRendererError as e:
+            logger.debug("Skipped preview of artifact %s: %s", artifact_id, e)
+            return artifact
+        except Exception as e:
+            logger.warning("Error rendering preview of artifact %s: %s", artifact_id, e)
+            preview = {"error": str(e)}
+
+        # A missing preview isn't an upload failure, so the status is kept
+        return await self.repository.set_metadata_entry(
+            artifact_id, user_id, "preview", preview
+        )
+
+    async def _load_or_render(self, artifact: Artifact) -> Tuple[Dict[str, Any], bool]:
+        storage_key = ArtifactService.get_storage_key(artifact)
+        preview_key = ArtifactService.preview_key(storage_key)
+        if await self.storage.exists(preview_key):
+            return {"key": preview_key, "mime_type": PREVIEW_MIME_TYPE}, True
+
+        path = self.storage.local_path(storage_key)
+        downloaded = path is None
+        if downloaded:
+            path = await self.storage.download_to_temp_file(storage_key)
+        try:
+            rendered = await asyncio.get_running_loop().run_in_executor(
+                self.executor, render_preview, path, artifact.artifact_type.value
+            )
+        finally:
+            if downloaded:
+                await asyncio.to_thread(os.remove, path)
+
+        data = rendered.pop("data")
+        await self.storage.write_bytes(preview_key, data, rendered["mime_type"])
+        return {"key": preview_key, "size": len(data), **rendered}, False
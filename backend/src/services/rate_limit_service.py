@@ -0,0 +1,279 @@
+import json
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from ..models.user import User
+
+
+class RateLimitTier(BaseModel):
+    """Request and token limits for a user tier"""
+
+    requests_per_minute: float = Field(..., description="Request bucket refill rate")
+    burst: int = Field(..., description="Request bucket capacity")
+    tokens_per_window: int = Field(..., description="Token budget per window")
+    token_window_seconds: int = Field(
+        default=3600, description="Length of the sliding token window"
+    )
+
+
+# Override or extend with the RATE_LIMIT_TIERS environment variable (JSON)
+DEFAULT_RATE_LIMIT_TIERS: Dict[str, RateLimitTier] = {
+    "free": RateLimitTier(requests_per_minute=5, burst=5, tokens_per_window=100_000),
+    "standard": RateLimitTier(
+        requests_per_minute=20, burst=10, tokens_per_window=500_000
+    ),
+    "premium": RateLimitTier(
+        requests_per_minute=60, burst=30, tokens_per_window=2_000_000
+    ),
+}
+
+
+class RateLimitDecision(BaseModel):
+    """Outcome of a rate limit check"""
+
+    allowed: bool
+    retry_after: float = Field(default=0.0, description="Seconds until allowed")
+    limit: Optional[str] = Field(None, description="'requests' or 'tokens'")
+    tier: str
+
+
+class RateLimitStore(ABC):
+    """Storage for rate limit state; shared stores make limits global"""
+
+    # Sliding windows are kept as this many fixed sub-buckets
+    WINDOW_BUCKETS = 60
+
+    @abstractmethod
+    async def take_request(
+        self, key: str, capacity: int, refill_per_second: float, now: float
+    ) -> float:
+        """Take one request from a token bucket.
+
+        Returns 0 when allowed, otherwise the seconds until a request is available.
+        """
+        pass
+
+    @abstractmethod
+    async def get_window_usage(
+        self, key: str, window_seconds: int, now: float
+    ) -> Tuple[int, Optional[float]]:
+        """Get the usage inside the window and when its oldest bucket expires"""
+        pass
+
+    @abstractmethod
+    async def add_window_usage(
+        self, key: str, amount: int, window_seconds: int, now: float
+    ) -> None:
+        """Add usage to the current sub-bucket of a sliding window"""
+        pass
+
+    def _bucket_start(self, window_seconds: int, now: float) -> int:
+        width = max(1, window_seconds // self.WINDOW_BUCKETS)
+        return int(now // width * width)
+
+    @staticmethod
+    def _refill(
+        tokens: float, updated_at: float, capacity: int, rate: float, now: float
+    ) -> float:
+        return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Per-process rate limit state; limits apply per worker"""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._windows: Dict[str, Dict[int, int]] = {}
+
+    async def take_request(
+        self, key: str, capacity: int, refill_per_second: float, now: float
+    ) -> float:
+        tokens, updated_at = self._buckets.get(key, (float(capacity), now))
+        tokens = self._refill(tokens, updated_at, capacity, refill_per_second, now)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / refill_per_second
+
+    async def get_window_usage(
+        self, key: str, window_seconds: int, now: float
+    ) -> Tuple[int, Optional[float]]:
+        buckets = self._windows.get(key, {})
+        for start in [start for start in buckets if start <= now - window_seconds]:
+            del buckets[start]
+        if not buckets:
+            return 0, None
+        return sum(buckets.values()), min(buckets) + window_seconds
+
+    async def add_window_usage(
+        self, key: str, amount: int, window_seconds: int, now: float
+    ) -> None:
+        buckets = self._windows.setdefault(key, {})
+        start = self._bucket_start(window_seconds, now)
+        buckets[start] = buckets.get(start, 0) + amount
+
+
+class FirestoreRateLimitStore(RateLimitStore):
+    """Rate limit state shared by all workers, kept in Firestore transactions"""
+
+    def __init__(self, db=None, collection_name: str = "rate_limits"):
+        if db is None:
+            from ..config.firebase_config import get_firestore
+
+            db = get_firestore()
+        self.db = db
+        self.collection = db.collection(collection_name)
+
+    async def take_request(
+        self, key: str, capacity: int, refill_per_second: float, now: float
+    ) -> float:
+        from firebase_admin import firestore
+
+        doc_ref = self.collection.document(f"requests:{key}")
+
+        @firestore.transactional
+        def _take(transaction) -> float:
+            snapshot = doc_ref.get(transaction=transaction)
+            data = snapshot.to_dict() if snapshot.exists else {}
+            tokens = self._refill(
+                data.get("tokens", float(capacity)),
+                data.get("updated_at", now),
+                capacity,
+                refill_per_second,
+                now,
+            )
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / refill_per_second
+            transaction.set(doc_ref, {"tokens": tokens, "updated_at": now})
+            return retry_after
+
+        return _take(self.db.transaction())
+
+    async def get_window_usage(
+        self, key: str, window_seconds: int, now: float
+    ) -> Tuple[int, Optional[float]]:
+        snapshot = self.collection.document(f"tokens:{key}").get()
+        buckets = (
+            (snapshot.to_dict() or {}).get("buckets", {}) if snapshot.exists else {}
+        )
+        live = {
+            int(start): amount
+            for start, amount in buckets.items()
+            if int(start) > now - window_seconds
+        }
+        if not live:
+            return 0, None
+        return sum(live.values()), min(live) + window_seconds
+
+    async def add_window_usage(
+        self, key: str, amount: int, window_seconds: int, now: float
+    ) -> None:
+        from firebase_admin import firestore
+
+        doc_ref = self.collection.document(f"tokens:{key}")
+
+        @firestore.transactional
+        def _add(transaction) -> None:
+            snapshot = doc_ref.get(transaction=transaction)
+            buckets = (
+                (snapshot.to_dict() or {}).get("buckets", {}) if snapshot.exists else {}
+            )
+            buckets = {
+                start: value
+                for start, value in buckets.items()
+                if int(start) > now - window_seconds
+            }
+            start = str(self._bucket_start(window_seconds, now))
+            buckets[start] = buckets.get(start, 0) + amount
+            transaction.set(doc_ref, {"buckets": buckets, "updated_at": now})
+
+        _add(self.db.transaction())
+
+
+class RateLimitService:
+    """Per-user request and token limits, checked before any model call"""
+
+    def __init__(
+        self,
+        store: RateLimitStore,
+        tiers: Optional[Dict[str, RateLimitTier]] = None,
+        default_tier: str = "standard",
+    ):
+        self.store = store
+        self.tiers = tiers if tiers is not None else dict(DEFAULT_RATE_LIMIT_TIERS)
+        self.default_tier = default_tier
+
+    @classmethod
+    def from_env(cls) -> Optional["RateLimitService"]:
+        """Build the service from environment variables, or None when disabled"""
+        if os.getenv("RATE_LIMIT_ENABLED", "true").lower() != "true":
+            return None
+
+        tiers = dict(DEFAULT_RATE_LIMIT_TIERS)
+        override = os.getenv("RATE_LIMIT_TIERS")
+        if override:
+            for name, tier in json.loads(override).items():
+                tiers[name] = RateLimitTier(**tier)
+
+        if os.getenv("RATE_LIMIT_BACKEND", "memory").lower() == "firestore":
+            store: RateLimitStore = FirestoreRateLimitStore()
+        else:
+            store = InMemoryRateLimitStore()
+        return cls(
+            store, tiers, default_tier=os.getenv("RATE_LIMIT_DEFAULT_TIER", "standard")
+        )
+
+    def get_tier(self, tier: Optional[str]) -> Tuple[str, RateLimitTier]:
+        """Resolve the limits of a tier, falling back to the default tier"""
+        name = tier if tier in self.tiers else self.default_tier
+        return name, self.tiers[name]
+
+    async def check(self, user: User) -> RateLimitDecision:
+        """Check the token budget, then take one request from the bucket"""
+        tier_name, tier = self.get_tier(user.tier)
+        now = time.time()
+
+        used, expires_at = await self.store.get_window_usage(
+            user.uid, tier.token_window_seconds, now
+        )
+        if used >= tier.tokens_per_window:
+            return RateLimitDecision(
+                allowed=False,
+                retry_after=max(0.0, (expires_at or now) - now),
+                limit="tokens",
+                tier=tier_name,
+            )
+
+        retry_after = await self.store.take_request(
+            user.uid, tier.burst, tier.requests_per_minute / 60, now
+        )
+        if retry_after > 0:
+            return RateLimitDecision(
+                allowed=False, retry_after=retry_after, limit="requests", tier=tier_name
+            )
+        return RateLimitDecision(allowed=True, tier=tier_name)
+
+    async def record_tokens(
+        self, user_id: str, tokens: int, tier: Optional[str] = None
+    ) -> None:
+        """Charge the tokens a turn consumed against the user's window"""
+        if tokens <= 0:
+            return
+        _, limits = self.get_tier(tier)
+        await self.store.add_window_usage(
+            user_id, tokens, limits.token_window_seconds, time.time()
+        )
+
+    @staticmethod
+    def retry_after_header(decision: RateLimitDecision) -> str:
+        """Retry-After value in whole seconds"""
+        return str(max(1, math.ceil(decision.retry_after)))
@@ -0,0 +1,295 @@
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from ..models.message import MessageEvent
+
+# Queries that mention the user themselves or concrete figures are never cached,
+# even when the client flags the turn as not needing personal data.
+_PERSONAL_MARKERS = re.compile(
+    r"\b(i|i'm|i've|me|my|mine|myself|our|ours|we|us)\b|\d", re.IGNORECASE
+)
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """Normalize query text so trivially different phrasings share a key"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _NON_WORD.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class QueryEmbedder(Protocol):
+    """Turns normalized query text into a fixed-size vector"""
+
+    dimension: int
+
+    def embed(self, text: str) -> np.ndarray: ...
+
+
+class HashingEmbedder:
+    """Local embedder using feature hashing over word unigrams and bigrams.
+
+    Needs no network or model download, so it is the default. Good enough to
+    match reorderings and small wording changes of short generic questions.
+    """
+
+    def __init__(self, dimension: int = 512):
+        self.dimension = dimension
+
+    def _bucket(self, token: str) -> Tuple[int, float]:
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        sign = 1.0 if value & 1 else -1.0
+        return (value >> 1) % self.dimension, sign
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        words = text.split()
+        tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for token in tokens:
+            index, sign = self._bucket(token)
+            vector[index] += sign
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+class GenAIEmbedder:
+    """Embedder backed by a Gemini embedding model"""
+
+    def __init__(self, model: str, dimension: int = 768):
+        from google import genai
+
+        self.model = model
+        self.dimension = dimension
+        self._client = genai.Client()
+
+    def embed(self, text: str) -> np.ndarray:
+        from google.genai import types
+
+        response = self._client.models.embed_content(
+            model=self.model,
+            contents=text,
+            config=types.EmbedContentConfig(output_dimensionality=self.dimension),
+        )
+        vector = np.asarray(response.embeddings[0].values, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+class ResponseCacheEntry(BaseModel):
+    """A cached assistant turn and its hit statistics"""
+
+    key: str = Field(..., description="Normalized query text")
+    events: List[MessageEvent] = Field(..., description="Events of the cached turn")
+    created_at: float = Field(..., description="Monotonic creation time")
+    expires_at: float = Field(..., description="Monotonic expiry time")
+    hit_count: int = Field(default=0, description="Number of cache hits")
+    last_hit_at: Optional[float] = Field(None, description="Monotonic last hit")
+
+
+class ResponseCacheHit(BaseModel):
+    """Result of a successful cache lookup"""
+
+    entry: ResponseCacheEntry
+    similarity: float
+    exact: bool
+
+
+class ResponseCacheService:
+    """Semantic cache of assistant turns for generic, non-personal questions.
+
+    Lookups first try the normalized query text, then fall back to a cosine
+    similarity search over a flat NumPy matrix of query embeddings. Entries
+    expire after a TTL and the least recently used entry is evicted once the
+    cache is full.
+
+    Methods are thread-safe so callers can run them off the event loop; the
+    embedder (possibly a network call) runs outside the lock.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[QueryEmbedder] = None,
+        ttl_seconds: float = 6 * 60 * 60,
+        max_entries: int = 1000,
+        similarity_threshold: float = 0.92,
+    ):
+        self.embedder = embedder or HashingEmbedder()
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+
+        # key -> entry, ordered from least to most recently used
+        self._entries: "OrderedDict[str, ResponseCacheEntry]" = OrderedDict()
+        # Flat vector index; row i belongs to self._row_keys[i] (None when free)
+        self._vectors = np.zeros(
+            (max_entries, self.embedder.dimension), dtype=np.float32
+        )
+        self._row_keys: List[Optional[str]] = [None] * max_entries
+        self._occupied = np.zeros(max_entries, dtype=bool)
+        self._key_rows: Dict[str, int] = {}
+        self._free_rows: List[int] = list(range(max_entries - 1, -1, -1))
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCacheService"]:
+        """Build the cache from environment variables, or None when disabled"""
+        if os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() != "true":
+            return None
+
+        embedding_model = os.getenv("RESPONSE_CACHE_EMBEDDING_MODEL")
+        embedder = GenAIEmbedder(embedding_model) if embedding_model else None
+        return cls(
+            embedder=embedder,
+            ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "21600")),
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000")),
+            similarity_threshold=float(
+                os.getenv("RESPONSE_CACHE_SIMILARITY_THRESHOLD", "0.92")
+            ),
+        )
+
+    def is_cacheable(self, query: str, requires_personal_data: bool) -> bool:
+        """Whether a turn may be served from or stored in the cache"""
+        if requires_personal_data:
+            return False
+        return not _PERSONAL_MARKERS.search(query)
+
+    def lookup(self, query: str) -> Optional[ResponseCacheHit]:
+        """Find a cached turn for the query, exact match first"""
+        key = normalize_query(query)
+        if not key:
+            return None
+
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is not None:
+                return self._record_hit(entry, similarity=1.0, exact=True)
+            searchable = bool(self._key_rows)
+
+        vector = self.embedder.embed(key) if searchable else None
+        with self._lock:
+            if vector is not None:
+                scores = self._vectors @ vector
+                scores[~self._occupied] = -1.0
+                best_row = int(np.argmax(scores))
+                best_score = float(scores[best_row])
+                if best_score >= self.similarity_threshold:
+                    entry = self._live_entry(self._row_keys[best_row])
+                    if entry is not None:
+                        return self._record_hit(
+                            entry, similarity=best_score, exact=False
+                        )
+            self.misses += 1
+        return None
+
+    def store(self, query: str, events: List[MessageEvent]) -> None:
+        """Cache the events of a completed turn"""
+        key = normalize_query(query)
+        if not key or not events:
+            return
+
+        vector = self.embedder.embed(key)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            elif len(self._entries) >= self.max_entries:
+                self._purge_expired()
+                if len(self._entries) >= self.max_entries:
+                    oldest_key = next(iter(self._entries))
+                    self._remove(oldest_key)
+                    self.evictions += 1
+
+            now = time.monotonic()
+            self._entries[key] = ResponseCacheEntry(
+                key=key,
+                events=events,
+                created_at=now,
+                expires_at=now + self.ttl_seconds,
+            )
+            row = self._free_rows.pop()
+            self._vectors[row] = vector
+            self._row_keys[row] = key
+            self._occupied[row] = True
+            self._key_rows[key] = row
+
+    def invalidate(self, query: str) -> bool:
+        """Drop the cached turn for a query"""
+        key = normalize_query(query)
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def get_stats(self, top: int = 10) -> Dict[str, Any]:
+        """Cache counters plus the most frequently hit entries"""
+        with self._lock:
+            entries = list(self._entries.values())
+        entries.sort(key=lambda entry: entry.hit_count, reverse=True)
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "top_entries": [
+                {
+                    "key": entry.key,
+                    "hit_count": entry.hit_count,
+                    "age_seconds": time.monotonic() - entry.created_at,
+                }
+                for entry in entries[:top]
+            ],
+        }
+
+    def _record_hit(
+        self, entry: ResponseCacheEntry, similarity: float, exact: bool
+    ) -> ResponseCacheHit:
+        entry.hit_count += 1
+        entry.last_hit_at = time.monotonic()
+        self._entries.move_to_end(entry.key)
+        self.hits += 1
+        return ResponseCacheHit(entry=entry, similarity=similarity, exact=exact)
+
+    def _live_entry(self, key: str) -> Optional[ResponseCacheEntry]:
+        """Return the entry for a key, dropping it first if it has expired"""
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key: str) -> None:
+        self._entries.pop(key, None)
+        row = self._key_rows.pop(key, None)
+        if row is not None:
+            self._row_keys[row] = None
+            self._occupied[row] = False
+            self._free_rows.append(row)
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [
+            key for key, entry in self._entries.items() if entry.expires_at <= now
+        ]
+        for key in expired:
+            self._remove(key)
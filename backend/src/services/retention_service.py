@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from datetime import datetime
+from typing import IO, Optional
+
+from ..services.artifact_service import ArtifactService
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process sweeps
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionService:
+    """Periodically deletes artifacts past their retention date.
+
+    Each sweep pages through the expired artifacts with an indexed range
+    query, deleting a page of documents in one batched write and their files
+    concurrently. Pages are paced to `max_deletes_per_second`, so a large
+    backlog is worked off without starving request traffic of Firestore
+    quota; cost scales with the expired set, not the collection.
+
+    With `lock_path` set, only the process holding an exclusive file lock on
+    it sweeps, so the workers of one host don't repeat each other's work.
+    The others retry the lock every interval and take over if its holder
+    exits. Sweepers on other hosts may still overlap; deletes are
+    transactional, so that only costs reads.
+    """
+
+    def __init__(
+        self,
+        artifact_service: ArtifactService,
+        batch_size: int = 200,
+        max_deletes_per_second: float = 50.0,
+        interval_seconds: float = 3600.0,
+        lock_path: Optional[str] = None,
+    ):
+        self.artifact_service = artifact_service
+        self.batch_size = batch_size
+        self.max_deletes_per_second = max_deletes_per_second
+        self.interval_seconds = interval_seconds
+        self.lock_path = lock_path
+        self.last_sweep_at: Optional[datetime] = None
+        self.last_sweep_deleted = 0
+        self._task: Optional[asyncio.Task] = None
+        self._lock_file: Optional[IO] = None
+
+    @classmethod
+    def from_env(cls, artifact_service: ArtifactService) -> "RetentionService":
+        """Build the service from RETENTION_* environment variables"""
+        return cls(
+            artifact_service,
+            batch_size=int(os.getenv("RETENTION_BATCH_SIZE", "200")),
+            max_deletes_per_second=float(
+                os.getenv("RETENTION_MAX_DELETES_PER_SECOND", "50")
+            ),
+            interval_seconds=float(os.getenv("RETENTION_SWEEP_INTERVAL", "3600")),
+            lock_path=os.getenv("RETENTION_SWEEP_LOCK") or None,
+        )
+
+    async def sweep(self, now: Optional[datetime] = None) -> int:
+        """Delete every artifact that expired by `now`; returns the count"""
+        now = now or datetime.utcnow()
+        total = 0
+        while True:
+            started = time.monotonic()
+            deleted = await self.artifact_service.cleanup_expired_artifacts(
+                self.batch_size, now
+            )
+            total += deleted
+            if deleted < self.batch_size:
+                break
+            # Pace pages to the delete budget
+            budget = deleted / self.max_deletes_per_second
+            await asyncio.sleep(max(budget - (time.monotonic() - started), 0))
+
+        self.last_sweep_at = now
+        self.last_sweep_deleted = total
+        return total
+
+    async def run(self) -> None:
+        """Sweep every `interval_seconds` until cancelled"""
+        # Spread the first sweep so several workers don't start in lockstep
+        await asyncio.sleep(random.uniform(0, min(self.interval_seconds, 60)))
+        while True:
+            try:
+                if not self.holds_sweep_lock():
+                    await asyncio.sleep(self.interval_seconds)
+                    continue
+                deleted = await self.sweep()
+                if deleted:
+                    logger.info("Retention sweep deleted %d expired artifacts", deleted)
+            except Exception:
+                logger.exception("Error during retention sweep")
+            await asyncio.sleep(self.interval_seconds)
+
+    def holds_sweep_lock(self) -> bool:
+        """Whether this process may sweep, taking the lock if it is free"""
+        if self.lock_path is None or fcntl is None:
+            return True
+        if self._lock_file is None:
+            lock_file = open(self.lock_path, "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+        return True
+
+    def start(self) -> asyncio.Task:
+        """Start the periodic sweep in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        """Cancel the periodic sweep"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
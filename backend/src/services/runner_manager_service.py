@@ -1,24 +1,149 @@
+import asyncio
+import logging
 import os
-import traceback
+import threading
+import time
 import uuid
 from datetime import datetime
-from typing import Any, AsyncGenerator, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Dict, List, Optional
 
-from google.adk.artifacts.in_memory_artifact_service import (
-    InMemoryArtifactService,
-)
-from google.adk.runners import Runner
-
-# from google.adk.sessions import VertexAiSessionService
-from google.adk.sessions.in_memory_session_service import (
-    InMemorySessionService,
-)
-from google.genai import types
+from opentelemetry import trace
 
-from ..agents.root_agent import root_agent
 from ..models.artifact import ArtifactType
 from ..models.message import MessageEvent, UsageMetadata
+from ..observability.logs import EVENT_SAMPLE_RATE
+from ..observability.metrics import (
+    RUNNER_ACTIVE_STREAMS,
+    RUNNER_EVENTS_PER_TURN,
+    RUNNER_TIME_TO_FIRST_EVENT,
+    RUNNER_TURNS,
+    record_tokens,
+)
+from ..observability.tracing import end_detached_span, start_detached_span
 from ..services import MessageService
+from ..services.artifact_service import ArtifactService
+from ..services.rate_limit_service import RateLimitService
+from ..services.response_cache_service import ResponseCacheHit, ResponseCacheService
+from ..services.table_store import TABLE_PAGE_ROWS, normalize_table
+from ..services.usage_service import UsageService
+from ..utils.chart_compaction import compact_chart
+
+if TYPE_CHECKING:
+    from google.adk.agents import BaseAgent
+    from google.adk.runners import Runner
+
+logger = logging.getLogger(__name__)
+
+
+def load_agent_runtime() -> None:
+    """Import the ADK runtime and build the agent graph.
+
+    Takes seconds of CPU, so the app calls it in a worker thread after
+    startup rather than at import time; the first chat turn otherwise pays
+    for it.
+    """
+    from google.adk.artifacts.in_memory_artifact_service import (  # noqa: F401
+        InMemoryArtifactService,
+    )
+    from google.adk.runners import Runner  # noqa: F401
+    from google.adk.sessions.in_memory_session_service import (  # noqa: F401
+        InMemorySessionService,
+    )
+
+    from ..agents.root_agent import root_agent  # noqa: F401
+
+
+def create_session_service():
+    """ADK session store selected by ADK_SESSION_BACKEND.
+
+    - memory (default): per process; with several workers a conversation
+      only continues on the worker that started it (see sticky routing)
+    - database: ADK_SESSION_DB_URL, any SQLAlchemy URL; a SQLite file
+      shares sessions between the workers of one container, Postgres or
+      similar between containers
+    - vertex: Vertex AI Agent Engine sessions (PROJECT_ID, REGION and
+      AGENT_ENGINE_ID)
+    """
+    backend = os.getenv("ADK_SESSION_BACKEND", "memory").lower()
+    if backend == "database":
+        from google.adk.sessions import DatabaseSessionService
+
+        db_url = os.getenv("ADK_SESSION_DB_URL")
+        if not db_url:
+            raise ValueError("ADK_SESSION_DB_URL is required for database sessions")
+        return DatabaseSessionService(db_url=db_url)
+    if backend == "vertex":
+        from google.adk.sessions import VertexAiSessionService
+
+        return VertexAiSessionService(
+            project=os.getenv("PROJECT_ID"),
+            location=os.getenv("REGION"),
+            agent_engine_id=os.getenv("AGENT_ENGINE_ID"),
+        )
+    if backend != "memory":
+        raise ValueError(f"Unknown ADK_SESSION_BACKEND: {backend}")
+    from google.adk.sessions.in_memory_session_service import InMemorySessionService
+
+    return InMemorySessionService()
+
+
+def _collect_agent_models(agent: "BaseAgent") -> Dict[str, str]:
+    """Map agent names to the model they call, for usage accounting"""
+    from google.adk.agents import LlmAgent
+
+    models: Dict[str, str] = {}
+    for sub_agent in agent.sub_agents:
+        models.update(_collect_agent_models(sub_agent))
+    if isinstance(agent, LlmAgent):
+        models[agent.name] = (
+            agent.model if isinstance(agent.model, str) else agent.model.model
+        )
+    return models
+
+
+def _references_user_storage(tool_results: List[Dict[str, Any]]) -> bool:
+    """Whether tool results point at data stored for this user (tables, full
+    chart data), which a cached replay to another user could not read"""
+    for result in tool_results:
+        response = result.get("response") or {}
+        chart_data = response.get("chart_data") or {}
+        if "table_id" in response or "compaction" in chart_data:
+            return True
+    return False
+
+
+def _compact_tool_args(name: str, args: Any) -> Any:
+    """Tool call arguments as streamed and stored with the message.
+
+    The chart and table tools get the model's full payload; the message only
+    carries the compacted chart or the table's first page, and the tool's
+    response (same call id) says where the rest is.
+    """
+    if not isinstance(args, dict):
+        return args
+    table = args.get("table")
+    if name == "table_tool" and isinstance(table, dict):
+        columns, rows = normalize_table(
+            table.get("table_headers") or [], table.get("table_data")
+        )
+        if len(rows) <= TABLE_PAGE_ROWS:
+            return args
+        first_page = {
+            **table,
+            "table_headers": columns,
+            "table_data": {"rows": rows[:TABLE_PAGE_ROWS]},
+            "row_count": len(rows),
+        }
+        return {**args, "table": first_page}
+    chart = args.get("chart")
+    if (
+        name == "chart_tool"
+        and isinstance(chart, dict)
+        and isinstance(chart.get("chart_data"), dict)
+    ):
+        compacted, _ = compact_chart(chart["chart_data"], chart.get("chart_type"))
+        return {**args, "chart": {**chart, "chart_data": compacted}}
+    return args
 
 
 class RunnerManagerService:
@@ -28,34 +153,77 @@ class RunnerManagerService:
         self,
         message_service: MessageService,
         auth_client=None,
+        response_cache: Optional[ResponseCacheService] = None,
+        usage_service: Optional[UsageService] = None,
+        rate_limit_service: Optional[RateLimitService] = None,
+        artifact_service: Optional[ArtifactService] = None,
+        agent: Optional["BaseAgent"] = None,
     ):
         # Create database session service
-        print(f"agent engine id: {os.getenv('AGENT_ENGINE_ID')}")
-        print(f"project id: {os.getenv('PROJECT_ID')}")
-        print(f"region: {os.getenv('REGION')}")
+        logger.info(
+            "Runner manager for agent engine %s (project %s, region %s)",
+            os.getenv("AGENT_ENGINE_ID"),
+            os.getenv("PROJECT_ID"),
+            os.getenv("REGION"),
+        )
         self.app_name = os.getenv("AGENT_ENGINE_ID")
-        self.session_service = (
-            InMemorySessionService()
-        )  # Integrate with Vertex AI Session Service
-        self.artifact_service = InMemoryArtifactService()
         self.message_service = message_service
         self.auth_client = auth_client
+        self.response_cache = response_cache
+        self.usage_service = usage_service
+        self.rate_limit_service = rate_limit_service
+        self.backend_artifact_service = artifact_service
+
+        # The agents, ADK services and runner are built on first use
+        self._agent = agent
+        self._agent_models: Dict[str, str] = {}
+        self._session_service = None
+        self._artifact_service = None
+        self._runner: Optional["Runner"] = None
+        self._runtime_lock = threading.Lock()
+
+    def _ensure_runtime(self) -> None:
+        """Build the agents, ADK services and singleton runner once"""
+        with self._runtime_lock:
+            if self._runner is not None:
+                return
+            from google.adk.artifacts.in_memory_artifact_service import (
+                InMemoryArtifactService,
+            )
+            from google.adk.runners import Runner
 
-        # Singleton runner instance
-        self._runner: Optional[Runner] = None
-
-    @property
-    def runner(self) -> Runner:
-        """Get or create the singleton runner instance"""
-        if self._runner is None:
+            if self._agent is None:
+                from ..agents.root_agent import root_agent
 
-            # Create singleton runner
+                self._agent = root_agent
+            self._agent_models = _collect_agent_models(self._agent)
+            self._session_service = create_session_service()
+            self._artifact_service = InMemoryArtifactService()
             self._runner = Runner(
                 app_name=self.app_name,
-                agent=root_agent,
-                session_service=self.session_service,
+                agent=self._agent,
+                session_service=self._session_service,
             )
 
+    @property
+    def agent(self) -> "BaseAgent":
+        self._ensure_runtime()
+        return self._agent
+
+    @property
+    def session_service(self):
+        self._ensure_runtime()
+        return self._session_service
+
+    @property
+    def artifact_service(self):
+        self._ensure_runtime()
+        return self._artifact_service
+
+    @property
+    def runner(self) -> "Runner":
+        """Get or create the singleton runner instance"""
+        self._ensure_runtime()
         return self._runner
 
     async def process_user_message(
@@ -64,22 +232,65 @@ class RunnerManagerService:
         session_id: Optional[str],
         message_content: str,
         backend_session_id: str,
+        requires_personal_data: bool = True,
+        rate_limit_tier: Optional[str] = None,
     ):
         """Process a user message through the agent system"""
+        RUNNER_ACTIVE_STREAMS.inc()
+        # ADK invocation, agent, model and tool spans nest under this one
+        turn_span, span_token = start_detached_span(
+            "chat_turn", **{"session.id": backend_session_id}
+        )
         try:
+            cacheable = self.response_cache is not None and (
+                self.response_cache.is_cacheable(
+                    message_content, requires_personal_data
+                )
+            )
+            if cacheable:
+                # The embedder may be a network call
+                cache_hit = await asyncio.to_thread(
+                    self.response_cache.lookup, message_content
+                )
+                if cache_hit is not None:
+                    async for cached_event in self._replay_cached_response(
+                        cache_hit,
+                        user_id=user_id,
+                        session_id=session_id,
+                        message_content=message_content,
+                        backend_session_id=backend_session_id,
+                    ):
+                        yield cached_event
+                    RUNNER_TURNS.labels("cached").inc()
+                    turn_span.set_attribute("response_cache.hit", True)
+                    return
+
+            if self._runner is None:
+                # Off the event loop: the first build imports the ADK runtime
+                await asyncio.to_thread(self._ensure_runtime)
+            from google.adk.sessions.base_session_service import GetSessionConfig
+            from google.genai import types
+
+            from ..agents.response_router import FORMATTER_ROUTING_STATE_KEY
+
             # Generate session_id if None
             if session_id is None:
                 session_id = str(uuid.uuid4())
 
-            # Check if session exists
-            existing_sessions = await self.session_service.list_sessions(
-                app_name=self.app_name, user_id=user_id
+            # Check if session exists; one event is enough to tell, and
+            # keeps the session service from copying the whole history
+            existing_session = await self.session_service.get_session(
+                app_name=self.app_name,
+                user_id=user_id,
+                session_id=session_id,
+                config=GetSessionConfig(num_recent_events=1),
             )
-            print(f"Existing sessions: {existing_sessions}")
 
-            existing_session_ids = [session[0] for session in existing_sessions]
+            # Answers built on earlier turns may carry this user's details,
+            # so only a session's first turn is shared through the cache
+            first_turn = existing_session is None or not existing_session.events
 
-            if session_id not in existing_session_ids:
+            if existing_session is None:
                 # Create a new session
                 await self.session_service.create_session(
                     app_name=self.app_name,
@@ -100,7 +311,9 @@ class RunnerManagerService:
             )
 
             # Process with agent
-            print(f"Processing message for user {user_id} in session {session_id}")
+            logger.info("Processing message in session %s", backend_session_id)
+            turn_started_at = time.perf_counter()
+            previous_event_at = turn_started_at
             response = self.runner.run_async(
                 user_id=user_id,
                 session_id=session_id,
@@ -115,14 +328,20 @@ class RunnerManagerService:
             authors: List[str] = []
             has_errors = False
             error_summary: Dict[str, Any] = {}
+            formatter_routing: Optional[Dict[str, Any]] = None
 
             async for event in response:
-                print(f"Event received: {event}")
-
                 # Extract event data
                 event_id = getattr(event, "id", str(uuid.uuid4()))
                 author = getattr(event, "author", "unknown_agent")
                 timestamp = datetime.now()
+                event_received_at = time.perf_counter()
+                processing_time = event_received_at - previous_event_at
+                previous_event_at = event_received_at
+                if event_sequence == 1:
+                    RUNNER_TIME_TO_FIRST_EVENT.observe(
+                        event_received_at - turn_started_at
+                    )
 
                 # Add author to list if not already present
                 if author not in authors:
@@ -131,20 +350,32 @@ class RunnerManagerService:
                 # Extract usage metadata
                 usage_metadata = None
                 if hasattr(event, "usage_metadata") and event.usage_metadata:
+                    prompt_token_count = getattr(
+                        event.usage_metadata, "prompt_token_count", None
+                    )
+                    response_token_count = getattr(
+                        event.usage_metadata, "candidates_token_count", None
+                    )
+                    model_name = getattr(
+                        event.usage_metadata, "model_name", None
+                    ) or self._agent_models.get(author)
+                    record_tokens(model_name, prompt_token_count, response_token_count)
                     usage_metadata = UsageMetadata(
-                        prompt_token_count=getattr(
-                            event.usage_metadata, "prompt_token_count", None
-                        ),
-                        response_token_count=getattr(
-                            event.usage_metadata, "candidates_token_count", None
-                        ),
+                        prompt_token_count=prompt_token_count,
+                        response_token_count=response_token_count,
                         total_token_count=getattr(
                             event.usage_metadata, "total_token_count", None
                         ),
-                        model_name=getattr(event.usage_metadata, "model_name", None),
+                        model_name=model_name,
                         invocation_id=getattr(event, "invocation_id", None),
-                        processing_time=None,  # Will be calculated later
-                        cost_estimate=None,  # Will be calculated later
+                        processing_time=processing_time,
+                        cost_estimate=(
+                            self.usage_service.estimate_cost(
+                                model_name, prompt_token_count, response_token_count
+                            )
+                            if self.usage_service is not None
+                            else None
+                        ),
                     )
 
                 # Extract content and tool data
@@ -158,10 +389,11 @@ class RunnerManagerService:
                             event_content += part.text
 
                         if hasattr(part, "function_call") and part.function_call:
-                            print(f"Function call received: {part.function_call}")
                             tool_call = {
                                 "name": part.function_call.name,
-                                "args": part.function_call.args,
+                                "args": _compact_tool_args(
+                                    part.function_call.name, part.function_call.args
+                                ),
                                 "id": getattr(part.function_call, "id", None),
                             }
                             event_tool_calls.append(tool_call)
@@ -171,9 +403,6 @@ class RunnerManagerService:
                             hasattr(part, "function_response")
                             and part.function_response
                         ):
-                            print(
-                                f"Function response received: {part.function_response}"
-                            )
                             tool_result = {
                                 "name": part.function_response.name,
                                 "response": part.function_response.response,
@@ -182,6 +411,33 @@ class RunnerManagerService:
                             event_tool_results.append(tool_result)
                             all_tool_results.append(tool_result)
 
+                tool_call_names = [call["name"] for call in event_tool_calls]
+                logger.debug(
+                    "Agent event %d from %s",
+                    event_sequence,
+                    author,
+                    extra={
+                        "tool_calls": tool_call_names,
+                        "sample_rate": EVENT_SAMPLE_RATE,
+                    },
+                )
+                turn_span.add_event(
+                    "agent_event",
+                    {
+                        "author": author,
+                        "sequence": event_sequence,
+                        "tool_calls": tool_call_names,
+                        "tool_results": [
+                            result["name"] for result in event_tool_results
+                        ],
+                    },
+                )
+
+                # Record whether the formatter ran for this turn
+                actions = getattr(event, "actions", None)
+                if actions and FORMATTER_ROUTING_STATE_KEY in actions.state_delta:
+                    formatter_routing = actions.state_delta[FORMATTER_ROUTING_STATE_KEY]
+
                 # Check for errors
                 if hasattr(event, "error_code") and event.error_code:
                     has_errors = True
@@ -190,6 +446,13 @@ class RunnerManagerService:
                         "error_message": getattr(event, "error_message", None),
                     }
 
+                # ADK keeps these as a set, which Firestore can't store
+                long_running_tool_ids = (
+                    sorted(event.long_running_tool_ids)
+                    if getattr(event, "long_running_tool_ids", None)
+                    else None
+                )
+
                 # Create MessageEvent
                 message_event = MessageEvent(
                     event_id=event_id,
@@ -205,6 +468,7 @@ class RunnerManagerService:
                         "turn_complete": getattr(event, "turn_complete", None),
                         "partial": getattr(event, "partial", None),
                         "interrupted": getattr(event, "interrupted", None),
+                        "processing_time": processing_time,
                     },
                     usage_metadata=usage_metadata,
                     error_code=getattr(event, "error_code", None),
@@ -215,13 +479,11 @@ class RunnerManagerService:
                             event, "grounding_metadata", None
                         ),
                         "actions": getattr(event, "actions", None),
-                        "long_running_tool_ids": getattr(
-                            event, "long_running_tool_ids", None
-                        ),
+                        "long_running_tool_ids": long_running_tool_ids,
                         "branch": getattr(event, "branch", None),
                     },
                     actions=getattr(event, "actions", None),
-                    long_running_tool_ids=getattr(event, "long_running_tool_ids", None),
+                    long_running_tool_ids=long_running_tool_ids,
                     branch=getattr(event, "branch", None),
                     id=getattr(event, "id", None),
                 )
@@ -229,32 +491,162 @@ class RunnerManagerService:
                 events.append(message_event)
                 event_sequence += 1
 
+            RUNNER_EVENTS_PER_TURN.observe(len(events))
+            turn_span.set_attribute("agent.event_count", len(events))
+            RUNNER_TURNS.labels("error" if has_errors else "completed").inc()
+            total_usage_metadata = None
+            if self.usage_service is not None:
+                total_usage_metadata = self.usage_service.aggregate(
+                    events, processing_time=time.perf_counter() - turn_started_at
+                )
+
             # Save assistant message to backend
-            await self.message_service.create_assistant_message(
+            message = await self.message_service.create_assistant_message(
                 session_id=backend_session_id,
                 user_id=user_id,
                 events=events,
+                total_usage_metadata=total_usage_metadata,
                 metadata={
                     "adk_session_id": session_id,
                     "processing_complete": True,
                     "authors": authors,
                     "has_errors": has_errors,
                     "error_summary": error_summary if has_errors else None,
+                    "formatter_routing": formatter_routing,
                 },
             )
+            if self.backend_artifact_service is not None:
+                await self._register_table_artifacts(
+                    all_tool_results, backend_session_id, user_id, message.id
+                )
+            if total_usage_metadata is not None:
+                try:
+                    await self.usage_service.record_turn(
+                        user_id=user_id,
+                        session_id=backend_session_id,
+                        usage=total_usage_metadata,
+                    )
+                except Exception as e:
+                    logger.warning("Error recording usage: %s", e)
+                if self.rate_limit_service is not None:
+                    try:
+                        await self.rate_limit_service.record_tokens(
+                            user_id,
+                            total_usage_metadata.total_token_count or 0,
+                            tier=rate_limit_tier,
+                        )
+                    except Exception as e:
+                        logger.warning("Error recording rate limit usage: %s", e)
+            if (
+                cacheable
+                and first_turn
+                and not has_errors
+                and not _references_user_storage(all_tool_results)
+            ):
+                await asyncio.to_thread(
+                    self.response_cache.store, message_content, events
+                )
             yield '{"done": "true"}'
-            print("Done")
 
         except Exception as e:
-            print(f"Error processing message: {e}")
-            traceback.print_exc()
+            logger.exception("Error processing message")
+            RUNNER_TURNS.labels("failed").inc()
+            turn_span.record_exception(e)
+            turn_span.set_status(trace.StatusCode.ERROR)
 
             raise e
+        finally:
+            RUNNER_ACTIVE_STREAMS.dec()
+            end_detached_span(turn_span, span_token)
+
+    async def _replay_cached_response(
+        self,
+        cache_hit: ResponseCacheHit,
+        user_id: str,
+        session_id: Optional[str],
+        message_content: str,
+        backend_session_id: str,
+    ) -> AsyncGenerator[str, None]:
+        """Stream a cached turn without running the agents.
+
+        Only what was answered is replayed; the identifiers of the session
+        and invocation that first produced it belong to another user.
+        """
+        await self.message_service.create_user_message(
+            session_id=backend_session_id,
+            user_id=user_id,
+            human_content=message_content,
+        )
+
+        events: List[MessageEvent] = []
+        authors: List[str] = []
+        for sequence_number, cached_event in enumerate(cache_hit.entry.events, start=1):
+            event = cached_event.model_copy(
+                update={
+                    "event_id": str(uuid.uuid4()),
+                    "timestamp": datetime.now(),
+                    "sequence_number": sequence_number,
+                    "metadata": {"adk_session_id": session_id, "cache_hit": True},
+                    "usage_metadata": (
+                        cached_event.usage_metadata.model_copy(
+                            update={"invocation_id": None}
+                        )
+                        if cached_event.usage_metadata is not None
+                        else None
+                    ),
+                    "custom_metadata": None,
+                    "id": None,
+                }
+            )
+            if event.author not in authors:
+                authors.append(event.author)
+            yield event.model_dump_json()
+            events.append(event)
+
+        await self.message_service.create_assistant_message(
+            session_id=backend_session_id,
+            user_id=user_id,
+            events=events,
+            metadata={
+                "adk_session_id": session_id,
+                "processing_complete": True,
+                "authors": authors,
+                "has_errors": False,
+                "cache_hit": True,
+                "cache_key": cache_hit.entry.key,
+                "cache_similarity": cache_hit.similarity,
+            },
+        )
+        yield '{"done": "true"}'
+
+    async def _register_table_artifacts(
+        self,
+        tool_results: List[Dict[str, Any]],
+        session_id: str,
+        user_id: str,
+        message_id: str,
+    ) -> None:
+        """Create artifacts for the tables the table tool stored this turn"""
+        for result in tool_results:
+            response = result.get("response") or {}
+            if result.get("name") != "table_tool" or "table_id" not in response:
+                continue
+            try:
+                await self.backend_artifact_service.create_table_artifact(
+                    session_id=session_id,
+                    user_id=user_id,
+                    message_id=message_id,
+                    title=(response.get("table_description") or "Table")[:100],
+                    table_id=response["table_id"],
+                )
+            except Exception as e:
+                logger.warning("Error creating table artifact: %s", e)
 
     def _map_adk_artifact_type(self, adk_type: str) -> ArtifactType:
         """Map ADK artifact types to our artifact types"""
         type_mapping = {
             "chart": ArtifactType.CHART,
+            "table": ArtifactType.TABLE,
             "report": ArtifactType.REPORT,
             "analysis": ArtifactType.ANALYSIS,
             "visualization": ArtifactType.VISUALIZATION,
@@ -263,15 +655,37 @@ class RunnerManagerService:
         }
         return type_mapping.get(adk_type.lower(), ArtifactType.OTHER)
 
+    def session_stats(self) -> Dict[str, int]:
+        """Size of the in-memory ADK session store"""
+        users = sessions = events = 0
+        # Only the in-memory store lives in this process
+        if not hasattr(self._session_service, "sessions"):
+            return {"users": users, "sessions": sessions, "events": events}
+        for app_sessions in self.session_service.sessions.values():
+            for user_sessions in app_sessions.values():
+                users += 1
+                sessions += len(user_sessions)
+                events += sum(len(s.events) for s in user_sessions.values())
+        return {"users": users, "sessions": sessions, "events": events}
+
     async def health_check(self) -> Dict[str, Any]:
         """Check the health of the runner manager"""
         try:
             return {
                 "status": "healthy",
                 "runner_initialized": self._runner is not None,
-                "session_service": "InMemorySessionService",
+                "session_service": (
+                    type(self._session_service).__name__
+                    if self._session_service is not None
+                    else None
+                ),
                 "artifact_service": "InMemoryArtifactService",
                 "backend_artifact_service": "ArtifactService",
+                "response_cache": (
+                    self.response_cache.get_stats(top=0)
+                    if self.response_cache is not None
+                    else None
+                ),
             }
         except Exception as e:
             return {"status": "unhealthy", "error": str(e)}
@@ -0,0 +1,271 @@
+import asyncio
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..services.artifact_storage import ArtifactStorage
+
+# Rows per stored chunk; a page read touches one or two chunks
+TABLE_CHUNK_ROWS = 500
+
+# Rows embedded in the message; the rest is fetched page by page
+TABLE_PAGE_ROWS = 50
+MAX_TABLE_PAGE_ROWS = 500
+
+
+def normalize_table(
+    headers: Sequence[str], data: Any
+) -> Tuple[List[str], List[List[Any]]]:
+    """Turn the shapes the agent produces into column names and row lists.
+
+    Accepts `{"rows": [...]}`, a list of rows, columns as `{header: [...]}`
+    and `{label: value}` pairs; rows may be lists or dicts keyed by header.
+    """
+    columns = [str(header) for header in headers or []]
+    if isinstance(data, dict) and isinstance(data.get("rows"), list):
+        rows = data["rows"]
+    elif isinstance(data, list):
+        rows = data
+    elif (
+        isinstance(data, dict)
+        and data
+        and all(isinstance(value, list) for value in data.values())
+    ):
+        columns = columns or [str(key) for key in data]
+        values = [data.get(column, []) for column in columns]
+        rows = [list(row) for row in zip(*values)]
+    elif isinstance(data, dict):
+        rows = [[key, value] for key, value in data.items()]
+    else:
+        rows = []
+
+    if not columns:
+        first = rows[0] if rows else []
+        columns = (
+            [str(key) for key in first]
+            if isinstance(first, dict)
+            else [f"column_{i + 1}" for i in range(len(first))]
+        )
+    normalized = []
+    for row in rows:
+        if isinstance(row, dict):
+            row = [row.get(column) for column in columns]
+        elif not isinstance(row, (list, tuple)):
+            row = [row]
+        row = list(row)[: len(columns)]
+        normalized.append(row + [None] * (len(columns) - len(row)))
+    return columns, normalized
+
+
+def _column_type(values: Sequence[Any]) -> str:
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, bool) for value in present):
+        return "boolean"
+    if present and all(
+        isinstance(value, (int, float)) and not isinstance(value, bool)
+        for value in present
+    ):
+        return "number"
+    return "string"
+
+
+def encode_cursor(offset: int, sort: Optional[str], descending: bool) -> str:
+    """Opaque cursor for the next page of a (sorted) table"""
+    state = json.dumps({"o": offset, "s": sort, "d": descending})
+    return base64.urlsafe_b64encode(state.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, Optional[str], bool]:
+    """Offset, sort column and direction of a cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded))
+        return max(int(state["o"]), 0), state.get("s"), bool(state.get("d"))
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class TableStore:
+    """Large tables stored once as row chunks, read back a page at a time.
+
+    A table is a schema blob plus JSON chunks of TABLE_CHUNK_ROWS row arrays
+    under tables/{user_id}/{table_id}/. Unsorted pages read only the chunks
+    they cover; a sorted view reads the sort column once and keeps the row
+    order in a small LRU, so later pages are chunk reads too.
+    """
+
+    def __init__(self, storage: ArtifactStorage, max_cached_orders: int = 32):
+        self.storage = storage
+        self.max_cached_orders = max_cached_orders
+        self._orders: "OrderedDict[Tuple[str, str, str, bool], np.ndarray]" = (
+            OrderedDict()
+        )
+
+    @staticmethod
+    def _prefix(user_id: str, table_id: str) -> str:
+        if not table_id or not table_id.replace("-", "").isalnum():
+            raise ValueError(f"Invalid table id: {table_id}")
+        return f"tables/{user_id}/{table_id}"
+
+    @staticmethod
+    def _dumps(value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":"), default=str).encode()
+
+    async def save(
+        self,
+        user_id: str,
+        table_id: str,
+        columns: List[str],
+        rows: List[List[Any]],
+        chunk_rows: int = TABLE_CHUNK_ROWS,
+    ) -> Dict[str, Any]:
+        """Store a table's rows in chunks and return its schema"""
+        prefix = self._prefix(user_id, table_id)
+        chunk_count = (len(rows) + chunk_rows - 1) // chunk_rows
+        schema = {
+            "columns": [
+                {"name": name, "type": _column_type([row[i] for row in rows])}
+                for i, name in enumerate(columns)
+            ],
+            "row_count": len(rows),
+            "chunk_rows": chunk_rows,
+            "chunk_count": chunk_count,
+        }
+        await asyncio.gather(
+            *(
+                self.storage.write_bytes(
+                    f"{prefix}/rows-{index:05d}.json",
+                    self._dumps(rows[index * chunk_rows : (index + 1) * chunk_rows]),
+                    "application/json",
+                )
+                for index in range(chunk_count)
+            )
+        )
+        # Written last: a table is readable once its schema exists
+        await self.storage.write_bytes(
+            f"{prefix}/schema.json", self._dumps(schema), "application/json"
+        )
+        return schema
+
+    async def get_schema(self, user_id: str, table_id: str) -> Dict[str, Any]:
+        key = f"{self._prefix(user_id, table_id)}/schema.json"
+        if not await self.storage.exists(key):
+            raise ValueError(f"Table {table_id} not found")
+        return json.loads(await self.storage.read_bytes(key))
+
+    async def _read_chunks(
+        self, user_id: str, table_id: str, indexes: Sequence[int]
+    ) -> Dict[int, List[List[Any]]]:
+        prefix = self._prefix(user_id, table_id)
+        chunks = await asyncio.gather(
+            *(
+                self.storage.read_bytes(f"{prefix}/rows-{index:05d}.json")
+                for index in indexes
+            )
+        )
+        return {index: json.loads(chunk) for index, chunk in zip(indexes, chunks)}
+
+    async def _row_order(
+        self, user_id: str, table_id: str, schema: Dict[str, Any], sort: str, desc: bool
+    ) -> np.ndarray:
+        names = [column["name"] for column in schema["columns"]]
+        if sort not in names:
+            raise ValueError(f"Unknown sort column: {sort}")
+        cache_key = (user_id, table_id, sort, desc)
+        order = self._orders.get(cache_key)
+        if order is not None:
+            self._orders.move_to_end(cache_key)
+            return order
+
+        position = names.index(sort)
+        chunks = await self._read_chunks(
+            user_id, table_id, range(schema["chunk_count"])
+        )
+        values = [row[position] for index in sorted(chunks) for row in chunks[index]]
+        column_type = schema["columns"][position]["type"]
+        if column_type in ("number", "boolean"):
+            keys = np.array(
+                [np.nan if value is None else float(value) for value in values]
+            )
+            # Missing values sort last in both directions
+            order = np.argsort(-keys if desc else keys, kind="stable")
+        else:
+            present = [i for i, value in enumerate(values) if value is not None]
+            missing = [i for i, value in enumerate(values) if value is None]
+            present.sort(key=lambda i: str(values[i]).lower(), reverse=desc)
+            order = np.array(present + missing, dtype=np.int64)
+
+        self._orders[cache_key] = order
+        while len(self._orders) > self.max_cached_orders:
+            self._orders.popitem(last=False)
+        return order
+
+    async def get_page(
+        self,
+        user_id: str,
+        table_id: str,
+        offset: int = 0,
+        limit: int = TABLE_PAGE_ROWS,
+        sort: Optional[str] = None,
+        descending: bool = False,
+        columns: Optional[Sequence[str]] = None,
+        schema: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """One page of rows, optionally sorted and limited to some columns"""
+        schema = schema or await self.get_schema(user_id, table_id)
+        names = [column["name"] for column in schema["columns"]]
+        selected = list(columns) if columns else names
+        unknown = [name for name in selected if name not in names]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        positions = [names.index(name) for name in selected]
+
+        limit = min(max(limit, 1), MAX_TABLE_PAGE_ROWS)
+        end = min(offset + limit, schema["row_count"])
+        if sort:
+            order = await self._row_order(user_id, table_id, schema, sort, descending)
+            row_indexes = order[offset:end].tolist()
+        else:
+            row_indexes = list(range(offset, end))
+
+        chunk_rows = schema["chunk_rows"]
+        chunks = await self._read_chunks(
+            user_id, table_id, sorted({index // chunk_rows for index in row_indexes})
+        )
+        rows = []
+        for index in row_indexes:
+            row = chunks[index // chunk_rows][index % chunk_rows]
+            rows.append([row[position] for position in positions])
+
+        return {
+            "columns": selected,
+            "rows": rows,
+            "offset": offset,
+            "total_rows": schema["row_count"],
+            "next_cursor": (
+                encode_cursor(end, sort, descending)
+                if end < schema["row_count"]
+                else None
+            ),
+        }
+
+    async def delete(self, user_id: str, table_id: str) -> None:
+        """Delete a table's schema and row chunks"""
+        prefix = self._prefix(user_id, table_id)
+        try:
+            schema = await self.get_schema(user_id, table_id)
+        except ValueError:
+            return
+        await self.storage.delete(f"{prefix}/schema.json")
+        await asyncio.gather(
+            *(
+                self.storage.delete(f"{prefix}/rows-{index:05d}.json")
+                for index in range(schema["chunk_count"])
+            )
+        )
+        for key in [key for key in self._orders if key[:2] == (user_id, table_id)]:
+            self._orders.pop(key, None)
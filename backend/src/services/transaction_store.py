@@ -0,0 +1,468 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within a process
+    fcntl = None
+
+# Dimensions summaries can be grouped by
+GROUP_BY_DIMENSIONS = ("category", "month", "quarter", "year", "description")
+
+_PERIOD_UNITS = {"month": "M", "year": "Y"}
+
+# Times a read retries when a writer replaced the version it was opening
+_LOAD_ATTEMPTS = 3
+
+
+@dataclass
+class TransactionColumns:
+    """One user's transactions as memory-mapped columns"""
+
+    version: str
+    date: np.ndarray  # datetime64[D]
+    amount: np.ndarray  # float64, money out is negative
+    category: np.ndarray  # int16 codes into `categories`
+    description: np.ndarray  # int32 codes into `descriptions`
+    source: np.ndarray  # int32 codes into `sources` (artifact ids)
+    duplicate: np.ndarray  # bool, row repeated from an overlapping statement
+    categories: List[str]
+    descriptions: List[str]
+    sources: List[str]
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+
+class TransactionStore:
+    """Per-user columnar store of parsed statement transactions.
+
+    Each user has one directory per version holding a .npy file per column,
+    plus a manifest with the dictionaries for the encoded string columns.
+    Writers build a new version and swap the manifest atomically; readers
+    memory-map the current version, so queries only page in the columns
+    they touch. Everything can be rebuilt from the ingestion results.
+
+    Writers hold a per-user file lock, so workers of one host sharing the
+    root don't lose each other's updates. Replaced versions are deleted by
+    later writes once older than `version_grace_seconds`, and a reader that
+    still finds its version gone re-reads the manifest.
+    """
+
+    COLUMNS = ("date", "amount", "category", "description", "source", "duplicate")
+
+    def __init__(
+        self,
+        root: str = "data/transactions",
+        max_open_users: int = 256,
+        version_grace_seconds: float = 300.0,
+    ):
+        self.root = root
+        self.max_open_users = max_open_users
+        self.version_grace_seconds = version_grace_seconds
+        self._open: "OrderedDict[str, TransactionColumns]" = OrderedDict()
+        self._open_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _user_dir(self, user_id: str) -> str:
+        if not user_id or "/" in user_id or user_id in (".", ".."):
+            raise ValueError(f"Invalid user id: {user_id}")
+        return os.path.join(self.root, user_id)
+
+    def _read_manifest(self, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self._user_dir(user_id), "manifest.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def _user_write_lock(self, user_id: str) -> Iterator[None]:
+        """Serialize read-modify-write of a user's columns across threads and
+        processes"""
+        user_dir = self._user_dir(user_id)
+        os.makedirs(user_dir, exist_ok=True)
+        with self._write_lock, open(os.path.join(user_dir, ".lock"), "a") as f:
+            # Released when the file is closed
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def load(self, user_id: str) -> Optional[TransactionColumns]:
+        """Memory-map a user's current columns, or None if they have none"""
+        for attempt in range(_LOAD_ATTEMPTS):
+            manifest = self._read_manifest(user_id)
+            if manifest is None:
+                return None
+            try:
+                return self._load_version(user_id, manifest)
+            except FileNotFoundError:
+                # Replaced and collected since the manifest was read
+                if attempt == _LOAD_ATTEMPTS - 1:
+                    raise
+
+    def _load_version(
+        self, user_id: str, manifest: Dict[str, Any]
+    ) -> TransactionColumns:
+        with self._open_lock:
+            columns = self._open.get(user_id)
+            if columns is not None and columns.version == manifest["version"]:
+                self._open.move_to_end(user_id)
+                return columns
+
+        version_dir = os.path.join(self._user_dir(user_id), manifest["version"])
+        arrays = {
+            name: np.load(os.path.join(version_dir, f"{name}.npy"), mmap_mode="r")
+            for name in self.COLUMNS
+        }
+        columns = TransactionColumns(
+            version=manifest["version"],
+            categories=manifest["categories"],
+            descriptions=manifest["descriptions"],
+            sources=manifest["sources"],
+            **arrays,
+        )
+        with self._open_lock:
+            self._open[user_id] = columns
+            self._open.move_to_end(user_id)
+            while len(self._open) > self.max_open_users:
+                self._open.popitem(last=False)
+        return columns
+
+    def replace_source(
+        self,
+        user_id: str,
+        source_id: str,
+        transactions: Optional[Dict[str, List[Any]]],
+    ) -> int:
+        """Replace the rows that came from one artifact and return the row count.
+
+        Pass None to drop the artifact's rows. Rows already present from
+        another artifact (overlapping statements) are not counted twice.
+        """
+        with self._user_write_lock(user_id):
+            current = self.load(user_id)
+            dates: List[np.ndarray] = []
+            amounts: List[np.ndarray] = []
+            categories: List[str] = []
+            descriptions: List[str] = []
+            sources: List[str] = []
+
+            if current is not None:
+                keep = np.ones(len(current), dtype=bool)
+                if source_id in current.sources:
+                    keep &= current.source != current.sources.index(source_id)
+                dates.append(np.asarray(current.date[keep]))
+                amounts.append(np.asarray(current.amount[keep]))
+                categories += [current.categories[c] for c in current.category[keep]]
+                descriptions += [
+                    current.descriptions[d] for d in current.description[keep]
+                ]
+                sources += [current.sources[s] for s in current.source[keep]]
+
+            if transactions and transactions["amount"]:
+                dates.append(np.array(transactions["date"], dtype="datetime64[D]"))
+                amounts.append(np.array(transactions["amount"], dtype=np.float64))
+                categories += transactions["category"]
+                descriptions += transactions["description"]
+                sources += [source_id] * len(transactions["amount"])
+
+            all_dates = (
+                np.concatenate(dates) if dates else np.array([], dtype="datetime64[D]")
+            )
+            all_amounts = np.concatenate(amounts) if amounts else np.array([])
+            duplicate = self._find_duplicates(
+                all_dates, all_amounts, descriptions, sources
+            )
+            self._write_version(
+                user_id,
+                all_dates,
+                all_amounts,
+                categories,
+                descriptions,
+                sources,
+                duplicate,
+            )
+            return int((~duplicate).sum())
+
+    @staticmethod
+    def _find_duplicates(
+        dates: np.ndarray,
+        amounts: np.ndarray,
+        descriptions: Sequence[str],
+        sources: Sequence[str],
+    ) -> np.ndarray:
+        """Flag rows another statement already covers.
+
+        Overlapping statements repeat the same (date, amount, description)
+        rows. For each such key only the rows of the statement with the most
+        copies count; repeats within one statement are real transactions.
+        All rows are kept, so dropping a statement un-hides the others.
+        """
+        keys = list(zip(dates.astype(str).tolist(), amounts.tolist(), descriptions))
+        counts: Dict[Any, Dict[str, int]] = {}
+        for key, source in zip(keys, sources):
+            per_source = counts.setdefault(key, {})
+            per_source[source] = per_source.get(source, 0) + 1
+        owners = {
+            key: max(sorted(per_source), key=per_source.get)
+            for key, per_source in counts.items()
+        }
+        return np.array(
+            [owners[key] != source for key, source in zip(keys, sources)], dtype=bool
+        )
+
+    def _write_version(
+        self,
+        user_id: str,
+        dates: np.ndarray,
+        amounts: np.ndarray,
+        categories: Sequence[str],
+        descriptions: Sequence[str],
+        sources: Sequence[str],
+        duplicate: np.ndarray,
+    ) -> None:
+        user_dir = self._user_dir(user_id)
+        version = uuid.uuid4().hex
+        version_dir = os.path.join(user_dir, version)
+        os.makedirs(version_dir)
+
+        order = np.argsort(dates, kind="stable")
+        encoded = {}
+        dictionaries = {}
+        for name, values, dtype in (
+            ("category", categories, np.int16),
+            ("description", descriptions, np.int32),
+            ("source", sources, np.int32),
+        ):
+            uniques, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+            encoded[name] = codes.astype(dtype)[order]
+            dictionaries[name] = uniques.tolist()
+
+        np.save(os.path.join(version_dir, "date.npy"), dates[order])
+        np.save(os.path.join(version_dir, "amount.npy"), amounts[order])
+        np.save(os.path.join(version_dir, "duplicate.npy"), duplicate[order])
+        for name, codes in encoded.items():
+            np.save(os.path.join(version_dir, f"{name}.npy"), codes)
+
+        manifest = {
+            "version": version,
+            "row_count": len(amounts),
+            "categories": dictionaries["category"],
+            "descriptions": dictionaries["description"],
+            "sources": dictionaries["source"],
+        }
+        tmp_path = os.path.join(user_dir, f"manifest.{version}.json")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        previous = self._read_manifest(user_id)
+        os.replace(tmp_path, os.path.join(user_dir, "manifest.json"))
+        if previous is not None:
+            # Its modification time now says when it was replaced
+            try:
+                os.utime(os.path.join(user_dir, previous["version"]))
+            except FileNotFoundError:
+                pass
+        self._collect_versions(user_dir, version)
+
+    def _collect_versions(self, user_dir: str, current: str) -> None:
+        """Delete versions replaced more than version_grace_seconds ago.
+
+        Readers that read an older manifest can still open their version in
+        the meantime; open memory maps stay readable after deletion anyway.
+        """
+        cutoff = time.time() - self.version_grace_seconds
+        for entry in os.scandir(user_dir):
+            if entry.name == current or not entry.is_dir():
+                continue
+            try:
+                replaced_at = entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if replaced_at <= cutoff:
+                shutil.rmtree(entry.path, True)
+
+    def _mask(
+        self,
+        columns: TransactionColumns,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        categories: Optional[Sequence[str]],
+        direction: Optional[str],
+        search: Optional[str],
+    ) -> np.ndarray:
+        mask = ~columns.duplicate
+        if start_date:
+            mask &= columns.date >= np.datetime64(start_date, "D")
+        if end_date:
+            mask &= columns.date <= np.datetime64(end_date, "D")
+        if categories:
+            wanted = [i for i, c in enumerate(columns.categories) if c in categories]
+            mask &= np.isin(columns.category, wanted)
+        if direction == "out":
+            mask &= columns.amount < 0
+        elif direction == "in":
+            mask &= columns.amount > 0
+        if search:
+            # Match against the dictionary, then filter rows by code
+            needle = search.lower()
+            wanted = [
+                i for i, d in enumerate(columns.descriptions) if needle in d.lower()
+            ]
+            mask &= np.isin(columns.description, wanted)
+        return mask
+
+    @staticmethod
+    def _group_keys(
+        columns: TransactionColumns, dimension: str, mask: np.ndarray
+    ) -> np.ndarray:
+        if dimension == "category":
+            return np.array(columns.categories, dtype=object)[columns.category[mask]]
+        if dimension == "description":
+            return np.array(columns.descriptions, dtype=object)[
+                columns.description[mask]
+            ]
+        dates = columns.date[mask]
+        if dimension == "quarter":
+            months = dates.astype("datetime64[M]").astype(np.int64)
+            years, quarters = 1970 + months // 12, months % 12 // 3 + 1
+            return np.char.add(
+                np.char.add(years.astype(str), "-Q"), quarters.astype(str)
+            )
+        return dates.astype(f"datetime64[{_PERIOD_UNITS[dimension]}]").astype(str)
+
+    def summarize(
+        self,
+        user_id: str,
+        group_by: Sequence[str] = ("category",),
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        categories: Optional[Sequence[str]] = None,
+        direction: Optional[str] = None,
+        search: Optional[str] = None,
+        top: int = 10,
+    ) -> Dict[str, Any]:
+        """Filter, then total and count transactions per group.
+
+        With two group_by dimensions the result is a rollup: each first-level
+        group carries its total plus its top second-level groups.
+        """
+        for dimension in group_by:
+            if dimension not in GROUP_BY_DIMENSIONS:
+                raise ValueError(f"Unknown group_by dimension: {dimension}")
+        columns = self.load(user_id)
+        if columns is None:
+            return {"total": 0.0, "count": 0, "groups": []}
+
+        mask = self._mask(columns, start_date, end_date, categories, direction, search)
+        amounts = np.asarray(columns.amount[mask])
+        result: Dict[str, Any] = {
+            "total": round(float(amounts.sum()), 2),
+            "count": int(amounts.size),
+        }
+        if not group_by or not amounts.size:
+            result["groups"] = []
+            return result
+
+        first = self._group_keys(columns, group_by[0], mask)
+        second = (
+            self._group_keys(columns, group_by[1], mask) if len(group_by) > 1 else None
+        )
+        result["groups"] = self._aggregate(amounts, first, second, group_by, top)
+        return result
+
+    @staticmethod
+    def _aggregate(
+        amounts: np.ndarray,
+        keys: np.ndarray,
+        sub_keys: Optional[np.ndarray],
+        group_by: Sequence[str],
+        top: int,
+    ) -> List[Dict[str, Any]]:
+        uniques, inverse = np.unique(keys.astype(str), return_inverse=True)
+        totals = np.bincount(inverse, weights=amounts, minlength=len(uniques))
+        counts = np.bincount(inverse, minlength=len(uniques))
+
+        # Periods read best as the latest ones in time order, others by size
+        if group_by[0] in ("month", "quarter", "year"):
+            selected_groups = np.arange(len(uniques))[-top:]
+        else:
+            selected_groups = np.argsort(-np.abs(totals), kind="stable")[:top]
+
+        groups = []
+        for index in selected_groups:
+            group = {
+                "key": str(uniques[index]),
+                "total": round(float(totals[index]), 2),
+                "count": int(counts[index]),
+            }
+            if sub_keys is not None:
+                selected = inverse == index
+                group["groups"] = TransactionStore._aggregate(
+                    amounts[selected], sub_keys[selected], None, group_by[1:], top
+                )
+            groups.append(group)
+        return groups
+
+    def find_transactions(
+        self,
+        user_id: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        categories: Optional[Sequence[str]] = None,
+        direction: Optional[str] = None,
+        search: Optional[str] = None,
+        sort: str = "largest",
+        limit: int = 10,
+    ) -> List[Dict[str, Any]]:
+        """Individual transactions matching the filters, largest or latest first"""
+        columns = self.load(user_id)
+        if columns is None:
+            return []
+        indexes = np.flatnonzero(
+            self._mask(columns, start_date, end_date, categories, direction, search)
+        )
+        if sort == "largest":
+            keys = -np.abs(columns.amount[indexes])
+        else:
+            keys = -columns.date[indexes].astype(np.int64)
+        indexes = indexes[np.argsort(keys, kind="stable")[:limit]]
+        return [
+            {
+                "date": str(columns.date[i]),
+                "description": columns.descriptions[columns.description[i]],
+                "amount": round(float(columns.amount[i]), 2),
+                "category": columns.categories[columns.category[i]],
+            }
+            for i in indexes
+        ]
+
+    def get_overview(self, user_id: str) -> Dict[str, Any]:
+        """What data a user has: row count, date range and categories"""
+        columns = self.load(user_id)
+        if columns is None or not len(columns):
+            return {"row_count": 0}
+        return {
+            "row_count": int((~columns.duplicate).sum()),
+            "date_from": str(columns.date[0]),
+            "date_to": str(columns.date[-1]),
+            "categories": columns.categories,
+            "statements": len(columns.sources),
+        }
+
+
+@cache
+def get_transaction_store() -> TransactionStore:
+    """Shared TransactionStore rooted at TRANSACTION_STORE_PATH"""
+    return TransactionStore(os.getenv("TRANSACTION_STORE_PATH", "data/transactions"))
@@ -0,0 +1,113 @@
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from ..models.message import MessageEvent, UsageMetadata
+from ..models.usage import UsageCounter
+from ..repositories.usage_repository import UsageRepository
+
+# USD per million tokens, as (prompt, response). Override or extend with the
+# MODEL_PRICING environment variable, e.g.
+# MODEL_PRICING='{"gemini-2.0-flash": {"prompt": 0.1, "response": 0.4}}'
+DEFAULT_MODEL_PRICING: Dict[str, Dict[str, float]] = {
+    "gemini-2.0-flash": {"prompt": 0.10, "response": 0.40},
+    "gemini-2.0-flash-lite": {"prompt": 0.075, "response": 0.30},
+    "gemini-2.5-flash": {"prompt": 0.30, "response": 2.50},
+    "gemini-2.5-flash-lite": {"prompt": 0.10, "response": 0.40},
+    "gemini-2.5-pro": {"prompt": 1.25, "response": 10.00},
+}
+
+
+def load_model_pricing() -> Dict[str, Dict[str, float]]:
+    """Default price table merged with the MODEL_PRICING override"""
+    pricing = dict(DEFAULT_MODEL_PRICING)
+    override = os.getenv("MODEL_PRICING")
+    if override:
+        pricing.update(json.loads(override))
+    return pricing
+
+
+class UsageService:
+    """Token, cost and latency accounting for assistant turns"""
+
+    def __init__(
+        self,
+        usage_repository: UsageRepository,
+        pricing: Optional[Dict[str, Dict[str, float]]] = None,
+    ):
+        self.repository = usage_repository
+        self.pricing = pricing if pricing is not None else load_model_pricing()
+
+    def estimate_cost(
+        self,
+        model_name: Optional[str],
+        prompt_token_count: Optional[int],
+        response_token_count: Optional[int],
+    ) -> Optional[float]:
+        """Estimated cost in USD, or None for models without a price"""
+        price = self.pricing.get(model_name or "")
+        if price is None:
+            return None
+        return (
+            (prompt_token_count or 0) * price.get("prompt", 0.0)
+            + (response_token_count or 0) * price.get("response", 0.0)
+        ) / 1_000_000
+
+    def aggregate(
+        self, events: List[MessageEvent], processing_time: float
+    ) -> UsageMetadata:
+        """Sum the usage of a turn's events into one UsageMetadata"""
+        prompt_tokens = response_tokens = total_tokens = 0
+        cost = 0.0
+        models: List[str] = []
+        for event in events:
+            usage = event.usage_metadata
+            if usage is None:
+                continue
+            prompt_tokens += usage.prompt_token_count or 0
+            response_tokens += usage.response_token_count or 0
+            total_tokens += usage.total_token_count or 0
+            cost += usage.cost_estimate or 0.0
+            if usage.model_name and usage.model_name not in models:
+                models.append(usage.model_name)
+
+        return UsageMetadata(
+            prompt_token_count=prompt_tokens,
+            response_token_count=response_tokens,
+            total_token_count=total_tokens,
+            model_name=",".join(models) or None,
+            processing_time=processing_time,
+            cost_estimate=cost,
+        )
+
+    async def record_turn(
+        self, user_id: str, session_id: str, usage: UsageMetadata
+    ) -> None:
+        """Roll a turn's usage into the session and user-day counters"""
+        await self.repository.increment_turn_usage(
+            user_id=user_id,
+            session_id=session_id,
+            day=self.today(),
+            usage=usage,
+        )
+
+    async def get_session_usage(self, session_id: str) -> Optional[UsageCounter]:
+        """Get the running usage totals of a session"""
+        return await self.repository.get_session_usage(session_id)
+
+    async def get_user_day_usage(
+        self, user_id: str, day: Optional[str] = None
+    ) -> Optional[UsageCounter]:
+        """Get a user's usage totals for a UTC day (today by default)"""
+        return await self.repository.get_user_day_usage(user_id, day or self.today())
+
+    async def get_most_expensive_sessions(
+        self, user_id: str, limit: int = 10
+    ) -> List[UsageCounter]:
+        """Get a user's sessions ordered by estimated cost"""
+        return await self.repository.get_most_expensive_sessions(user_id, limit)
+
+    @staticmethod
+    def today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
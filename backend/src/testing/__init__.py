@@ -0,0 +1,20 @@
+# In-memory stand-ins for Firebase and the model, for offline runs
+from .auth import FakeAuth
+from .firestore import InMemoryFirestore
+from .llm import (
+    Distribution,
+    FakeFunctionCall,
+    FakeLlm,
+    FakeResponse,
+    FakeRule,
+)
+
+__all__ = [
+    "FakeAuth",
+    "InMemoryFirestore",
+    "Distribution",
+    "FakeFunctionCall",
+    "FakeLlm",
+    "FakeResponse",
+    "FakeRule",
+]
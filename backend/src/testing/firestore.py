@@ -0,0 +1,455 @@
+import functools
+import threading
+import uuid
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from google.api_core.exceptions import AlreadyExists, NotFound
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.base_query import BaseQuery
+
+_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "in": lambda a, b: a in b,
+    "not-in": lambda a, b: a not in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+    "array_contains_any": lambda a, b: isinstance(a, list) and any(v in a for v in b),
+}
+
+_MISSING = object()
+
+
+def _encode(value: Any) -> Any:
+    """Copy a value the way Firestore would store it.
+
+    Enums become their values, naive datetimes are read back as UTC, and
+    types the real client can't serialize raise TypeError here too.
+    """
+    if isinstance(value, Enum):
+        value = value.value
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return value
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+    if isinstance(value, dict):
+        return {str(key): _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    raise TypeError(f"Cannot convert to a Firestore Value: {value!r}")
+
+
+def _copy(value: Any) -> Any:
+    """Copy stored data so readers can't mutate the store"""
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+def _get_field(data: Dict[str, Any], field_path: str) -> Any:
+    value: Any = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _apply_field(data: Dict[str, Any], path: List[str], value: Any) -> None:
+    """Set one field, resolving transforms against the current value"""
+    for part in path[:-1]:
+        child = data.get(part)
+        if not isinstance(child, dict):
+            child = data[part] = {}
+        data = child
+    field = path[-1]
+    if value is transforms.DELETE_FIELD:
+        data.pop(field, None)
+    elif value is transforms.SERVER_TIMESTAMP:
+        data[field] = datetime.now(timezone.utc)
+    elif isinstance(value, transforms.Increment):
+        current = data.get(field)
+        base = current if isinstance(current, (int, float)) else 0
+        data[field] = base + value.value
+    elif isinstance(value, transforms.ArrayUnion):
+        current = list(data.get(field) or [])
+        current += [_encode(v) for v in value.values if _encode(v) not in current]
+        data[field] = current
+    elif isinstance(value, transforms.ArrayRemove):
+        removed = [_encode(v) for v in value.values]
+        data[field] = [v for v in data.get(field) or [] if v not in removed]
+    else:
+        data[field] = _encode(value)
+
+
+def _merge(data: Dict[str, Any], updates: Dict[str, Any], path: List[str]) -> None:
+    for key, value in updates.items():
+        if isinstance(value, dict) and value:
+            _merge(data, value, path + [key])
+        else:
+            _apply_field(data, path + [key], value)
+
+
+def _compare(a: Any, b: Any) -> int:
+    try:
+        return (a > b) - (a < b)
+    except TypeError:
+        return (type(a).__name__ > type(b).__name__) - (
+            type(a).__name__ < type(b).__name__
+        )
+
+
+class InMemoryDocumentSnapshot:
+    """Read result for one document, like DocumentSnapshot"""
+
+    def __init__(
+        self,
+        reference: "InMemoryDocumentReference",
+        data: Optional[Dict[str, Any]],
+    ):
+        self.reference = reference
+        self._data = data
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return _copy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        value = _get_field(self._data or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return _copy(value)
+
+
+class InMemoryDocumentReference:
+    """A document path in an InMemoryFirestore"""
+
+    def __init__(self, client: "InMemoryFirestore", collection_path: str, id: str):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection_path}/{self.id}"
+
+    @property
+    def parent(self) -> "InMemoryCollectionReference":
+        return InMemoryCollectionReference(self._client, self._collection_path)
+
+    def collection(self, name: str) -> "InMemoryCollectionReference":
+        return InMemoryCollectionReference(self._client, f"{self.path}/{name}")
+
+    def get(self, field_paths=None, transaction=None) -> InMemoryDocumentSnapshot:
+        with self._client._lock:
+            return InMemoryDocumentSnapshot(self, self._client._read(self))
+
+    def create(self, document_data: Dict[str, Any]) -> None:
+        self._client._commit([("create", self, document_data, False)])
+
+    def set(self, document_data: Dict[str, Any], merge: bool = False) -> None:
+        self._client._commit([("set", self, document_data, merge)])
+
+    def update(self, field_updates: Dict[str, Any]) -> None:
+        self._client._commit([("update", self, field_updates, False)])
+
+    def delete(self) -> None:
+        self._client._commit([("delete", self, None, False)])
+
+
+class InMemoryQuery:
+    """Filters, ordering, cursors and limits evaluated over stored documents"""
+
+    ASCENDING = BaseQuery.ASCENDING
+    DESCENDING = BaseQuery.DESCENDING
+
+    def __init__(
+        self,
+        client: "InMemoryFirestore",
+        collection_path: str,
+        filters: Tuple[Tuple[str, str, Any], ...] = (),
+        orders: Tuple[Tuple[str, str], ...] = (),
+        limit: Optional[int] = None,
+        cursor: Optional[InMemoryDocumentSnapshot] = None,
+    ):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit
+        self._cursor = cursor
+
+    def _copy_with(self, **changes) -> "InMemoryQuery":
+        state = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit": self._limit,
+            "cursor": self._cursor,
+            **changes,
+        }
+        return InMemoryQuery(self._client, self._collection_path, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None:
+            field_path, op_string, value = (
+                filter.field_path,
+                filter.op_string,
+                filter.value,
+            )
+        if op_string not in _OPERATORS:
+            raise ValueError(f"Unsupported operator {op_string!r}")
+        return self._copy_with(
+            filters=self._filters + ((field_path, op_string, _encode(value)),)
+        )
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "InMemoryQuery":
+        return self._copy_with(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> "InMemoryQuery":
+        return self._copy_with(limit=count)
+
+    def start_after(self, document: InMemoryDocumentSnapshot) -> "InMemoryQuery":
+        return self._copy_with(cursor=document)
+
+    def _order_cmp(self, left, right) -> int:
+        for field_path, direction in self._orders:
+            result = _compare(
+                _get_field(left[1], field_path), _get_field(right[1], field_path)
+            )
+            if result:
+                return -result if direction == self.DESCENDING else result
+        return _compare(left[0], right[0])
+
+    def _matches(self, data: Dict[str, Any]) -> bool:
+        for field_path, op_string, value in self._filters:
+            field = _get_field(data, field_path)
+            if field is _MISSING:
+                return False
+            try:
+                if not _OPERATORS[op_string](field, value):
+                    return False
+            except TypeError:
+                return False
+        # Like Firestore, ordering on a field excludes documents without it
+        return all(_get_field(data, f) is not _MISSING for f, _ in self._orders)
+
+    def stream(self, transaction=None) -> Iterator[InMemoryDocumentSnapshot]:
+        with self._client._lock:
+            documents = self._client._collection(self._collection_path)
+            matches = [
+                (doc_id, data)
+                for doc_id, data in documents.items()
+                if self._matches(data)
+            ]
+        key = functools.cmp_to_key(self._order_cmp)
+        matches.sort(key=key)
+        if self._cursor is not None:
+            cursor = key((self._cursor.id, self._cursor._data or {}))
+            matches = [match for match in matches if key(match) > cursor]
+        if self._limit is not None:
+            matches = matches[: self._limit]
+        for doc_id, data in matches:
+            reference = InMemoryDocumentReference(
+                self._client, self._collection_path, doc_id
+            )
+            yield InMemoryDocumentSnapshot(reference, data)
+
+    def get(self, transaction=None) -> List[InMemoryDocumentSnapshot]:
+        return list(self.stream(transaction=transaction))
+
+
+class InMemoryCollectionReference(InMemoryQuery):
+    """A collection of an InMemoryFirestore; queries start here"""
+
+    def __init__(self, client: "InMemoryFirestore", path: str):
+        super().__init__(client, path)
+
+    @property
+    def id(self) -> str:
+        return self._collection_path.rsplit("/", 1)[-1]
+
+    def document(self, document_id: Optional[str] = None) -> InMemoryDocumentReference:
+        return InMemoryDocumentReference(
+            self._client, self._collection_path, document_id or uuid.uuid4().hex
+        )
+
+    def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None):
+        reference = self.document(document_id)
+        reference.create(document_data)
+        return datetime.now(timezone.utc), reference
+
+    def list_documents(self) -> List[InMemoryDocumentReference]:
+        with self._client._lock:
+            ids = list(self._client._collection(self._collection_path))
+        return [self.document(doc_id) for doc_id in ids]
+
+
+class InMemoryWriteBatch:
+    """Writes applied together on commit, like WriteBatch"""
+
+    def __init__(self, client: "InMemoryFirestore"):
+        self._client = client
+        self._writes: List[Tuple[str, InMemoryDocumentReference, Any, bool]] = []
+
+    def create(self, reference, document_data) -> None:
+        self._writes.append(("create", reference, document_data, False))
+
+    def set(self, reference, document_data, merge: bool = False) -> None:
+        self._writes.append(("set", reference, document_data, merge))
+
+    def update(self, reference, field_updates) -> None:
+        self._writes.append(("update", reference, field_updates, False))
+
+    def delete(self, reference) -> None:
+        self._writes.append(("delete", reference, None, False))
+
+    def commit(self) -> list:
+        writes, self._writes = self._writes, []
+        self._client._commit(writes)
+        return []
+
+
+class InMemoryTransaction(InMemoryWriteBatch):
+    """Transaction usable with @firestore.transactional.
+
+    The client lock is held from begin to commit, so transactions on the same
+    client run one at a time and their reads are never stale.
+    """
+
+    def __init__(self, client: "InMemoryFirestore", max_attempts: int = 5):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = False
+        self._id: Optional[bytes] = None
+
+    @property
+    def in_progress(self) -> bool:
+        return self._id is not None
+
+    def _clean_up(self) -> None:
+        self._writes = []
+        if self._id is not None:
+            self._id = None
+            self._client._lock.release()
+
+    def get_all(self, references) -> Iterator[InMemoryDocumentSnapshot]:
+        return self._client.get_all(references, transaction=self)
+
+    def _begin(self, retry_id=None) -> None:
+        self._client._lock.acquire()
+        self._id = uuid.uuid4().bytes
+
+    def _commit(self) -> list:
+        try:
+            self.commit()
+        finally:
+            self._clean_up()
+        return []
+
+    def _rollback(self) -> None:
+        self._clean_up()
+
+
+class InMemoryFirestore:
+    """Firestore client kept in process memory, for offline runs.
+
+    Supports what the repositories use: documents, equality and range
+    filters, ordering, cursors, limits, field-path updates, merges,
+    transforms (Increment, ArrayUnion, SERVER_TIMESTAMP, DELETE_FIELD),
+    batched reads, batches and transactions. Data is copied in and out like a real round
+    trip, so callers can't share mutable state through the store.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def collection(self, collection_path: str) -> InMemoryCollectionReference:
+        return InMemoryCollectionReference(self, collection_path)
+
+    def document(self, document_path: str) -> InMemoryDocumentReference:
+        collection_path, document_id = document_path.rsplit("/", 1)
+        return InMemoryDocumentReference(self, collection_path, document_id)
+
+    def batch(self) -> InMemoryWriteBatch:
+        return InMemoryWriteBatch(self)
+
+    def get_all(
+        self, references, field_paths=None, transaction=None
+    ) -> Iterator[InMemoryDocumentSnapshot]:
+        # Like the real client: each document once, in no particular order
+        unique = {reference.path: reference for reference in references}
+        with self._lock:
+            snapshots = [
+                InMemoryDocumentSnapshot(reference, self._read(reference))
+                for reference in unique.values()
+            ]
+        return iter(reversed(snapshots))
+
+    def transaction(self, max_attempts: int = 5, read_only: bool = False):
+        transaction = InMemoryTransaction(self, max_attempts=max_attempts)
+        transaction._read_only = read_only
+        return transaction
+
+    def collections(self) -> List[InMemoryCollectionReference]:
+        with self._lock:
+            paths = [path for path in self._collections if "/" not in path]
+        return [self.collection(path) for path in paths]
+
+    def clear(self) -> None:
+        """Drop every document"""
+        with self._lock:
+            self._collections.clear()
+
+    def _collection(self, path: str) -> Dict[str, Dict[str, Any]]:
+        return self._collections.get(path, {})
+
+    def _read(self, reference: InMemoryDocumentReference) -> Optional[Dict[str, Any]]:
+        return self._collection(reference._collection_path).get(reference.id)
+
+    def _commit(self, writes) -> None:
+        with self._lock:
+            # Validate everything first so a failing write applies nothing
+            for operation, reference, _, _ in writes:
+                exists = self._read(reference) is not None
+                if operation == "create" and exists:
+                    raise AlreadyExists(f"Document already exists: {reference.path}")
+                if operation == "update" and not exists:
+                    raise NotFound(f"No document to update: {reference.path}")
+
+            for operation, reference, data, merge in writes:
+                documents = self._collections.setdefault(reference._collection_path, {})
+                if operation == "delete":
+                    documents.pop(reference.id, None)
+                    continue
+
+                current = documents.get(reference.id)
+                document = (
+                    _copy(current)
+                    if current is not None
+                    and operation != "create"
+                    and (merge or operation == "update")
+                    else {}
+                )
+                if operation == "update":
+                    for field_path, value in data.items():
+                        _apply_field(document, field_path.split("."), value)
+                else:
+                    _merge(document, data, [])
+                documents[reference.id] = document
@@ -0,0 +1,343 @@
+import asyncio
+import json
+import math
+import os
+import random
+import re
+from typing import Any, AsyncGenerator, Dict, List, Literal, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import BaseModel, Field, PrivateAttr
+
+DEFAULT_ANSWER = (
+    "Your spending this month is in line with your budget. Groceries and rent "
+    "make up most of it, and there is room to increase your monthly SIP."
+)
+
+# Prefix ADK puts on the output of other agents when it is replayed as context
+_CONTEXT_PREFIX = "For context:"
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count, about four characters per token"""
+    return max(1, len(text) // 4)
+
+
+class Distribution(BaseModel):
+    """A sampled quantity, e.g. a latency in seconds or a token count.
+
+    `fixed` always returns the mean. `normal` and `uniform` spread around it
+    by `stddev` (the half-width for uniform); `lognormal` has the given mean
+    and standard deviation and the long right tail real model latencies have.
+    Samples are clamped to [minimum, maximum].
+    """
+
+    kind: Literal["fixed", "normal", "lognormal", "uniform"] = "fixed"
+    mean: float = 0.0
+    stddev: float = 0.0
+    minimum: float = 0.0
+    maximum: Optional[float] = None
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed" or self.stddev <= 0 or self.mean <= 0:
+            value = self.mean
+        elif self.kind == "normal":
+            value = rng.gauss(self.mean, self.stddev)
+        elif self.kind == "uniform":
+            value = rng.uniform(self.mean - self.stddev, self.mean + self.stddev)
+        else:
+            sigma2 = math.log(1 + (self.stddev / self.mean) ** 2)
+            value = rng.lognormvariate(
+                math.log(self.mean) - sigma2 / 2, math.sqrt(sigma2)
+            )
+        value = max(self.minimum, value)
+        if self.maximum is not None:
+            value = min(self.maximum, value)
+        return value
+
+
+class FakeFunctionCall(BaseModel):
+    """A tool call the fake model makes"""
+
+    name: str
+    args: Dict[str, Any] = Field(default_factory=dict)
+
+
+class FakeResponse(BaseModel):
+    """One model response: text, tool calls, or both"""
+
+    text: Optional[str] = None
+    function_calls: List[FakeFunctionCall] = Field(default_factory=list)
+
+
+class FakeRule(BaseModel):
+    """Scripted responses for questions matching `pattern`.
+
+    The n-th response answers the n-th model call of a turn, so a rule whose
+    first response calls a tool and whose second is text plays out the usual
+    call, tool result, answer loop. The last response repeats if the agent
+    keeps calling.
+    """
+
+    pattern: str = ""
+    responses: List[FakeResponse]
+
+    def applies(self, question: str, tools: set) -> bool:
+        """Whether the question matches and every scripted tool is offered"""
+        if self.pattern and not re.search(self.pattern, question, re.IGNORECASE):
+            return False
+        return all(
+            call.name in tools
+            for response in self.responses
+            for call in response.function_calls
+        )
+
+
+def default_rules() -> List[FakeRule]:
+    """Chart, table and form requests call the formatter tools; anything
+    else, or an agent without those tools, gets a plain answer"""
+    categories = ["Rent", "Groceries", "Dining", "Transport", "Utilities"]
+    amounts = [18000, 7450, 5200, 2300, 1900]
+    return [
+        FakeRule(
+            pattern=r"\b(chart|graph|plot|trend)s?\b",
+            responses=[
+                FakeResponse(
+                    function_calls=[
+                        FakeFunctionCall(
+                            name="chart_tool",
+                            args={
+                                "chart": {
+                                    "chart_type": "bar",
+                                    "chart_data": {
+                                        "labels": categories,
+                                        "datasets": [
+                                            {"label": "Spend (₹)", "data": amounts}
+                                        ],
+                                    },
+                                    "chart_description": "Spending by category last month",
+                                }
+                            },
+                        )
+                    ]
+                ),
+                FakeResponse(text="Here is your spending by category."),
+            ],
+        ),
+        FakeRule(
+            pattern=r"\b(table|breakdown)s?\b",
+            responses=[
+                FakeResponse(
+                    function_calls=[
+                        FakeFunctionCall(
+                            name="table_tool",
+                            args={
+                                "table": {
+                                    "table_headers": ["Category", "Amount (₹)"],
+                                    "table_data": {
+                                        "rows": [
+                                            [category, amount]
+                                            for category, amount in zip(
+                                                categories, amounts
+                                            )
+                                        ]
+                                    },
+                                    "table_description": "Spending by category last month",
+                                }
+                            },
+                        )
+                    ]
+                ),
+                FakeResponse(text="Here is the breakdown of your spending."),
+            ],
+        ),
+        FakeRule(
+            pattern=r"\b(form|plan|goal)s?\b",
+            responses=[
+                FakeResponse(
+                    function_calls=[
+                        FakeFunctionCall(
+                            name="dynamic_form_tool",
+                            args={
+                                "form": {
+                                    "form_name": "savings_goal",
+                                    "form_description": "Tell us about your goal",
+                                    "form_fields": [
+                                        {
+                                            "id": "goal_amount",
+                                            "label": "Target amount",
+                                            "placeholder": "₹",
+                                            "field_type": "number",
+                                            "required": True,
+                                        },
+                                        {
+                                            "id": "target_date",
+                                            "label": "Target date",
+                                            "placeholder": "YYYY-MM-DD",
+                                            "field_type": "date",
+                                            "required": True,
+                                        },
+                                    ],
+                                }
+                            },
+                        )
+                    ]
+                ),
+                FakeResponse(text="Fill in the form and I will draw up a plan."),
+            ],
+        ),
+        FakeRule(responses=[FakeResponse(text=DEFAULT_ANSWER)]),
+    ]
+
+
+def _text(content: types.Content) -> str:
+    return "".join(part.text or "" for part in content.parts or [])
+
+
+def _turn_position(llm_request: LlmRequest) -> tuple[str, int]:
+    """The latest user question and how many tool calls the agent has made
+    since, which is the index of the scripted response to give"""
+    for index in range(len(llm_request.contents) - 1, -1, -1):
+        content = llm_request.contents[index]
+        if content.role != "user" or not content.parts:
+            continue
+        if any(part.function_response for part in content.parts):
+            continue
+        text = _text(content)
+        if text.startswith(_CONTEXT_PREFIX):
+            continue
+        step = sum(
+            1
+            for later in llm_request.contents[index + 1 :]
+            if later.role == "model"
+            and any(part.function_call for part in later.parts or [])
+        )
+        return text, step
+    return "", 0
+
+
+class FakeLlm(BaseLlm):
+    """Offline model that replays scripted responses, for tests and load tests.
+
+    A response is picked by matching the latest user question against
+    `rules` (first match wins, rules calling tools the agent doesn't have are
+    skipped) and by how far into the tool loop the turn is, so the same
+    question always gets the same answer. Latencies and token counts are
+    drawn from distributions seeded with `seed`; token counts default to an
+    estimate from the request and response sizes.
+
+    Streaming calls yield the text in partial chunks of `chunk_tokens`
+    tokens, each after `seconds_per_token` per token, then the final
+    response, like the Gemini SSE stream does. `model` can be set to a real
+    model name so pricing and metrics treat the calls as that model's.
+    """
+
+    model: str = "fake-llm"
+    rules: List[FakeRule] = Field(default_factory=default_rules)
+    first_token_latency: Distribution = Field(default_factory=Distribution)
+    seconds_per_token: Distribution = Field(default_factory=Distribution)
+    prompt_tokens: Optional[Distribution] = None
+    response_tokens: Optional[Distribution] = None
+    chunk_tokens: int = 8
+    seed: int = 0
+
+    _rng: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r"fake-.*"]
+
+    @classmethod
+    def from_env(cls, model: str) -> "FakeLlm":
+        """A fake standing in for `model`, configured by the JSON file at
+        FAKE_LLM_CONFIG (any FakeLlm fields) if set"""
+        config: Dict[str, Any] = {}
+        path = os.getenv("FAKE_LLM_CONFIG")
+        if path:
+            with open(path, encoding="utf-8") as f:
+                config = json.load(f)
+        config.setdefault("model", model)
+        return cls.model_validate(config)
+
+    @classmethod
+    def answering(cls, text: str, **kwargs: Any) -> "FakeLlm":
+        """A model that gives the same text answer to everything"""
+        return cls(rules=[FakeRule(responses=[FakeResponse(text=text)])], **kwargs)
+
+    def pick_response(self, llm_request: LlmRequest) -> FakeResponse:
+        """The scripted response for this point of the turn"""
+        question, step = _turn_position(llm_request)
+        tools = set(llm_request.tools_dict)
+        for rule in self.rules:
+            if rule.applies(question, tools):
+                return rule.responses[min(step, len(rule.responses) - 1)]
+        return FakeResponse(text=DEFAULT_ANSWER)
+
+    def _usage(
+        self, llm_request: LlmRequest, response: FakeResponse
+    ) -> types.GenerateContentResponseUsageMetadata:
+        if self.prompt_tokens:
+            prompt_tokens = int(self.prompt_tokens.sample(self._rng))
+        else:
+            instruction = (
+                llm_request.config.system_instruction if llm_request.config else None
+            )
+            prompt_tokens = sum(
+                _estimate_tokens(_text(content))
+                for content in llm_request.contents
+                if content.parts
+            ) + (_estimate_tokens(instruction) if isinstance(instruction, str) else 0)
+        if self.response_tokens:
+            response_tokens = int(self.response_tokens.sample(self._rng))
+        else:
+            response_tokens = _estimate_tokens(
+                (response.text or "")
+                + "".join(
+                    json.dumps(call.model_dump()) for call in response.function_calls
+                )
+            )
+        return types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=response_tokens,
+            total_token_count=prompt_tokens + response_tokens,
+        )
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        response = self.pick_response(llm_request)
+        usage = self._usage(llm_request, response)
+        seconds_per_token = self.seconds_per_token.sample(self._rng)
+
+        delay = self.first_token_latency.sample(self._rng)
+        if stream and response.text:
+            chunk_size = max(1, self.chunk_tokens) * 4
+            for start in range(0, len(response.text), chunk_size):
+                chunk = response.text[start : start + chunk_size]
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=chunk)]),
+                    partial=True,
+                )
+                delay = seconds_per_token * _estimate_tokens(chunk)
+        else:
+            delay += seconds_per_token * usage.candidates_token_count
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        parts = [types.Part(text=response.text)] if response.text else []
+        parts += [
+            types.Part(function_call=types.FunctionCall(name=call.name, args=call.args))
+            for call in response.function_calls
+        ]
+        yield LlmResponse(
+            content=types.Content(role="model", parts=parts),
+            usage_metadata=usage,
+        )
@@ -0,0 +1,278 @@
+"""
+Shrinks chart payloads before they are streamed to the client or stored.
+
+Long series are downsampled to about as many points as a chart can show
+(LTTB for lines, min-max buckets for bars), numbers are rounded to what the
+series' scale can display, and lists of records become columns. Supported
+shapes, anywhere in the payload:
+
+- Chart.js style `{"labels": [...], "datasets": [{"data": [...]}, ...]}`
+- records `[{"date": ..., "value": ...}, ...]`, encoded as
+  `{"encoding": "columnar", "fields": [...], "values": [[...], ...]}`
+- points `[[x, y], ...]`
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Points kept per chart; a few hundred is past what a chart can show
+DEFAULT_MAX_POINTS = 500
+
+# Digits of resolution kept relative to each series' range
+DEFAULT_PRECISION_DIGITS = 4
+
+# Charts of categories rather than series are never downsampled
+_CATEGORICAL_CHARTS = {"pie", "doughnut", "donut", "radar", "polararea", "funnel"}
+_MIN_MAX_CHARTS = {"bar", "column", "histogram", "candlestick", "ohlc"}
+
+_X_FIELDS = ("x", "date", "time", "timestamp", "month", "period", "label", "name")
+
+
+def lttb_indexes(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indexes of the points that keep a line's shape"""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # First and last points are always kept; the rest is split into buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        # Triangle with the previous pick and the average of the next bucket
+        next_x = x[end:next_end].mean() if next_end > end else x[-1]
+        next_y = y[end:next_end].mean() if next_end > end else y[-1]
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def min_max_indexes(y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indexes of the minimum and maximum of each bucket, keeping every spike"""
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+    buckets = np.array_split(np.arange(n), threshold // 2)
+    picks = [0, n - 1]
+    for bucket in buckets:
+        values = y[bucket]
+        picks.append(bucket[int(np.argmin(values))])
+        picks.append(bucket[int(np.argmax(values))])
+    return np.unique(picks)
+
+
+def trim_precision(
+    values: Sequence[Any], digits: int = DEFAULT_PRECISION_DIGITS
+) -> List[Any]:
+    """Round a numeric list to `digits` significant digits of its range.
+
+    Whole numbers are emitted as ints, so 1250.0 serializes as `1250`.
+    """
+    array = np.asarray(values, dtype=np.float64)
+    finite = array[np.isfinite(array)]
+    if not finite.size:
+        return list(values)
+    span = float(finite.max() - finite.min()) or float(np.abs(finite).max()) or 1.0
+    decimals = min(max(digits - 1 - math.floor(math.log10(span)), 0), 10)
+    rounded = np.round(array, decimals)
+    if decimals == 0 or np.all(rounded[np.isfinite(rounded)] % 1 == 0):
+        return [
+            int(value) if math.isfinite(value) else None for value in rounded.tolist()
+        ]
+    return [value if math.isfinite(value) else None for value in rounded.tolist()]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _numeric_list(values: Sequence[Any]) -> bool:
+    return bool(values) and all(_is_number(v) or v is None for v in values)
+
+
+def _positions(values: Sequence[Any]) -> np.ndarray:
+    """X positions of a series: numbers and dates as is, anything else by index"""
+    if _numeric_list(values):
+        return np.asarray(values, dtype=np.float64)
+    try:
+        return np.asarray(values, dtype="datetime64[ms]").astype(np.float64)
+    except (ValueError, TypeError):
+        return np.arange(len(values), dtype=np.float64)
+
+
+def _y_values(values: Sequence[Any]) -> np.ndarray:
+    array = np.asarray(
+        [v if _is_number(v) else np.nan for v in values], dtype=np.float64
+    )
+    # Gaps would poison the bucket means; treat them as the series' mean
+    if np.isnan(array).any():
+        mean = np.nanmean(array) if (~np.isnan(array)).any() else 0.0
+        array = np.where(np.isnan(array), mean, array)
+    return array
+
+
+class _Compactor:
+    def __init__(self, chart_type: Optional[str], max_points: int, digits: int):
+        chart_type = (chart_type or "").lower().replace("_", "").replace(" ", "")
+        self.downsample = chart_type not in _CATEGORICAL_CHARTS
+        self.method = "min_max" if chart_type in _MIN_MAX_CHARTS else "lttb"
+        self.max_points = max_points
+        self.digits = digits
+        self.original_points = 0
+        self.points = 0
+
+    def indexes(self, x: np.ndarray, series: List[np.ndarray]) -> np.ndarray:
+        """Shared indexes to keep for one or more series over the same x"""
+        n = len(x)
+        self.original_points = max(self.original_points, n)
+        if not self.downsample or n <= self.max_points or not series:
+            self.points = max(self.points, n)
+            return np.arange(n)
+        per_series = max(self.max_points // len(series), 4)
+        picks = [
+            (
+                min_max_indexes(y, per_series)
+                if self.method == "min_max"
+                else lttb_indexes(x, y, per_series)
+            )
+            for y in series
+        ]
+        kept = np.unique(np.concatenate(picks))
+        self.points = max(self.points, len(kept))
+        return kept
+
+    def compact(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            if self._is_chartjs(value):
+                return self._compact_chartjs(value)
+            return {key: self.compact(item) for key, item in value.items()}
+        if isinstance(value, list):
+            if len(value) > 1 and all(self._is_record(item) for item in value):
+                return self._compact_records(value)
+            if len(value) > 1 and all(self._is_point(item) for item in value):
+                return self._compact_points(value)
+            if _numeric_list(value):
+                return trim_precision(value, self.digits)
+            return [self.compact(item) for item in value]
+        return value
+
+    @staticmethod
+    def _is_chartjs(value: Dict[str, Any]) -> bool:
+        labels, datasets = value.get("labels"), value.get("datasets")
+        return (
+            isinstance(labels, list)
+            and isinstance(datasets, list)
+            and all(
+                isinstance(d, dict)
+                and isinstance(d.get("data"), list)
+                and len(d["data"]) == len(labels)
+                and _numeric_list(d["data"])
+                for d in datasets
+            )
+        )
+
+    @staticmethod
+    def _is_record(item: Any) -> bool:
+        return isinstance(item, dict) and not any(
+            isinstance(value, (dict, list)) for value in item.values()
+        )
+
+    @staticmethod
+    def _is_point(item: Any) -> bool:
+        return (
+            isinstance(item, list)
+            and len(item) == 2
+            and (_is_number(item[1]) or item[1] is None)
+        )
+
+    def _compact_chartjs(self, value: Dict[str, Any]) -> Dict[str, Any]:
+        labels = value["labels"]
+        kept = self.indexes(
+            _positions(labels), [_y_values(d["data"]) for d in value["datasets"]]
+        ).tolist()
+        result = {
+            key: self.compact(item)
+            for key, item in value.items()
+            if key not in ("labels", "datasets")
+        }
+        result["labels"] = [labels[i] for i in kept]
+        result["datasets"] = [
+            {
+                **{k: self.compact(v) for k, v in dataset.items() if k != "data"},
+                "data": trim_precision([dataset["data"][i] for i in kept], self.digits),
+            }
+            for dataset in value["datasets"]
+        ]
+        return result
+
+    def _compact_points(self, points: List[List[Any]]) -> List[List[Any]]:
+        xs = [point[0] for point in points]
+        ys = [point[1] for point in points]
+        kept = self.indexes(_positions(xs), [_y_values(ys)]).tolist()
+        kept_x = [xs[i] for i in kept]
+        if _numeric_list(kept_x):
+            kept_x = trim_precision(kept_x, self.digits + 2)
+        kept_y = trim_precision([ys[i] for i in kept], self.digits)
+        return [list(point) for point in zip(kept_x, kept_y)]
+
+    def _compact_records(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        fields: List[str] = []
+        for record in records:
+            fields += [key for key in record if key not in fields]
+        columns = {field: [record.get(field) for record in records] for field in fields}
+
+        numeric = [field for field in fields if _numeric_list(columns[field])]
+        x_field = next(
+            (f for f in fields if f.lower() in _X_FIELDS),
+            next((f for f in fields if f not in numeric), None),
+        )
+        y_fields = [field for field in numeric if field != x_field]
+        x = (
+            _positions(columns[x_field])
+            if x_field is not None
+            else np.arange(len(records), dtype=np.float64)
+        )
+        kept = self.indexes(x, [_y_values(columns[f]) for f in y_fields]).tolist()
+
+        values = []
+        for field in fields:
+            column = [columns[field][i] for i in kept]
+            if field in numeric:
+                digits = self.digits + 2 if field == x_field else self.digits
+                column = trim_precision(column, digits)
+            values.append(column)
+        return {"encoding": "columnar", "fields": fields, "values": values}
+
+
+def compact_chart(
+    chart: Dict[str, Any],
+    chart_type: Optional[str] = None,
+    max_points: int = DEFAULT_MAX_POINTS,
+    digits: int = DEFAULT_PRECISION_DIGITS,
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """Compact a chart payload.
+
+    Returns the compacted payload and, when points were dropped, a summary
+    `{"method", "original_points", "points"}`; the caller should then keep
+    the original payload available at full resolution.
+    """
+    compactor = _Compactor(
+        chart_type or chart.get("type") or chart.get("chart_type"), max_points, digits
+    )
+    compacted = compactor.compact(chart)
+    if compactor.points >= compactor.original_points:
+        return compacted, None
+    return compacted, {
+        "method": compactor.method,
+        "original_points": compactor.original_points,
+        "points": compactor.points,
+    }
@@ -0,0 +1,86 @@
+"""
+Renders small previews of uploaded images and PDFs.
+
+Plain functions over file paths so they can run in a worker process. Needs
+the optional `Pillow` package, and `pymupdf` for PDFs
+(`pip install backend[previews]`).
+"""
+
+import io
+from typing import Any, Dict
+
+# Longest side of a preview in pixels; sized for the chat sidebar
+PREVIEW_MAX_SIZE = 320
+PREVIEW_QUALITY = 70
+PREVIEW_MIME_TYPE = "image/webp"
+
+
+class MissingRendererError(RuntimeError):
+    """The optional package a preview needs isn't installed"""
+
+
+def _load_pillow():
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        raise MissingRendererError("Previews require the Pillow package")
+    return Image, ImageOps
+
+
+def _encode(image, max_size: int) -> Dict[str, Any]:
+    image.thumbnail((max_size, max_size))
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="WEBP", quality=PREVIEW_QUALITY, method=4)
+    return {
+        "data": buffer.getvalue(),
+        "width": image.width,
+        "height": image.height,
+        "mime_type": PREVIEW_MIME_TYPE,
+    }
+
+
+def _render_image(path: str, max_size: int) -> Dict[str, Any]:
+    Image, ImageOps = _load_pillow()
+    with Image.open(path) as image:
+        # Decode at a reduced scale where the format allows (JPEG)
+        image.draft("RGB", (max_size * 2, max_size * 2))
+        image = ImageOps.exif_transpose(image)
+        return _encode(image, max_size)
+
+
+def _render_pdf(path: str, max_size: int) -> Dict[str, Any]:
+    Image, _ = _load_pillow()
+    try:
+        import fitz
+    except ImportError:
+        raise MissingRendererError("PDF previews require the pymupdf package")
+
+    with fitz.open(path) as document:
+        page = document[0]
+        # Render straight at the preview size rather than at full resolution
+        zoom = max_size / max(page.rect.width, page.rect.height)
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        image = Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+        return {**_encode(image, max_size), "pages": document.page_count}
+
+
+RENDERERS = {
+    "image": _render_image,
+    "pdf": _render_pdf,
+}
+
+
+def render_preview(
+    path: str, artifact_type: str, max_size: int = PREVIEW_MAX_SIZE
+) -> Dict[str, Any]:
+    """Render a preview of a stored upload.
+
+    `artifact_type` is an ArtifactType value. Returns the encoded image bytes
+    under "data" with its dimensions. Runs in a worker process.
+    """
+    renderer = RENDERERS.get(artifact_type)
+    if renderer is None:
+        raise ValueError(f"No preview renderer for artifact type: {artifact_type}")
+    return renderer(path, max_size)
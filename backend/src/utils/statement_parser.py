@@ -0,0 +1,335 @@
+"""
+Parsers that turn uploaded statements into normalized, columnar transactions.
+
+Everything here is plain functions over file paths so it can run in a worker
+process. PDF and spreadsheet support need the optional `pypdf` and `openpyxl`
+packages (`pip install backend[ingestion]`).
+"""
+
+import csv
+import re
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+# Characters of extracted text kept with the result, for the agent's context
+TEXT_EXCERPT_CHARS = 4000
+
+
+class MissingParserError(RuntimeError):
+    """The optional package a document type needs isn't installed"""
+
+
+DATE_FORMATS = (
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%d/%m/%y",
+    "%d-%m-%y",
+    "%d-%b-%Y",
+    "%d-%b-%y",
+    "%d %b %Y",
+    "%d %b %y",
+    "%d %B %Y",
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+)
+
+_HEADER_ALIASES = {
+    "date": ("txn date", "transaction date", "date", "value date", "posting date"),
+    "description": (
+        "description",
+        "narration",
+        "particulars",
+        "details",
+        "remarks",
+        "transaction details",
+    ),
+    "debit": ("debit", "withdrawal", "withdrawals", "withdrawal amt", "dr"),
+    "credit": ("credit", "deposit", "deposits", "deposit amt", "cr"),
+    "amount": ("amount", "txn amount", "transaction amount"),
+    "type": ("type", "dr/cr", "cr/dr", "txn type"),
+    "balance": ("balance", "closing balance", "running balance"),
+}
+
+# First matching keyword wins; keep specific merchants ahead of generic words
+CATEGORY_KEYWORDS = {
+    "food": ("swiggy", "zomato", "restaurant", "cafe", "dominos", "pizza", "food"),
+    "groceries": ("bigbasket", "blinkit", "zepto", "dmart", "grocery", "supermarket"),
+    "transport": ("uber", "ola", "rapido", "metro", "irctc", "fuel", "petrol"),
+    "shopping": ("amazon", "flipkart", "myntra", "ajio", "nykaa"),
+    "utilities": ("electricity", "broadband", "recharge", "airtel", "jio", "gas"),
+    "rent": ("rent",),
+    "salary": ("salary", "payroll"),
+    "investment": ("sip", "mutual fund", "zerodha", "groww", "nps", "ppf"),
+    "loan": ("emi", "loan"),
+    "transfer": ("upi", "neft", "imps", "rtgs", "transfer"),
+}
+
+_CATEGORY_PATTERNS = {
+    category: re.compile(
+        r"\b(?:" + "|".join(re.escape(k) for k in keywords) + r")\b", re.IGNORECASE
+    )
+    for category, keywords in CATEGORY_KEYWORDS.items()
+}
+
+_AMOUNT = r"\(?-?(?:₹|rs\.?|inr)?\s?\d[\d,]*\.\d{2}\)?(?:\s?(?:cr|dr))?"
+_PDF_LINE = re.compile(
+    r"^(?P<date>\d{1,2}[/\-. ](?:\d{1,2}|[A-Za-z]{3,9})[/\-. ]\d{2,4})\s+"
+    rf"(?P<description>.*?)\s+(?P<amounts>{_AMOUNT}(?:\s+{_AMOUNT}){{0,2}})$",
+    re.IGNORECASE,
+)
+_AMOUNT_TOKEN = re.compile(_AMOUNT, re.IGNORECASE)
+_BALANCE_LINE = re.compile(
+    r"\b(?:opening|closing) balance\b|brought forward|carried forward", re.IGNORECASE
+)
+
+
+def parse_date(value: Any) -> Optional[date]:
+    """Parse the date formats seen in Indian bank statements (day first)"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value or "").strip()
+    if not text:
+        return None
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """Parse '1,234.50', '(99.00)', '₹ 500 Cr' style amounts"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or "").strip().lower()
+    if not text or text in ("-", "--"):
+        return None
+    negative = text.startswith("(") and text.endswith(")") or text.endswith("dr")
+    text = re.sub(r"[^\d.\-]", "", text.replace("cr", "").replace("dr", ""))
+    if not text or text in ("-", "."):
+        return None
+    try:
+        amount = float(text)
+    except ValueError:
+        return None
+    return -abs(amount) if negative else amount
+
+
+def categorize(description: str) -> str:
+    """Assign a spending category from the transaction description"""
+    for category, pattern in _CATEGORY_PATTERNS.items():
+        if pattern.search(description):
+            return category
+    return "other"
+
+
+def _match_header(cells: Sequence[Any]) -> Optional[Dict[str, int]]:
+    """Map normalized column names to indexes if `cells` is a header row"""
+    names = [str(cell or "").strip().lower().rstrip(".:") for cell in cells]
+    mapping: Dict[str, int] = {}
+    for column, aliases in _HEADER_ALIASES.items():
+        for alias in aliases:
+            matches = [i for i, name in enumerate(names) if name.startswith(alias)]
+            unused = [i for i in matches if i not in mapping.values()]
+            if unused:
+                mapping[column] = unused[0]
+                break
+    has_amount = "amount" in mapping or "debit" in mapping or "credit" in mapping
+    if "date" in mapping and has_amount:
+        return mapping
+    return None
+
+
+def transactions_from_rows(rows: Sequence[Sequence[Any]]) -> Dict[str, List[Any]]:
+    """Normalize tabular rows (header somewhere near the top) to columns.
+
+    Amounts are signed: money out is negative, money in is positive.
+    """
+    columns: Dict[str, List[Any]] = {
+        "date": [],
+        "description": [],
+        "amount": [],
+        "balance": [],
+        "category": [],
+    }
+    mapping = None
+    for row in rows:
+        if mapping is None:
+            mapping = _match_header(row)
+            continue
+
+        def cell(name: str) -> Any:
+            index = mapping.get(name)
+            return row[index] if index is not None and index < len(row) else None
+
+        txn_date = parse_date(cell("date"))
+        if txn_date is None:
+            continue
+
+        if "debit" in mapping or "credit" in mapping:
+            debit = parse_amount(cell("debit")) or 0.0
+            credit = parse_amount(cell("credit")) or 0.0
+            amount = abs(credit) - abs(debit)
+        else:
+            amount = parse_amount(cell("amount"))
+            if amount is None:
+                continue
+            kind = str(cell("type") or "").strip().lower()
+            if kind.startswith("d"):
+                amount = -abs(amount)
+            elif kind.startswith("c"):
+                amount = abs(amount)
+        if amount == 0:
+            continue
+
+        description = str(cell("description") or "").strip()
+        columns["date"].append(txn_date.isoformat())
+        columns["description"].append(description)
+        columns["amount"].append(round(amount, 2))
+        columns["balance"].append(parse_amount(cell("balance")))
+        columns["category"].append(categorize(description))
+    return columns
+
+
+def transactions_from_text(lines: Sequence[str]) -> Dict[str, List[Any]]:
+    """Parse transaction lines from a statement's extracted text.
+
+    Trailing amounts are read as `amount [balance]`; the direction comes from a
+    Cr/Dr marker, else from the change in balance, else defaults to money out.
+    """
+    columns: Dict[str, List[Any]] = {
+        "date": [],
+        "description": [],
+        "amount": [],
+        "balance": [],
+        "category": [],
+    }
+    previous_balance = None
+    for line in lines:
+        match = _PDF_LINE.match(line.strip())
+        if not match:
+            continue
+        txn_date = parse_date(match.group("date"))
+        if txn_date is None:
+            continue
+        tokens = _AMOUNT_TOKEN.findall(match.group("amounts"))
+        values = [parse_amount(token) for token in tokens]
+        if _BALANCE_LINE.search(match.group("description")):
+            previous_balance = values[-1]
+            continue
+        amount = values[0]
+        balance = values[-1] if len(values) >= 2 else None
+        marker = tokens[0].strip().lower()
+
+        if marker.endswith("cr"):
+            amount = abs(amount)
+        elif marker.endswith("dr"):
+            amount = -abs(amount)
+        elif balance is not None and previous_balance is not None:
+            amount = abs(amount) if balance >= previous_balance else -abs(amount)
+        else:
+            amount = -abs(amount)
+        previous_balance = balance if balance is not None else previous_balance
+
+        description = match.group("description").strip()
+        columns["date"].append(txn_date.isoformat())
+        columns["description"].append(description)
+        columns["amount"].append(round(amount, 2))
+        columns["balance"].append(balance)
+        columns["category"].append(categorize(description))
+    return columns
+
+
+def _parse_csv(path: str) -> Dict[str, Any]:
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
+        sample = f.read(8192)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        rows = list(csv.reader(f, dialect))
+    text = "\n".join(",".join(row) for row in rows[:50])
+    return {"transactions": transactions_from_rows(rows), "text": text, "pages": None}
+
+
+def _parse_spreadsheet(path: str) -> Dict[str, Any]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise MissingParserError("Spreadsheet ingestion requires the openpyxl package")
+
+    # Opened as a file object: stored blobs have no .xlsx extension to check
+    f = open(path, "rb")
+    workbook = load_workbook(f, read_only=True, data_only=True)
+    try:
+        best: Dict[str, List[Any]] = {"date": []}
+        for sheet in workbook.worksheets:
+            columns = transactions_from_rows(list(sheet.iter_rows(values_only=True)))
+            if len(columns["date"]) > len(best["date"]):
+                best = columns
+        sheet_names = ", ".join(sheet.title for sheet in workbook.worksheets)
+    finally:
+        workbook.close()
+        f.close()
+    if "amount" not in best:
+        best = transactions_from_rows([])
+    return {"transactions": best, "text": f"Sheets: {sheet_names}", "pages": None}
+
+
+def _parse_pdf(path: str) -> Dict[str, Any]:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise MissingParserError("PDF ingestion requires the pypdf package")
+
+    reader = PdfReader(path)
+    texts = [page.extract_text() or "" for page in reader.pages]
+    lines = [line for text in texts for line in text.splitlines()]
+    return {
+        "transactions": transactions_from_text(lines),
+        "text": "\n".join(texts),
+        "pages": len(reader.pages),
+    }
+
+
+PARSERS = {
+    "csv": _parse_csv,
+    "spreadsheet": _parse_spreadsheet,
+    "pdf": _parse_pdf,
+}
+
+
+def summarize_transactions(transactions: Dict[str, List[Any]]) -> Dict[str, Any]:
+    """Small summary kept in artifact metadata"""
+    amounts = transactions["amount"]
+    dates = transactions["date"]
+    return {
+        "row_count": len(amounts),
+        "date_from": min(dates) if dates else None,
+        "date_to": max(dates) if dates else None,
+        "total_credit": round(sum(a for a in amounts if a > 0), 2),
+        "total_debit": round(-sum(a for a in amounts if a < 0), 2),
+    }
+
+
+def parse_document(path: str, artifact_type: str) -> Dict[str, Any]:
+    """Extract text and transactions from a stored upload.
+
+    `artifact_type` is an ArtifactType value. Runs in a worker process.
+    """
+    parser = PARSERS.get(artifact_type)
+    if parser is None:
+        raise ValueError(f"No parser for artifact type: {artifact_type}")
+    parsed = parser(path)
+    return {
+        "artifact_type": artifact_type,
+        "pages": parsed["pages"],
+        "text_excerpt": parsed["text"][:TEXT_EXCERPT_CHARS],
+        "transactions": parsed["transactions"],
+        "summary": summarize_transactions(parsed["transactions"]),
+    }
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from src.auth.firebase_auth import get_current_user
+from src.dependencies.services import get_artifact_service
+from src.main import app
+from src.models.artifact import Artifact, ArtifactSource, ArtifactType
+from src.models.user import User
+from src.services.artifact_service import ArtifactService
+from src.services.artifact_storage import LocalArtifactStorage
+
+
+class SingleArtifactRepository:
+    """Returns one fixed artifact to its owner"""
+
+    def __init__(self, artifact: Artifact):
+        self.artifact = artifact
+
+    async def get_artifact_by_user(self, artifact_id, user_id):
+        if artifact_id == self.artifact.id and user_id == self.artifact.user_id:
+            return self.artifact
+        return None
+
+
+def test_download_supports_ranges_and_etags(tmp_path):
+    """Test partial content and conditional requests on artifact downloads"""
+    storage = LocalArtifactStorage(str(tmp_path))
+    (tmp_path / "blobs").mkdir()
+    (tmp_path / "blobs" / "abc").write_bytes(b"0123456789")
+    artifact = Artifact(
+        id="art",
+        session_id="sess",
+        user_id="user",
+        message_id="msg",
+        artifact_type=ArtifactType.PDF,
+        source=ArtifactSource.USER_UPLOAD,
+        title="statement.pdf",
+        metadata={"storage_key": "blobs/abc"},
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+        file_size=10,
+        mime_type="application/pdf",
+        original_filename="statement.pdf",
+        content_hash="abc",
+    )
+    service = ArtifactService(SingleArtifactRepository(artifact), None, None, storage)
+    app.dependency_overrides[get_current_user] = lambda: User(uid="user")
+    app.dependency_overrides[get_artifact_service] = lambda: service
+    try:
+        client = TestClient(app)
+        url = "/sessions/sess/artifacts/art/content"
+
+        response = client.get(url, headers={"Range": "bytes=2-5"})
+        assert response.status_code == 206
+        assert response.content == b"2345"
+        assert response.headers["content-range"] == "bytes 2-5/10"
+        assert response.headers["etag"] == '"abc"'
+
+        response = client.get(url, headers={"If-None-Match": '"abc"'})
+        assert response.status_code == 304
+
+        assert client.get("/sessions/other/artifacts/art/content").status_code == 404
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,102 @@
+import jwt
+import pytest
+from firebase_admin import auth
+
+from benchmarks.harness import BenchmarkResult, compare, load_results, write_results
+from src.models.chat_session import ChatSessionCreate
+from src.models.message import UsageMetadata
+from src.repositories import (
+    ArtifactBlobRepository,
+    ChatSessionRepository,
+    UsageRepository,
+)
+from src.testing import FakeAuth, InMemoryFirestore
+
+
+async def test_repositories_run_on_the_in_memory_firestore():
+    """Test transactions, increments, queries and cursors of the fake"""
+    db = InMemoryFirestore()
+
+    blobs = ArtifactBlobRepository(db=db)
+    assert await blobs.acquire("abc", "blobs/ab/abc", 10) is True
+    assert await blobs.acquire("abc", "blobs/ab/abc", 10) is False
+    assert (await blobs.get_by_id("abc")).ref_count == 2
+    assert await blobs.release("abc") is None
+    assert (await blobs.release("abc")).storage_key == "blobs/ab/abc"
+    assert await blobs.get_by_id("abc") is None
+
+    usage = UsageRepository(db=db)
+    for cost in (0.5, 0.25):
+        await usage.increment_turn_usage(
+            "u1",
+            "s1",
+            "2026-01-01",
+            UsageMetadata(total_token_count=10, cost_estimate=cost),
+        )
+    await usage.increment_turn_usage(
+        "u1", "s2", "2026-01-01", UsageMetadata(total_token_count=5, cost_estimate=1.0)
+    )
+    counter = await usage.get_session_usage("s1")
+    assert (counter.turn_count, counter.total_token_count) == (2, 20)
+    expensive = await usage.get_most_expensive_sessions("u1")
+    assert [c.session_id for c in expensive] == ["s2", "s1"]
+
+    sessions = ChatSessionRepository(db=db)
+    for title in ("a", "b", "c"):
+        await sessions.create_session(ChatSessionCreate(user_id="u1", title=title))
+    page = await sessions.get_paginated(
+        limit=2, offset=1, order_by="title", direction="asc"
+    )
+    assert [s.title for s in page] == ["b", "c"]
+
+    db.collection("users").document("u1").set(
+        {"profile": {"name": "A", "email": "a@x"}}
+    )
+    db.collection("users").document("u1").update({"profile.name": "B"})
+    assert db.collection("users").document("u1").get().to_dict() == {
+        "profile": {"name": "B", "email": "a@x"}
+    }
+
+
+def test_fake_auth_verifies_only_its_own_tokens():
+    """Test that issued ID tokens verify and forged ones are rejected"""
+    fake = FakeAuth()
+    assert fake.verify_id_token(fake.issue_id_token("u1"))["uid"] == "u1"
+
+    forged = jwt.encode({"sub": "u1"}, "secret", algorithm="HS256")
+    with pytest.raises(auth.InvalidIdTokenError):
+        fake.verify_id_token(forged)
+    with pytest.raises(auth.InvalidIdTokenError):
+        FakeAuth().verify_id_token(fake.issue_id_token("u1"))
+
+
+def _result(name, p50, p99, throughput):
+    return BenchmarkResult(
+        name=name,
+        iterations=100,
+        concurrency=1,
+        duration_s=1.0,
+        throughput_per_s=throughput,
+        latency_ms={"p50": p50, "p99": p99},
+    )
+
+
+def test_regressions_are_flagged_against_the_baseline(tmp_path):
+    """Test the results file round trip and the regression thresholds"""
+    path = str(tmp_path / "baseline.json")
+    write_results(
+        path, [_result("list", 10.0, 20.0, 100.0), _result("auth", 1.0, 2.0, 1000.0)]
+    )
+    baseline = load_results(path)
+
+    comparisons = compare(
+        [
+            _result("list", 14.0, 25.0, 95.0),
+            _result("auth", 1.0, 2.0, 600.0),
+            _result("new", 1, 1, 1),
+        ],
+        baseline,
+    )
+    regressed = {(c.name, c.metric) for c in comparisons if c.regressed}
+    assert regressed == {("list", "p50_ms"), ("auth", "throughput_per_s")}
+    assert {c.name for c in comparisons} == {"list", "auth"}
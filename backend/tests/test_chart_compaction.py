@@ -0,0 +1,185 @@
+import json
+from datetime import datetime
+
+import numpy as np
+from fastapi.testclient import TestClient
+from google.adk.agents import LlmAgent
+
+from src.agents.sub_agents.finalise_response_agent.agent import chart_tool
+from src.auth.firebase_auth import get_current_user
+from src.dependencies.services import get_artifact_service
+from src.main import app
+from src.models.artifact import Artifact, ArtifactSource, ArtifactType
+from src.models.user import User
+from src.repositories import ArtifactRepository, MessageRepository
+from src.services.artifact_service import (
+    ArtifactService,
+    chart_data_key,
+    compact_chart_payload,
+)
+from src.services.artifact_storage import LocalArtifactStorage
+from src.services.message_service import MessageService
+from src.services.runner_manager_service import RunnerManagerService
+from src.testing import FakeLlm, InMemoryFirestore
+from src.testing.llm import FakeFunctionCall, FakeResponse, FakeRule
+from src.utils.chart_compaction import (
+    compact_chart,
+    lttb_indexes,
+    min_max_indexes,
+    trim_precision,
+)
+
+
+def test_downsampling_keeps_shape():
+    """Test that LTTB and min-max keep the endpoints and the extremes"""
+    x = np.arange(10_000, dtype=np.float64)
+    y = np.sin(x / 500)
+    y[4321] = 50.0
+
+    kept = lttb_indexes(x, y, 200)
+    assert len(kept) == 200
+    assert kept[0] == 0 and kept[-1] == 9999
+    assert 4321 in kept
+    assert np.all(np.diff(kept) > 0)
+
+    kept = min_max_indexes(y, 100)
+    assert 4321 in kept and int(np.argmin(y)) in kept
+
+    assert trim_precision([1250.0, 98765.4321]) == [1250, 98765]
+    assert trim_precision([0.123456, 0.5]) == [0.1235, 0.5]
+
+
+def test_compact_chart_shapes():
+    """Test Chart.js datasets, records and categorical charts"""
+    labels = [f"2024-01-{day:02d}" for day in range(1, 32)] * 100
+    chart = {
+        "type": "line",
+        "labels": labels,
+        "datasets": [{"label": "Net worth", "data": list(range(len(labels)))}],
+    }
+    compacted, compaction = compact_chart(chart, max_points=100)
+    assert compaction == {"method": "lttb", "original_points": 3100, "points": 100}
+    assert len(compacted["labels"]) == len(compacted["datasets"][0]["data"]) == 100
+    assert compacted["datasets"][0]["label"] == "Net worth"
+
+    records = {"type": "bar", "data": [{"month": "Jan", "spent": 1200.456}] * 3}
+    compacted, compaction = compact_chart(records)
+    assert compaction is None
+    assert compacted["data"] == {
+        "encoding": "columnar",
+        "fields": ["month", "spent"],
+        "values": [["Jan", "Jan", "Jan"], [1200, 1200, 1200]],
+    }
+
+    pie = {"labels": ["a"] * 1000, "datasets": [{"data": [1] * 1000}]}
+    assert compact_chart(pie, "pie", max_points=10)[1] is None
+
+
+async def test_full_resolution_chart_data_is_served(tmp_path):
+    """Test that downsampled charts can fetch their original data"""
+    storage = LocalArtifactStorage(str(tmp_path))
+    chart = {"type": "line", "data": [[i, i * 1.5] for i in range(2000)]}
+    compacted = await compact_chart_payload(storage, "user", chart)
+    assert len(compacted["data"]) <= 500
+    chart_hash = compacted["compaction"]["full_data_hash"]
+
+    service = ArtifactService(None, None, None, storage)
+    app.dependency_overrides[get_current_user] = lambda: User(uid="user")
+    app.dependency_overrides[get_artifact_service] = lambda: service
+    try:
+        client = TestClient(app)
+        response = client.get(f"/sessions/artifacts/charts/{chart_hash}")
+        assert response.status_code == 200
+        assert json.loads(response.content) == chart
+
+        app.dependency_overrides[get_current_user] = lambda: User(uid="other")
+        response = client.get(f"/sessions/artifacts/charts/{chart_hash}")
+        assert response.status_code == 404
+    finally:
+        app.dependency_overrides.clear()
+
+
+async def test_stored_message_carries_the_compacted_chart(monkeypatch, tmp_path):
+    """Test that the chart tool's full payload stays out of the message"""
+    from src.dependencies import services
+
+    monkeypatch.setenv("AGENT_ENGINE_ID", "test")
+    storage = LocalArtifactStorage(str(tmp_path))
+    monkeypatch.setattr(services, "get_artifact_storage", lambda: storage)
+    chart = {
+        "chart_type": "line",
+        "chart_data": {"type": "line", "data": [[i, i * 1.5] for i in range(5000)]},
+        "chart_description": "Balance over time",
+    }
+    model = FakeLlm(
+        rules=[
+            FakeRule(
+                responses=[
+                    FakeResponse(
+                        function_calls=[
+                            FakeFunctionCall(name="chart_tool", args={"chart": chart})
+                        ]
+                    ),
+                    FakeResponse(text="Here is your balance."),
+                ]
+            )
+        ]
+    )
+    db = InMemoryFirestore()
+    manager = RunnerManagerService(
+        MessageService(MessageRepository(db=db)),
+        agent=LlmAgent(name="root_agent", model=model, tools=[chart_tool]),
+    )
+    streamed = [
+        chunk
+        async for chunk in manager.process_user_message(
+            user_id="user",
+            session_id="sess",
+            message_content="chart my balance",
+            backend_session_id="sess",
+        )
+    ]
+
+    full_size = len(json.dumps(chart))
+    assert all(len(chunk) < full_size / 4 for chunk in streamed)
+    stored = [doc.to_dict() for doc in db.collection("messages").stream()]
+    assert len(stored) == 2
+    for message in stored:
+        assert len(json.dumps(message, default=str)) < full_size / 4
+    call = next(
+        call
+        for message in stored
+        for event in message.get("events") or []
+        for call in event.get("tool_calls") or []
+    )
+    assert len(call["args"]["chart"]["chart_data"]["data"]) <= 500
+
+
+async def test_full_resolution_chart_data_goes_with_the_artifact(tmp_path):
+    """Test that deleting a chart artifact deletes its full-resolution data"""
+    storage = LocalArtifactStorage(str(tmp_path))
+    chart = {"type": "line", "data": [[i, i * 1.5] for i in range(2000)]}
+    compacted = await compact_chart_payload(storage, "user", chart)
+    key = chart_data_key("user", compacted["compaction"]["full_data_hash"])
+    assert await storage.exists(key)
+
+    repository = ArtifactRepository(db=InMemoryFirestore())
+    await repository.create(
+        Artifact(
+            id="art",
+            session_id="sess",
+            user_id="user",
+            message_id="msg",
+            artifact_type=ArtifactType.CHART,
+            source=ArtifactSource.AI_GENERATED,
+            title="Balance",
+            metadata={"chart_type": "line", "compaction": compacted["compaction"]},
+            content=compacted,
+            created_at=datetime.now(),
+            updated_at=datetime.now(),
+        )
+    )
+    service = ArtifactService(repository, None, None, storage)
+
+    assert await service.delete_artifact("art", "user")
+    assert not await storage.exists(key)
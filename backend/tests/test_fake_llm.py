@@ -0,0 +1,112 @@
+import random
+
+from google.adk.agents import LlmAgent, RunConfig
+from google.adk.agents.run_config import StreamingMode
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from src.agents.models import get_model
+from src.agents.response_router import FormatterRouterAgent
+from src.agents.sub_agents.finalise_response_agent.agent import (
+    chart_tool,
+    dynamic_form_tool,
+    table_tool,
+)
+from src.testing import Distribution, FakeLlm
+
+
+def _agent(**model_fields) -> FormatterRouterAgent:
+    return FormatterRouterAgent(
+        name="router",
+        answer_agent=LlmAgent(name="main", model=FakeLlm(**model_fields)),
+        formatter_agent=LlmAgent(
+            name="formatter",
+            model=FakeLlm(**model_fields),
+            tools=[dynamic_form_tool, chart_tool, table_tool],
+        ),
+    )
+
+
+async def _run_turn(agent, question: str, run_config=None):
+    runner = InMemoryRunner(agent=agent, app_name="test")
+    session = await runner.session_service.create_session(
+        app_name="test", user_id="user"
+    )
+    events = []
+    async for event in runner.run_async(
+        user_id="user",
+        session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part(text=question)]),
+        run_config=run_config or RunConfig(),
+    ):
+        events.append(event)
+    return events
+
+
+async def test_fake_llm_plays_out_the_tool_loop():
+    """Test scripted tool calls, tool results and the final answer"""
+    events = await _run_turn(_agent(), "Show me a breakdown table of my spending")
+
+    assert [event.author for event in events] == [
+        "main",
+        "formatter",
+        "formatter",
+        "formatter",
+        "router",
+    ]
+    # The main agent has no formatter tools, so it answers in text
+    assert events[0].content.parts[0].text
+    assert events[1].get_function_calls()[0].name == "table_tool"
+    table = events[2].get_function_responses()[0].response
+    assert table["table_headers"] == ["Category", "Amount (₹)"]
+    assert len(table["table_data"]["rows"]) == 5
+    assert events[3].content.parts[0].text == "Here is the breakdown of your spending."
+    assert events[3].usage_metadata.total_token_count > 0
+
+
+async def test_fake_llm_streams_partial_chunks():
+    """Test SSE streaming and the sampled token counts"""
+    agent = LlmAgent(
+        name="main",
+        model=FakeLlm.answering(
+            "x" * 100,
+            chunk_tokens=5,
+            response_tokens=Distribution(mean=42),
+            prompt_tokens=Distribution(mean=1000),
+        ),
+    )
+    events = await _run_turn(
+        agent, "hello", RunConfig(streaming_mode=StreamingMode.SSE)
+    )
+
+    partial = [event for event in events if event.partial]
+    assert len(partial) == 5
+    assert "".join(event.content.parts[0].text for event in partial) == "x" * 100
+    final = events[-1]
+    assert not final.partial
+    assert final.usage_metadata.candidates_token_count == 42
+    assert final.usage_metadata.total_token_count == 1042
+
+
+def test_distributions_are_seeded_and_clamped():
+    """Test that the same seed gives the same samples within bounds"""
+    latency = Distribution(kind="lognormal", mean=0.5, stddev=0.4, maximum=2.0)
+    first = [latency.sample(random.Random(7)) for _ in range(3)]
+    assert first == [latency.sample(random.Random(7)) for _ in range(3)]
+    samples = [latency.sample(random.Random(i)) for i in range(200)]
+    assert all(0 <= sample <= 2.0 for sample in samples)
+    assert Distribution(mean=3).sample(random.Random()) == 3
+
+
+def test_get_model_switches_to_the_fake(monkeypatch, tmp_path):
+    """Test AGENT_MODEL_BACKEND and FAKE_LLM_CONFIG"""
+    assert get_model("gemini-2.0-flash") == "gemini-2.0-flash"
+
+    config = tmp_path / "fake.json"
+    config.write_text('{"seed": 3, "first_token_latency": {"mean": 0.2}}')
+    monkeypatch.setenv("AGENT_MODEL_BACKEND", "fake")
+    monkeypatch.setenv("FAKE_LLM_CONFIG", str(config))
+    model = get_model("gemini-2.0-flash")
+    assert isinstance(model, FakeLlm)
+    assert (model.model, model.seed) == ("gemini-2.0-flash", 3)
+    assert model.first_token_latency.mean == 0.2
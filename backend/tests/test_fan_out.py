@@ -0,0 +1,91 @@
+import asyncio
+import time
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from src.agents.fan_out import (
+    GATHERED_DATA_STATE_KEY,
+    DeadlineParallelAgent,
+    gather_with_deadlines,
+)
+
+
+class SlowAgent(BaseAgent):
+    """Agent that answers after a delay"""
+
+    delay: float
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        await asyncio.sleep(self.delay)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(
+                role="model", parts=[types.Part(text=f"{self.name} done")]
+            ),
+        )
+
+
+async def test_branches_run_concurrently_with_deadlines():
+    """Test that latency follows the slowest branch and overruns are cut off"""
+    agent = DeadlineParallelAgent(
+        name="gather",
+        sub_agents=[
+            SlowAgent(name="personal_finance", delay=0.2),
+            SlowAgent(name="public_data", delay=0.2),
+            SlowAgent(name="planner", delay=5),
+        ],
+        timeout_seconds=0.4,
+    )
+    runner = InMemoryRunner(agent=agent, app_name="test")
+    session = await runner.session_service.create_session(
+        app_name="test", user_id="user"
+    )
+
+    started = time.perf_counter()
+    events = [
+        event
+        async for event in runner.run_async(
+            user_id="user",
+            session_id=session.id,
+            new_message=types.Content(role="user", parts=[types.Part(text="hi")]),
+        )
+    ]
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 1
+    gathered = events[-1].actions.state_delta[GATHERED_DATA_STATE_KEY]
+    assert gathered["personal_finance"]["status"] == "ok"
+    assert gathered["public_data"]["output"] == "public_data done"
+    assert gathered["planner"]["status"] == "timeout"
+
+
+async def test_gather_with_deadlines():
+    """Test concurrent tool calls with per-call deadlines and errors"""
+
+    async def value(result, delay):
+        await asyncio.sleep(delay)
+        return result
+
+    async def failing():
+        raise ValueError("boom")
+
+    results = await gather_with_deadlines(
+        {
+            "fast": value(1, 0.01),
+            "slow": value(2, 1),
+            "broken": failing(),
+        },
+        timeout_seconds=0.2,
+    )
+    assert results["fast"].output == 1
+    assert results["slow"].status == "timeout"
+    assert results["broken"].error == "boom"
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds `import src.main` may take in a fresh interpreter. Generous, as
+# machines vary, but well under the ~6 s it took with the ADK runtime in
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "3.0"))
+
+# Loaded by the agent warm-up after startup or on first use, never on import
+DEFERRED_MODULES = ("google.adk", "google.genai", "src.agents", "tkinter", "turtle")
+
+
+def _import_main(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import src.main; {code}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_app_import_defers_the_agent_runtime():
+    """Test that importing the app loads no ADK, model or agent modules"""
+    result = _import_main(
+        "import sys; print('\\n'.join(m for m in sys.modules "
+        f"if m.startswith({DEFERRED_MODULES!r})))"
+    )
+    assert result.stdout.split() == []
+
+
+def test_app_import_within_budget():
+    """Test the cumulative import time of src.main against the budget"""
+    result = _import_main("pass")
+    # Lines look like "import time: self | cumulative | module", in us
+    main_line = next(
+        line for line in result.stderr.splitlines() if line.endswith("| src.main")
+    )
+    seconds = int(main_line.split("|")[1]) / 1e6
+    assert (
+        seconds < IMPORT_BUDGET_SECONDS
+    ), f"import src.main took {seconds:.2f}s, budget {IMPORT_BUDGET_SECONDS}s"
+
+
+async def test_failed_warm_up_is_kept_and_logged(monkeypatch):
+    """Test that the warm-up task is held on app.state and its error logged"""
+    import asyncio
+    import logging
+
+    from src import main
+    from src.services import runner_manager_service
+
+    def broken_runtime():
+        raise RuntimeError("no agent today")
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logging.getLogger("src.main").addHandler(handler)
+    monkeypatch.setenv("AGENT_WARMUP", "true")
+    monkeypatch.setattr(runner_manager_service, "load_agent_runtime", broken_runtime)
+    try:
+        async with main.lifespan(main.app):
+            await asyncio.wait([main.app.state.warmup_task])
+            await asyncio.sleep(0)
+    finally:
+        logging.getLogger("src.main").removeHandler(handler)
+
+    failures = [r for r in records if r.getMessage().startswith("Agent warm-up")]
+    assert [r.getMessage() for r in failures] == [
+        "Agent warm-up failed: no agent today"
+    ]
+    assert failures[0].exc_info is not None
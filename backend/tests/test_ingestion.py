@@ -0,0 +1,132 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+from src.models.artifact import (
+    Artifact,
+    ArtifactSource,
+    ArtifactStatus,
+    ArtifactType,
+)
+from src.services import ingestion_service as ingestion_module
+from src.services.artifact_storage import LocalArtifactStorage
+from src.services.ingestion_service import IngestionService
+from src.utils.statement_parser import (
+    MissingParserError,
+    parse_amount,
+    transactions_from_rows,
+    transactions_from_text,
+)
+
+STATEMENT_CSV = b"""Account Statement
+Txn Date,Narration,Withdrawal Amt.,Deposit Amt.,Closing Balance
+01/04/2024,UPI-SWIGGY-ORDER,450.00,,10550.00
+02/04/2024,SALARY APRIL,,50000.00,60550.00
+03/04/2024,AMAZON PAY,"1,299.00",,59251.00
+"""
+
+
+class InMemoryArtifactRepository:
+    def __init__(self, artifact: Artifact):
+        self.artifact = artifact
+
+    async def get_artifact_by_user(self, artifact_id, user_id):
+        return self.artifact
+
+    async def update_artifact(self, artifact_id, user_id, update):
+        for field, value in update.model_dump(exclude_none=True).items():
+            setattr(self.artifact, field, value)
+        return self.artifact
+
+    async def set_metadata_entry(self, artifact_id, user_id, key, value, status=None):
+        self.artifact.metadata = {**(self.artifact.metadata or {}), key: value}
+        if status is not None:
+            self.artifact.status = status
+        return self.artifact
+
+
+def test_parsers_normalize_transactions():
+    """Test header detection, signed amounts and categories"""
+    rows = [line.split(",") for line in STATEMENT_CSV.decode().splitlines()]
+    rows[4] = ["03/04/2024", "AMAZON PAY", "1299.00", "", "59251.00"]
+    columns = transactions_from_rows(rows)
+    assert columns["date"] == ["2024-04-01", "2024-04-02", "2024-04-03"]
+    assert columns["amount"] == [-450.0, 50000.0, -1299.0]
+    assert columns["category"] == ["food", "salary", "shopping"]
+
+    columns = transactions_from_text(
+        [
+            "01-Apr-2024 Opening balance 11,000.00",
+            "02-Apr-2024 ZOMATO ORDER 500.00 10,500.00",
+            "03-Apr-2024 REFUND 200.00 10,700.00",
+        ]
+    )
+    assert columns["amount"] == [-500.0, 200.0]
+    assert parse_amount("(99.00)") == -99.0
+    assert parse_amount("₹ 1,500.50 Cr") == 1500.5
+
+
+async def test_ingestion_parses_once_per_content(tmp_path):
+    """Test process-pool ingestion, status updates and the result cache"""
+    storage = LocalArtifactStorage(str(tmp_path))
+    await storage.write_bytes("blobs/ab/abc", STATEMENT_CSV)
+    artifact = Artifact(
+        id="art",
+        session_id="sess",
+        user_id="user",
+        message_id="msg",
+        artifact_type=ArtifactType.CSV,
+        source=ArtifactSource.USER_UPLOAD,
+        title="statement.csv",
+        metadata={"storage_key": "blobs/ab/abc"},
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+        content_hash="abc",
+    )
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        service = IngestionService(
+            InMemoryArtifactRepository(artifact), storage, executor
+        )
+        ingested = await service.ingest_artifact("art", "user")
+        assert ingested.status == ArtifactStatus.COMPLETED
+        summary = ingested.metadata["ingestion"]
+        assert summary["row_count"] == 3
+        assert summary["total_debit"] == 1749.0
+        assert summary["cached"] is False
+
+        document = await service.get_ingested_document(ingested)
+        assert document["transactions"]["description"][1] == "SALARY APRIL"
+
+        ingested = await service.ingest_artifact("art", "user")
+        assert ingested.metadata["ingestion"]["cached"] is True
+
+
+async def test_ingestion_without_a_parser_keeps_the_upload(tmp_path, monkeypatch):
+    """Test that a missing optional parser skips ingestion rather than failing"""
+
+    def parse_without_pypdf(path, artifact_type):
+        raise MissingParserError("PDF ingestion requires the pypdf package")
+
+    monkeypatch.setattr(ingestion_module, "parse_document", parse_without_pypdf)
+    storage = LocalArtifactStorage(str(tmp_path))
+    await storage.write_bytes("blobs/ab/abc", b"%PDF-1.4")
+    artifact = Artifact(
+        id="art",
+        session_id="sess",
+        user_id="user",
+        message_id="msg",
+        artifact_type=ArtifactType.PDF,
+        source=ArtifactSource.USER_UPLOAD,
+        title="statement.pdf",
+        metadata={"storage_key": "blobs/ab/abc"},
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+        content_hash="abc",
+    )
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        service = IngestionService(
+            InMemoryArtifactRepository(artifact), storage, executor
+        )
+        ingested = await service.ingest_artifact("art", "user")
+
+    assert ingested.status == ArtifactStatus.COMPLETED
+    assert "pypdf" in ingested.metadata["ingestion"]["skipped"]
@@ -0,0 +1,51 @@
+from benchmarks.environment import OFFLINE_ENVIRONMENT, OfflineEnvironment
+from loadtest.generator import LoadGenerator, Recorder, format_saturation
+from loadtest.profiles import TrafficProfile
+from src.config.firebase_config import cleanup_firebase
+
+
+def test_recorder_counts_stalls_and_errors():
+    """Test stream stall accounting and per-operation error counts"""
+    recorder = Recorder(stall_threshold=0.5)
+    recorder.record_stream(0.2, [0.1, 0.7, 0.9])
+    recorder.record_stream(0.3, [])
+    recorder.record("chat", 1.0)
+    recorder.record("chat", 2.0, "HTTP 500")
+
+    report = recorder.report(users=1, duration=2.0)
+    assert report.chat["stalls"] == 2
+    assert report.chat["max_stall_ms"]["max"] == 900.0
+    assert report.operations["chat"]["errors"] == 1
+    assert report.errors == {"chat: HTTP 500": 1}
+
+
+async def test_load_generator_drives_the_api(tmp_path, monkeypatch):
+    """Test a short stage of every traffic kind against the in-memory app"""
+    # Set here so they are undone after the test
+    for name, value in OFFLINE_ENVIRONMENT.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setenv("ARTIFACT_STORAGE_PATH", str(tmp_path / "artifacts"))
+    monkeypatch.setenv("TRANSACTION_STORE_PATH", str(tmp_path / "transactions"))
+    env = OfflineEnvironment(str(tmp_path))
+    try:
+        tokens = [await env.create_user() for _ in range(2)]
+        profile = TrafficProfile(
+            name="test",
+            turns=(1, 2),
+            think_time=0.0,
+            upload_probability=1.0,
+            upload_bytes=1024,
+            consent_probability=1.0,
+        )
+        generator = LoadGenerator(env.client, tokens, profile, arrival_rate=20.0)
+        report = await generator.run_stage(users=2, duration=0.3)
+    finally:
+        await env.close()
+        cleanup_firebase()
+
+    assert report.errors == {}
+    assert {"create_session", "chat", "history", "upload", "consent_list"} <= set(
+        report.operations
+    )
+    assert report.chat["first_byte_ms"]["p50"] > 0
+    assert "chat p99" in format_saturation([report])
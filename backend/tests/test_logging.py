@@ -0,0 +1,106 @@
+import io
+import json
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.observability.logs import (
+    ContextFilter,
+    JsonFormatter,
+    RedactionFilter,
+    RequestIdMiddleware,
+    SamplingFilter,
+    redact,
+    request_id_var,
+)
+
+
+def _json_logger(name: str) -> tuple[logging.Logger, io.StringIO]:
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    for log_filter in (SamplingFilter(), ContextFilter(), RedactionFilter()):
+        handler.addFilter(log_filter)
+    handler.setFormatter(JsonFormatter())
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger, stream
+
+
+def test_records_are_json_with_redacted_amounts_and_tokens():
+    """Test that tokens and amounts never reach the log output"""
+    logger, stream = _json_logger("tests.redaction")
+    token = request_id_var.set("req-1")
+    try:
+        logger.info(
+            "Spent %s at %s with Bearer %s",
+            "₹ 1,299.00",
+            "AMAZON",
+            "eyJhbGciOi.eyJzdWIiOi.c2lnbmF0dXJl",
+            extra={
+                "balance": 59251.0,
+                "rows": [{"amount": -450.0, "note": "paid 450.00"}],
+            },
+        )
+    finally:
+        request_id_var.reset(token)
+
+    entry = json.loads(stream.getvalue())
+    assert entry["message"] == "Spent [AMOUNT] at AMAZON with Bearer [TOKEN]"
+    assert entry["severity"] == "INFO"
+    assert entry["request_id"] == "req-1"
+    assert entry["balance"] == "[REDACTED]"
+    assert entry["rows"] == [{"amount": "[REDACTED]", "note": "paid [AMOUNT]"}]
+    assert redact("Closing balance 1,50,000 after 3 items") == (
+        "Closing balance [AMOUNT] after 3 items"
+    )
+    assert redact('{"debit": 99.5, "total": 3} 1,200 INR') == (
+        '{"debit": [AMOUNT], "total": 3} [AMOUNT]'
+    )
+
+
+def test_redaction_leaves_other_numbers_alone():
+    """Test that versions, durations and tracebacks are not masked"""
+    text = "python3.11.7 took 12.50 ms from 10.0.12.34, 1,024 rows"
+    assert redact(text) == text
+
+    logger, stream = _json_logger("tests.tracebacks")
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger.exception("Failed after 2.50 s")
+    entry = json.loads(stream.getvalue())
+    assert entry["message"] == "Failed after 2.50 s"
+    assert "[AMOUNT]" not in entry["exception"]
+    assert __file__ in entry["exception"]
+
+
+def test_sampled_records_are_dropped_at_their_rate():
+    """Test that records with a sample rate are kept only at that rate"""
+    logger, stream = _json_logger("tests.sampling")
+    for _ in range(20):
+        logger.debug("Agent event", extra={"sample_rate": 0.0})
+    logger.debug("Agent event", extra={"sample_rate": 1.0})
+    assert len(stream.getvalue().splitlines()) == 1
+
+
+def test_request_ids_are_reused_or_generated():
+    """Test that responses carry the request id that the logs used"""
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"request_id": request_id_var.get()}
+
+    client = TestClient(app)
+    response = client.get("/ping", headers={"X-Request-ID": "lb-abc123"})
+    assert response.headers["x-request-id"] == "lb-abc123"
+    assert response.json()["request_id"] == "lb-abc123"
+
+    response = client.get("/ping", headers={"X-Request-ID": "bad id\n"})
+    generated = response.headers["x-request-id"]
+    assert generated != "bad id\n" and len(generated) == 32
+    assert response.json()["request_id"] == generated
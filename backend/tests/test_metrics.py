@@ -0,0 +1,86 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from src.apis import health
+from src.observability.metrics import MetricsMiddleware
+from src.repositories.base_repository import BaseRepository
+
+
+class FakeCollection:
+    def document(self, item_id):
+        raise RuntimeError("unavailable")
+
+
+class FakeDb:
+    def collection(self, name):
+        return FakeCollection()
+
+
+class WidgetRepository(BaseRepository):
+    def _get_key(self, item):
+        return item.id
+
+    def _validate_create_item(self, item):
+        return True
+
+    def _validate_update_item(self, item):
+        return True
+
+    async def get_widget_count(self) -> int:
+        return 3
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_requests_are_timed_by_route_template():
+    """Test that request latency is labelled with the route, not the URL"""
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(health.router)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    before = _sample("http_request_duration_seconds_count", **labels)
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/nowhere")
+    assert _sample("http_request_duration_seconds_count", **labels) == before + 2
+    assert _sample(
+        "http_request_duration_seconds_count",
+        method="GET",
+        route="unmatched",
+        status="404",
+    )
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'route="/items/{item_id}"' in response.text
+
+
+async def test_repository_methods_are_timed():
+    """Test that own and inherited repository methods report per class"""
+    repository = WidgetRepository("widgets", db=FakeDb())
+    assert await repository.get_widget_count() == 3
+    assert (
+        _sample(
+            "firestore_repository_call_duration_seconds_count",
+            repository="WidgetRepository",
+            method="get_widget_count",
+        )
+        == 1
+    )
+
+    try:
+        await repository.get_by_id("w1")
+    except RuntimeError:
+        pass
+    labels = {"repository": "WidgetRepository", "method": "get_by_id"}
+    assert _sample("firestore_repository_call_duration_seconds_count", **labels) == 1
+    assert _sample("firestore_repository_call_errors_total", **labels) == 1
@@ -0,0 +1,148 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.auth.firebase_auth import get_current_user
+from src.dependencies.services import get_artifact_service
+from src.main import app
+from src.models.artifact import Artifact, ArtifactSource, ArtifactType
+from src.models.user import User
+from src.repositories import ArtifactRepository
+from src.services import preview_service as preview_module
+from src.services.artifact_service import ArtifactService
+from src.services.artifact_storage import LocalArtifactStorage
+from src.services.preview_service import PreviewService
+from src.testing import InMemoryFirestore
+from src.utils.preview_renderer import MissingRendererError, render_preview
+from tests.test_ingestion import InMemoryArtifactRepository
+
+
+def _image_artifact() -> Artifact:
+    return Artifact(
+        id="art",
+        session_id="sess",
+        user_id="user",
+        message_id="msg",
+        artifact_type=ArtifactType.IMAGE,
+        source=ArtifactSource.USER_UPLOAD,
+        title="receipt.jpg",
+        metadata={"storage_key": "blobs/ab/abc"},
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+        content_hash="abc",
+    )
+
+
+async def test_previews_render_once_per_content(tmp_path, monkeypatch):
+    """Test that previews are stored by content hash and recorded in metadata"""
+    renders = []
+
+    def fake_render(path, artifact_type):
+        renders.append((path, artifact_type))
+        return {"data": b"webp", "width": 32, "height": 24, "mime_type": "image/webp"}
+
+    monkeypatch.setattr(preview_module, "render_preview", fake_render)
+    storage = LocalArtifactStorage(str(tmp_path))
+    await storage.write_bytes("blobs/ab/abc", b"original")
+    artifact = _image_artifact()
+    repository = InMemoryArtifactRepository(artifact)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        service = PreviewService(repository, storage, executor)
+        previewed = await service.generate_preview("art", "user")
+        preview = previewed.metadata["preview"]
+        assert preview["key"] == ArtifactService.preview_key("blobs/ab/abc")
+        assert (preview["width"], preview["size"], preview["cached"]) == (32, 4, False)
+        assert await storage.read_bytes(preview["key"]) == b"webp"
+
+        previewed = await service.generate_preview("art", "user")
+        assert previewed.metadata["preview"]["cached"] is True
+        assert renders == [(storage.local_path("blobs/ab/abc"), "image")]
+
+    content = await ArtifactService(None, None, None, storage).get_preview_content(
+        previewed
+    )
+    assert content.etag == '"abc-preview"'
+    assert content.file_path == storage.local_path(preview["key"])
+
+
+async def test_preview_failure_keeps_artifact_status(tmp_path, monkeypatch):
+    """Test that a render error is recorded without failing the upload"""
+
+    def broken_render(path, artifact_type):
+        raise RuntimeError("Previews require the Pillow package")
+
+    monkeypatch.setattr(preview_module, "render_preview", broken_render)
+    storage = LocalArtifactStorage(str(tmp_path))
+    await storage.write_bytes("blobs/ab/abc", b"original")
+    artifact = _image_artifact()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        service = PreviewService(
+            InMemoryArtifactRepository(artifact), storage, executor
+        )
+        previewed = await service.generate_preview("art", "user")
+
+    assert "Pillow" in previewed.metadata["preview"]["error"]
+    assert previewed.status == artifact.status
+    assert (
+        await ArtifactService(None, None, None, storage).get_preview_content(previewed)
+        is None
+    )
+
+
+async def test_preview_skipped_without_renderer(tmp_path, monkeypatch):
+    """Test that a missing optional renderer records nothing"""
+
+    def render_without_pillow(path, artifact_type):
+        raise MissingRendererError("Previews require the Pillow package")
+
+    monkeypatch.setattr(preview_module, "render_preview", render_without_pillow)
+    storage = LocalArtifactStorage(str(tmp_path))
+    await storage.write_bytes("blobs/ab/abc", b"original")
+    artifact = _image_artifact()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        service = PreviewService(
+            InMemoryArtifactRepository(artifact), storage, executor
+        )
+        previewed = await service.generate_preview("art", "user")
+
+    assert "preview" not in previewed.metadata
+    assert previewed.status == artifact.status
+
+
+async def test_preview_of_someone_elses_artifact_is_not_found(tmp_path):
+    """Test that a missing or foreign artifact's preview is a 404, not a 500"""
+    repository = ArtifactRepository(db=InMemoryFirestore())
+    await repository.create(_image_artifact())
+    service = ArtifactService(
+        repository, None, None, LocalArtifactStorage(str(tmp_path))
+    )
+    app.dependency_overrides[get_current_user] = lambda: User(uid="other")
+    app.dependency_overrides[get_artifact_service] = lambda: service
+    try:
+        client = TestClient(app)
+        for url in (
+            "/sessions/sess/artifacts/art/preview",
+            "/sessions/sess/artifacts/missing/preview",
+        ):
+            response = client.get(url)
+            assert response.status_code == 404
+            assert response.json()["detail"] == "Artifact not found"
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_render_image_preview(tmp_path):
+    """Test that images are scaled to fit the preview size"""
+    Image = pytest.importorskip("PIL.Image")
+    path = tmp_path / "photo.png"
+    Image.new("RGB", (1200, 600), "white").save(path)
+
+    preview = render_preview(str(path), "image", max_size=100)
+    assert (preview["width"], preview["height"]) == (100, 50)
+    assert Image.open(io.BytesIO(preview["data"])).format == "WEBP"
@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.apis import profiling
+from src.auth.firebase_auth import get_current_user
+from src.models.user import User
+from src.observability.profiling import (
+    LoopLagMonitor,
+    MemoryProfiler,
+    ProfilingMiddleware,
+    sample_event_loop,
+)
+
+
+def _busy(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def _block_loop(seconds: float) -> None:
+    _busy(seconds)
+
+
+async def test_sampling_and_lag_monitor_find_the_blocking_coroutine():
+    """Test that loop samples and stall captures name the busy coroutine"""
+    monitor = LoopLagMonitor(interval=0.02, slow_threshold=0.05)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        sampling = asyncio.create_task(sample_event_loop(0.4, interval=0.002))
+        await asyncio.sleep(0.05)
+        await _block_loop(0.3)
+        stacks = await sampling
+    finally:
+        await monitor.stop()
+
+    busy_line = next(line for line in stacks.splitlines() if "_busy" in line)
+    assert "_block_loop (test_profiling.py" in busy_line
+    assert int(busy_line.rsplit(" ", 1)[1]) > 10
+
+    stats = monitor.stats()
+    assert stats["max_lag"] >= 0.2
+    assert any("_busy" in stall["stack"] for stall in stats["slow_callbacks"])
+    assert "_busy" in monitor.slow_callbacks_collapsed()
+
+
+def test_memory_diff_points_at_growth():
+    """Test that allocation growth is attributed to the allocating line"""
+    profiler = MemoryProfiler(frames=4)
+    profiler.take_baseline()
+    try:
+        retained = [bytes(1024) for _ in range(2000)]
+        stats = profiler.diff(top=5)
+    finally:
+        profiler.stop()
+
+    top = MemoryProfiler.diff_json(stats)[0]
+    assert top["size_diff"] >= 2000 * 1024
+    assert "test_profiling.py" in top["traceback"][-1]
+    assert "test_profiling.py" in MemoryProfiler.diff_collapsed(stats)
+    assert len(retained) == 2000
+
+
+def test_profiling_routes_are_opt_in_and_admin_only(monkeypatch):
+    """Test that the routes are hidden when disabled and need an admin"""
+    app = FastAPI()
+    app.include_router(profiling.router, prefix="/admin/profiling")
+    app.dependency_overrides[get_current_user] = lambda: User(uid="ops")
+    client = TestClient(app)
+
+    monkeypatch.setenv("PROFILING_ENABLED", "false")
+    assert client.get("/admin/profiling/loop").status_code == 404
+
+    monkeypatch.setenv("PROFILING_ENABLED", "true")
+    monkeypatch.setenv("ADMIN_UIDS", "someone-else")
+    assert client.get("/admin/profiling/loop").status_code == 403
+
+    monkeypatch.setenv("ADMIN_UIDS", "someone-else, ops")
+    response = client.get("/admin/profiling/loop")
+    assert response.status_code == 200
+    assert response.json()["running"] is False
+
+
+def test_profile_header_is_checked_off_the_loop_and_only_when_enabled(monkeypatch):
+    """Test that X-Profile verifies tokens in a thread, and only when enabled"""
+    from src.config import firebase_config
+
+    verified_on = []
+
+    class FakeAuth:
+        def verify_id_token(self, token):
+            try:
+                verified_on.append(asyncio.get_running_loop())
+            except RuntimeError:
+                verified_on.append(None)
+            return {"uid": "ops"}
+
+    monkeypatch.setattr(firebase_config, "get_auth", lambda: FakeAuth())
+    monkeypatch.setenv("ADMIN_UIDS", "ops")
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+    app.get("/ping")(lambda: {"ok": True})
+    client = TestClient(app)
+    headers = {"X-Profile": "cprofile", "Authorization": "Bearer token"}
+
+    monkeypatch.setenv("PROFILING_ENABLED", "false")
+    response = client.get("/ping", headers=headers)
+    assert "x-profile-id" not in response.headers
+    assert verified_on == []
+
+    monkeypatch.setenv("PROFILING_ENABLED", "true")
+    response = client.get("/ping", headers=headers)
+    assert response.headers["x-profile-id"]
+    # Verified in a worker thread, where no event loop runs
+    assert verified_on == [None]
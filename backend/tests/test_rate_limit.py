@@ -0,0 +1,45 @@
+from src.models.user import User
+from src.services.rate_limit_service import (
+    InMemoryRateLimitStore,
+    RateLimitService,
+    RateLimitTier,
+)
+
+
+def _service() -> RateLimitService:
+    tiers = {
+        "standard": RateLimitTier(
+            requests_per_minute=60, burst=2, tokens_per_window=1000
+        ),
+    }
+    return RateLimitService(InMemoryRateLimitStore(), tiers)
+
+
+async def test_request_bucket_allows_burst_then_limits():
+    """Test that requests beyond the burst are limited with a retry delay"""
+    service = _service()
+    user = User(uid="user")
+
+    assert (await service.check(user)).allowed
+    assert (await service.check(user)).allowed
+    decision = await service.check(user)
+    assert not decision.allowed
+    assert decision.limit == "requests"
+    assert 0 < decision.retry_after <= 1
+    assert service.retry_after_header(decision) == "1"
+
+    # Buckets are per user
+    assert (await service.check(User(uid="other"))).allowed
+
+
+async def test_token_window_limits_until_usage_expires():
+    """Test that a spent token budget limits the user and unknown tiers fall back"""
+    service = _service()
+    user = User(uid="user", tier="unknown")
+
+    await service.record_tokens(user.uid, 1200, tier=user.tier)
+    decision = await service.check(user)
+    assert not decision.allowed
+    assert decision.limit == "tokens"
+    assert decision.tier == "standard"
+    assert 0 < decision.retry_after <= 3600
@@ -0,0 +1,66 @@
+from datetime import datetime
+
+from src.models.message import MessageEvent
+from src.services.response_cache_service import (
+    ResponseCacheService,
+    normalize_query,
+)
+
+
+def _events(text: str):
+    return [
+        MessageEvent(
+            event_id="event-1",
+            timestamp=datetime.now(),
+            sequence_number=1,
+            author="root_agent",
+            content=text,
+        )
+    ]
+
+
+def test_normalize_query():
+    """Test that punctuation, case and spacing don't change the cache key"""
+    assert normalize_query("  What is an SIP?? ") == "what is an sip"
+
+
+def test_exact_and_similar_lookup():
+    """Test exact hits and embedding-similarity hits"""
+    cache = ResponseCacheService(max_entries=4, similarity_threshold=0.7)
+    cache.store("How does the old vs new tax regime compare?", _events("answer"))
+
+    exact = cache.lookup("how does the OLD vs new tax regime compare")
+    assert exact is not None and exact.exact
+
+    similar = cache.lookup("how does the new vs old tax regime compare")
+    assert similar is not None and not similar.exact
+    assert similar.entry.events[0].content == "answer"
+    assert similar.entry.hit_count == 2
+
+    assert cache.lookup("what is a mutual fund") is None
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_personal_turns_are_not_cacheable():
+    """Test that flagged or personal-looking turns bypass the cache"""
+    cache = ResponseCacheService()
+    assert cache.is_cacheable("what is an SIP", requires_personal_data=False)
+    assert not cache.is_cacheable("what is an SIP", requires_personal_data=True)
+    assert not cache.is_cacheable("should I sell my shares", False)
+    assert not cache.is_cacheable("is 12% a good return", False)
+
+
+def test_ttl_and_eviction():
+    """Test that expired entries miss and the LRU entry is evicted when full"""
+    cache = ResponseCacheService(max_entries=2, ttl_seconds=0)
+    cache.store("what is an sip", _events("a"))
+    assert cache.lookup("what is an sip") is None
+
+    cache = ResponseCacheService(max_entries=2)
+    cache.store("what is an sip", _events("a"))
+    cache.store("what is a bond", _events("b"))
+    cache.lookup("what is an sip")
+    cache.store("what is an etf", _events("c"))
+    assert cache.lookup("what is a bond") is None
+    assert cache.lookup("what is an sip") is not None
+    assert cache.evictions == 1
@@ -0,0 +1,78 @@
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from src.agents.response_router import (
+    FORMATTER_ROUTING_STATE_KEY,
+    FormatterRouterAgent,
+    classify_response,
+)
+
+
+class StaticAgent(BaseAgent):
+    """Agent that answers every turn with a fixed text"""
+
+    text: str
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=self.text)]),
+        )
+
+
+async def _run_turn(answer: str, question: str):
+    agent = FormatterRouterAgent(
+        name="router",
+        answer_agent=StaticAgent(name="main", text=answer),
+        formatter_agent=StaticAgent(name="formatter", text="formatted"),
+    )
+    runner = InMemoryRunner(agent=agent, app_name="test")
+    session = await runner.session_service.create_session(
+        app_name="test", user_id="user"
+    )
+    events = []
+    async for event in runner.run_async(
+        user_id="user",
+        session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part(text=question)]),
+    ):
+        events.append(event)
+    return events
+
+
+def test_classify_response():
+    """Test the heuristic routing signals"""
+    assert classify_response("what is an SIP", "An SIP is a plan.").route == "skip"
+    table = "| fund | return |\n| A | 12% |\n| B | 9% |"
+    assert classify_response("compare funds", table).route == "format"
+    assert classify_response("show me a chart", "Sure.").route == "format"
+    assert (
+        classify_response("plan", "Could you share your monthly income?").route
+        == "format"
+    )
+
+
+async def test_router_skips_formatter_for_plain_text():
+    """Test that plain answers don't run the formatter"""
+    events = await _run_turn("An SIP is a plan.", "what is an SIP")
+    assert [event.author for event in events] == ["main", "router"]
+    decision = events[-1].actions.state_delta[FORMATTER_ROUTING_STATE_KEY]
+    assert decision["route"] == "skip"
+
+
+async def test_router_runs_formatter_when_useful():
+    """Test that structured answers go through the formatter"""
+    events = await _run_turn("Here you go.", "show a table of fund returns")
+    assert [event.author for event in events] == ["main", "formatter", "router"]
+    decision = events[-1].actions.state_delta[FORMATTER_ROUTING_STATE_KEY]
+    assert decision["route"] == "format"
+    assert decision["formatter_latency_ms"] is not None
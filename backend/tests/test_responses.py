@@ -0,0 +1,48 @@
+import json
+import math
+from datetime import datetime
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from benchmarks.environment import OfflineEnvironment
+from src.apis.responses import PydanticJSONResponse
+from src.config.setup_app import setup_app
+from src.models.message import MessageResponse, MessageRole
+
+
+def test_pydantic_json_response_matches_the_default_encoding():
+    """Test that models encode as FastAPI's jsonable_encoder path did"""
+    created_at = datetime(2026, 1, 2, 3, 4, 5, 600000)
+    messages = [
+        MessageResponse.model_validate(
+            {
+                "id": "m1",
+                "session_id": "s1",
+                "user_id": "u1",
+                "role": MessageRole.ASSISTANT,
+                "created_at": created_at,
+                "updated_at": created_at.isoformat(),
+                "parent_message_id": None,
+                "events": OfflineEnvironment._assistant_events(created_at),
+                "response_metadata": {"authors": ["root_agent"], "score": 0.5},
+            }
+        )
+    ]
+
+    fast = PydanticJSONResponse(messages)
+    default = JSONResponse(jsonable_encoder(messages))
+    assert json.loads(fast.body) == json.loads(default.body)
+    assert fast.headers["content-type"] == "application/json"
+    assert json.loads(PydanticJSONResponse({"cost": math.nan}).body) == {"cost": None}
+
+
+def test_routes_default_to_the_pydantic_response():
+    """Test that every API route encodes with PydanticJSONResponse"""
+    app = FastAPI()
+    setup_app(app)
+    routes = [route for route in app.routes if isinstance(route, APIRoute)]
+    assert routes
+    assert all(route.response_class is PydanticJSONResponse for route in routes)
@@ -0,0 +1,166 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.artifact import Artifact, ArtifactSource, ArtifactType
+from src.models.user import User, UserConsents
+from src.repositories import ArtifactBlobRepository, ArtifactRepository
+from src.services import retention_service
+from src.services.artifact_service import ArtifactService
+from src.services.artifact_storage import LocalArtifactStorage
+from src.services.ingestion_service import IngestionService
+from src.services.retention_service import RetentionService
+from src.testing import InMemoryFirestore
+
+
+class ExpiringArtifactRepository:
+    """Serves expired artifacts in pages, like the indexed range query"""
+
+    def __init__(self, artifacts):
+        self.artifacts = {artifact.id: artifact for artifact in artifacts}
+        self.page_sizes = []
+
+    async def delete_expired_artifacts(self, now=None, limit=200):
+        expired = sorted(
+            (a for a in self.artifacts.values() if a.retention_expires_at <= now),
+            key=lambda a: a.retention_expires_at,
+        )[:limit]
+        for artifact in expired:
+            del self.artifacts[artifact.id]
+        self.page_sizes.append(len(expired))
+        return expired
+
+
+class SingleUserRepository:
+    def __init__(self, user):
+        self.user = user
+
+    async def get_user(self, uid):
+        return self.user
+
+
+def _artifact(index: int, expires_at: datetime) -> Artifact:
+    return Artifact(
+        id=f"art-{index}",
+        session_id="sess",
+        user_id="user",
+        message_id="msg",
+        artifact_type=ArtifactType.CSV,
+        source=ArtifactSource.USER_UPLOAD,
+        title=f"{index}.csv",
+        metadata={"storage_key": f"files/{index}.csv"},
+        created_at=expires_at,
+        updated_at=expires_at,
+        retention_expires_at=expires_at,
+    )
+
+
+async def test_sweep_pages_through_expired_artifacts(tmp_path):
+    """Test that a sweep deletes only expired artifacts, page by page, with files"""
+    now = datetime(2024, 6, 1)
+    storage = LocalArtifactStorage(str(tmp_path))
+    artifacts = [_artifact(i, now - timedelta(days=1)) for i in range(25)]
+    artifacts.append(_artifact(99, now + timedelta(days=1)))
+    for artifact in artifacts:
+        await storage.write_bytes(artifact.metadata["storage_key"], b"a,b\n")
+
+    repository = ExpiringArtifactRepository(artifacts)
+    service = ArtifactService(repository, None, None, storage)
+    retention = RetentionService(service, batch_size=10, max_deletes_per_second=1e6)
+
+    assert await retention.sweep(now) == 25
+    assert repository.page_sizes == [10, 10, 5]
+    assert list(repository.artifacts) == ["art-99"]
+    assert await storage.exists("files/99.csv")
+    assert not await storage.exists("files/0.csv")
+
+
+async def test_sweep_releases_only_what_it_deleted(tmp_path):
+    """Test that an artifact deleted during a sweep releases its blob once"""
+    now = datetime(2024, 6, 1)
+    db = InMemoryFirestore()
+    storage = LocalArtifactStorage(str(tmp_path))
+    blobs = ArtifactBlobRepository(db=db)
+    await storage.write_bytes("blobs/ab/abc", b"a,b\n")
+
+    expired = _artifact(1, now - timedelta(days=1))
+    # Same content, kept longer: the blob must outlive the expired artifact
+    kept = _artifact(2, now + timedelta(days=30))
+    for artifact in (expired, kept):
+        artifact.content_hash = "abc"
+        artifact.metadata["storage_key"] = "blobs/ab/abc"
+
+    class RacingRepository(ArtifactRepository):
+        async def get_expired_artifacts(self, now, limit):
+            page = await super().get_expired_artifacts(now, limit)
+            # The user deletes it between the sweep's query and its delete
+            await service.delete_artifact(expired.id, expired.user_id)
+            return page
+
+    repository = RacingRepository(db=db)
+    service = ArtifactService(repository, None, None, storage, blobs)
+    for artifact in (expired, kept):
+        await repository.create(artifact)
+        await blobs.acquire("abc", "blobs/ab/abc", 4)
+
+    assert await service.cleanup_expired_artifacts(now=now) == 0
+    assert (await blobs.get_by_id("abc")).ref_count == 1
+    assert await storage.exists("blobs/ab/abc")
+
+
+async def test_last_release_deletes_the_parsed_statement(tmp_path):
+    """Test that a statement's parse result goes with its last reference"""
+    now = datetime(2024, 6, 1)
+    db = InMemoryFirestore()
+    storage = LocalArtifactStorage(str(tmp_path))
+    blobs = ArtifactBlobRepository(db=db)
+    result_key = IngestionService.result_key("abc")
+    await storage.write_bytes("blobs/ab/abc", b"a,b\n")
+    await storage.write_bytes(result_key, b"{}")
+
+    first = _artifact(1, now - timedelta(days=1))
+    second = _artifact(2, now - timedelta(days=1))
+    repository = ArtifactRepository(db=db)
+    service = ArtifactService(repository, None, None, storage, blobs)
+    for artifact in (first, second):
+        artifact.content_hash = "abc"
+        artifact.metadata["storage_key"] = "blobs/ab/abc"
+        await repository.create(artifact)
+        await blobs.acquire("abc", "blobs/ab/abc", 4)
+
+    assert await service.delete_artifact(first.id, first.user_id)
+    assert await storage.exists(result_key)
+    assert await service.delete_artifact(second.id, second.user_id)
+    assert not await storage.exists(result_key)
+    assert not await storage.exists("blobs/ab/abc")
+
+
+async def test_expiry_follows_retention_consent():
+    """Test that new artifacts expire after the user's retention period"""
+    user = User(uid="user", consents=UserConsents(retention_days=7))
+    service = ArtifactService(None, None, SingleUserRepository(user), None)
+    expires_at = await service._retention_expires_at("user")
+    assert (
+        timedelta(days=6, hours=23)
+        < expires_at - datetime.utcnow()
+        <= timedelta(days=7)
+    )
+
+    user.consents.retention_days = 0
+    assert await service._retention_expires_at("user") is None
+
+
+@pytest.mark.skipif(retention_service.fcntl is None, reason="needs fcntl")
+async def test_one_worker_sweeps_at_a_time(tmp_path):
+    """Test that the sweep lock admits one sweeper and passes on at stop"""
+    lock_path = str(tmp_path / "retention.lock")
+    first = RetentionService(None, lock_path=lock_path)
+    second = RetentionService(None, lock_path=lock_path)
+
+    assert first.holds_sweep_lock()
+    assert first.holds_sweep_lock()
+    assert not second.holds_sweep_lock()
+
+    await first.stop()
+    assert second.holds_sweep_lock()
+    await second.stop()
@@ -0,0 +1,125 @@
+import json
+
+from google.adk.agents import LlmAgent
+
+from src.models.chat_session import ChatSessionCreate
+from src.repositories import ChatSessionRepository, MessageRepository
+from src.services.message_service import MessageService
+from src.services.response_cache_service import ResponseCacheService
+from src.services.runner_manager_service import RunnerManagerService
+from src.testing import FakeLlm, InMemoryFirestore
+
+
+def _manager(db, **kwargs) -> RunnerManagerService:
+    """A runner manager as one worker process would build it"""
+    return RunnerManagerService(
+        MessageService(MessageRepository(db=db)),
+        agent=LlmAgent(name="root_agent", model=FakeLlm.answering("Noted.")),
+        **kwargs,
+    )
+
+
+async def _turn(manager, session_id: str, text: str, **kwargs) -> None:
+    async for _ in manager.process_user_message(
+        user_id="u1",
+        session_id=session_id,
+        message_content=text,
+        backend_session_id=session_id,
+        **kwargs,
+    ):
+        pass
+
+
+async def _history(manager, session_id: str):
+    session = await manager.session_service.get_session(
+        app_name=manager.app_name, user_id="u1", session_id=session_id
+    )
+    return [event.content.parts[0].text for event in session.events]
+
+
+async def test_turns_continue_the_adk_session(monkeypatch):
+    """Test that a second turn keeps the first one's history"""
+    monkeypatch.setenv("AGENT_ENGINE_ID", "test")
+    db = InMemoryFirestore()
+    session = await ChatSessionRepository(db=db).create_session(
+        ChatSessionCreate(user_id="u1")
+    )
+    manager = _manager(db)
+    await _turn(manager, session.id, "first")
+    await _turn(manager, session.id, "second")
+
+    assert await _history(manager, session.id) == [
+        "first",
+        "Noted.",
+        "second",
+        "Noted.",
+    ]
+
+
+async def test_database_sessions_are_shared_between_workers(tmp_path, monkeypatch):
+    """Test that a conversation continues on another worker's manager"""
+    monkeypatch.setenv("AGENT_ENGINE_ID", "test")
+    monkeypatch.setenv("ADK_SESSION_BACKEND", "database")
+    monkeypatch.setenv("ADK_SESSION_DB_URL", f"sqlite:///{tmp_path / 'adk.db'}")
+    db = InMemoryFirestore()
+    session = await ChatSessionRepository(db=db).create_session(
+        ChatSessionCreate(user_id="u1")
+    )
+    first_worker, second_worker = _manager(db), _manager(db)
+
+    await _turn(first_worker, session.id, "first")
+    await _turn(second_worker, session.id, "second")
+
+    assert await _history(first_worker, session.id) == [
+        "first",
+        "Noted.",
+        "second",
+        "Noted.",
+    ]
+
+
+async def test_only_first_turns_are_shared_through_the_cache(monkeypatch):
+    """Test that answers built on earlier turns never reach the cache"""
+    monkeypatch.setenv("AGENT_ENGINE_ID", "test")
+    db = InMemoryFirestore()
+    session = await ChatSessionRepository(db=db).create_session(
+        ChatSessionCreate(user_id="u1")
+    )
+    cache = ResponseCacheService()
+    manager = _manager(db, response_cache=cache)
+    await _turn(
+        manager, session.id, "what is a mutual fund", requires_personal_data=False
+    )
+    await _turn(manager, session.id, "what is an etf", requires_personal_data=False)
+
+    assert cache.lookup("what is a mutual fund") is not None
+    assert cache.lookup("what is an etf") is None
+
+
+async def test_cached_replies_carry_no_trace_of_the_first_asker(monkeypatch):
+    """Test that a replayed answer is stamped with the new user's session"""
+    monkeypatch.setenv("AGENT_ENGINE_ID", "test")
+    db = InMemoryFirestore()
+    manager = _manager(db, response_cache=ResponseCacheService())
+    await _turn(manager, "first", "what is a mutual fund", requires_personal_data=False)
+    async for _ in manager.process_user_message(
+        user_id="u2",
+        session_id="second",
+        message_content="what is a mutual fund",
+        backend_session_id="second",
+        requires_personal_data=False,
+    ):
+        pass
+
+    replayed = next(
+        doc.to_dict()
+        for doc in db.collection("messages").stream()
+        if doc.to_dict()["user_id"] == "u2" and doc.to_dict()["events"]
+    )
+    assert replayed["metadata"]["cache_hit"] is True
+    assert replayed["metadata"]["adk_session_id"] == "second"
+    assert "first" not in json.dumps(replayed, default=str)
+    for event in replayed["events"]:
+        assert event["metadata"] == {"adk_session_id": "second", "cache_hit": True}
+        assert event["id"] is None
+        assert (event.get("usage_metadata") or {}).get("invocation_id") is None
@@ -0,0 +1,184 @@
+import asyncio
+import json
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from google.adk.agents import LlmAgent
+
+from src.agents.sub_agents.finalise_response_agent.agent import table_tool
+from src.auth.firebase_auth import get_current_user
+from src.dependencies.services import get_artifact_service
+from src.main import app
+from src.models.artifact import Artifact, ArtifactSource, ArtifactType
+from src.models.user import User
+from src.repositories import MessageRepository
+from src.services.artifact_service import ArtifactService
+from src.services.artifact_storage import LocalArtifactStorage
+from src.services.message_service import MessageService
+from src.services.runner_manager_service import RunnerManagerService
+from src.services.table_store import TABLE_PAGE_ROWS, TableStore, normalize_table
+from src.testing import FakeLlm, InMemoryFirestore
+from src.testing.llm import FakeFunctionCall, FakeResponse, FakeRule
+
+
+class SingleArtifactRepository:
+    """Returns one fixed artifact to its owner"""
+
+    def __init__(self, artifact: Artifact):
+        self.artifact = artifact
+
+    async def get_artifact_by_user(self, artifact_id, user_id):
+        if artifact_id == self.artifact.id and user_id == self.artifact.user_id:
+            return self.artifact
+        return None
+
+
+def test_normalize_table_shapes():
+    """Test the row, column and key-value shapes the agent produces"""
+    headers = ["Category", "Amount"]
+    expected = (headers, [["Food", 1200], ["Rent", 20000]])
+    assert normalize_table(headers, {"rows": [["Food", 1200], ["Rent", 20000]]}) == (
+        expected
+    )
+    assert (
+        normalize_table(
+            headers, {"Category": ["Food", "Rent"], "Amount": [1200, 20000]}
+        )
+        == expected
+    )
+    assert normalize_table(headers, {"Food": 1200, "Rent": 20000}) == expected
+    assert normalize_table([], [{"Category": "Food", "Amount": 1200}]) == (
+        headers,
+        [["Food", 1200]],
+    )
+
+
+async def test_table_pages_sort_and_project(tmp_path):
+    """Test cursor paging across chunks, sorting and column projection"""
+    store = TableStore(LocalArtifactStorage(str(tmp_path)))
+    rows = [
+        [f"txn-{i:03d}", (i * 37) % 101, None if i % 10 else "flag"] for i in range(250)
+    ]
+    schema = await store.save(
+        "user", "t1", ["id", "amount", "note"], rows, chunk_rows=64
+    )
+    assert schema["chunk_count"] == 4
+    assert [c["type"] for c in schema["columns"]] == ["string", "number", "string"]
+
+    page = await store.get_page("user", "t1", offset=60, limit=10, columns=["id"])
+    assert page["rows"] == [[f"txn-{i:03d}"] for i in range(60, 70)]
+    assert page["total_rows"] == 250 and page["next_cursor"]
+
+    page = await store.get_page("user", "t1", limit=5, sort="amount", descending=True)
+    amounts = [row[1] for row in page["rows"]]
+    assert amounts == sorted(amounts, reverse=True) and amounts[0] == 100
+
+    page = await store.get_page("user", "t1", offset=240, sort="note")
+    assert page["rows"][-1][2] is None and page["next_cursor"] is None
+
+    await store.delete("user", "t1")
+    assert not list(tmp_path.rglob("*.json"))
+
+
+def test_rows_endpoint_follows_cursor(tmp_path):
+    """Test that the rows endpoint pages a table artifact with its cursor"""
+    storage = LocalArtifactStorage(str(tmp_path))
+    artifact = Artifact(
+        id="art",
+        session_id="sess",
+        user_id="user",
+        message_id="msg",
+        artifact_type=ArtifactType.TABLE,
+        source=ArtifactSource.AI_GENERATED,
+        title="Transactions",
+        metadata={"table_id": "t1"},
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+    )
+    service = ArtifactService(SingleArtifactRepository(artifact), None, None, storage)
+    rows = [[i, 1000 - i] for i in range(120)]
+    asyncio.run(service.tables.save("user", "t1", ["n", "balance"], rows))
+    app.dependency_overrides[get_current_user] = lambda: User(uid="user")
+    app.dependency_overrides[get_artifact_service] = lambda: service
+    try:
+        client = TestClient(app)
+        url = "/sessions/sess/artifacts/art/rows"
+
+        response = client.get(url, params={"limit": 50, "sort": "balance"})
+        assert response.status_code == 200
+        first = response.json()
+        assert first["rows"][0] == [119, 881]
+
+        response = client.get(url, params={"cursor": first["next_cursor"]})
+        second = response.json()
+        assert second["offset"] == 50
+        assert second["rows"][0] == [69, 931]
+
+        response = client.get(url, params={"columns": "missing"})
+        assert response.status_code == 400
+
+        app.dependency_overrides[get_current_user] = lambda: User(uid="other")
+        assert client.get(url).status_code == 404
+    finally:
+        app.dependency_overrides.clear()
+
+
+async def test_stored_message_carries_only_the_first_page(monkeypatch, tmp_path):
+    """Test that the table tool's rows stay out of the message past one page"""
+    from src.dependencies import services
+
+    monkeypatch.setenv("AGENT_ENGINE_ID", "test")
+    storage = LocalArtifactStorage(str(tmp_path))
+    monkeypatch.setattr(services, "get_artifact_storage", lambda: storage)
+    table = {
+        "table_headers": ["Date", "Description", "Amount"],
+        "table_data": {
+            "rows": [[f"2024-01-{i % 28 + 1:02d}", f"UPI-{i}", i] for i in range(2000)]
+        },
+        "table_description": "All transactions",
+    }
+    model = FakeLlm(
+        rules=[
+            FakeRule(
+                responses=[
+                    FakeResponse(
+                        function_calls=[
+                            FakeFunctionCall(name="table_tool", args={"table": table})
+                        ]
+                    ),
+                    FakeResponse(text="Here are your transactions."),
+                ]
+            )
+        ]
+    )
+    db = InMemoryFirestore()
+    manager = RunnerManagerService(
+        MessageService(MessageRepository(db=db)),
+        agent=LlmAgent(name="root_agent", model=model, tools=[table_tool]),
+    )
+    streamed = [
+        chunk
+        async for chunk in manager.process_user_message(
+            user_id="user",
+            session_id="sess",
+            message_content="list my transactions",
+            backend_session_id="sess",
+        )
+    ]
+
+    full_size = len(json.dumps(table))
+    assert all(len(chunk) < full_size / 4 for chunk in streamed)
+    stored = [doc.to_dict() for doc in db.collection("messages").stream()]
+    assert len(stored) == 2
+    for message in stored:
+        assert len(json.dumps(message, default=str)) < full_size / 4
+    events = [event for message in stored for event in message.get("events") or []]
+    call = next(call for event in events for call in event.get("tool_calls") or [])
+    assert call["args"]["table"]["row_count"] == 2000
+    assert len(call["args"]["table"]["table_data"]["rows"]) == TABLE_PAGE_ROWS
+    result = next(r for event in events for r in event.get("tool_results") or [])
+    assert result["id"] == call["id"]
+    assert result["response"]["schema"]["row_count"] == 2000
+    assert await storage.exists(
+        f"tables/user/{result['response']['table_id']}/schema.json"
+    )
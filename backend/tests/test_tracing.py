@@ -0,0 +1,48 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.observability.tracing import (
+    TracingMiddleware,
+    configure_tracing,
+    get_memory_exporter,
+    traced,
+)
+from tests.test_metrics import FakeDb, WidgetRepository
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_SPAN_ID = "00f067aa0ba902b7"
+
+
+def test_request_spans_continue_the_incoming_trace():
+    """Test that route, service and repository spans nest under the caller's trace"""
+    configure_tracing("memory")
+    exporter = get_memory_exporter()
+    exporter.clear()
+    repository = WidgetRepository("widgets", db=FakeDb())
+
+    @traced("widget_service.count")
+    async def count_widgets():
+        return await repository.get_widget_count()
+
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+
+    @app.get("/widgets/{widget_id}")
+    async def get_widget(widget_id: str):
+        return {"id": widget_id, "count": await count_widgets()}
+
+    response = TestClient(app).get(
+        "/widgets/7", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_SPAN_ID}-01"}
+    )
+    assert response.json()["count"] == 3
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    server = spans["GET /widgets/{widget_id}"]
+    service = spans["widget_service.count"]
+    repository_span = spans["WidgetRepository.get_widget_count"]
+
+    assert {format(s.context.trace_id, "032x") for s in spans.values()} == {TRACE_ID}
+    assert format(server.parent.span_id, "016x") == PARENT_SPAN_ID
+    assert service.parent.span_id == server.context.span_id
+    assert repository_span.parent.span_id == service.context.span_id
+    assert server.attributes["http.response.status_code"] == 200
@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from src.services.transaction_store import TransactionStore
+
+JANUARY = {
+    "date": ["2024-01-05", "2024-01-12", "2024-01-20", "2024-01-31"],
+    "description": ["UPI-SWIGGY", "AMAZON PAY", "UPI-SWIGGY", "SALARY JAN"],
+    "amount": [-450.0, -1299.0, -300.0, 50000.0],
+    "balance": [None, None, None, None],
+    "category": ["food", "shopping", "food", "salary"],
+}
+
+# Overlaps January by one row, as consecutive statement exports often do
+FEBRUARY = {
+    "date": ["2024-01-31", "2024-02-03", "2024-02-14"],
+    "description": ["SALARY JAN", "ZOMATO", "AMAZON PAY"],
+    "amount": [50000.0, -600.0, -250.0],
+    "balance": [None, None, None],
+    "category": ["salary", "food", "shopping"],
+}
+
+
+def test_summaries_filter_and_group(tmp_path):
+    """Test filters, single-level groups and the two-level rollup"""
+    store = TransactionStore(str(tmp_path))
+    assert store.replace_source("user", "jan", JANUARY) == 4
+    assert store.replace_source("user", "feb", FEBRUARY) == 6
+
+    spending = store.summarize("user", group_by=["category"], direction="out")
+    assert spending["total"] == -2899.0
+    assert spending["count"] == 5
+    assert spending["groups"][0] == {"key": "shopping", "total": -1549.0, "count": 2}
+
+    food = store.summarize(
+        "user", group_by=[], categories=["food"], start_date="2024-02-01"
+    )
+    assert (food["total"], food["count"]) == (-600.0, 1)
+    assert store.summarize("user", group_by=[], search="swiggy")["count"] == 2
+
+    rollup = store.summarize("user", group_by=["month", "category"], direction="out")
+    assert [group["key"] for group in rollup["groups"]] == ["2024-01", "2024-02"]
+    assert rollup["groups"][1] == {
+        "key": "2024-02",
+        "total": -850.0,
+        "count": 2,
+        "groups": [
+            {"key": "food", "total": -600.0, "count": 1},
+            {"key": "shopping", "total": -250.0, "count": 1},
+        ],
+    }
+
+    latest = store.find_transactions("user", sort="latest", limit=1)
+    assert latest[0]["description"] == "AMAZON PAY"
+    assert latest[0]["date"] == "2024-02-14"
+
+
+def test_replace_source_drops_rows(tmp_path):
+    """Test re-ingesting and deleting an artifact's rows"""
+    store = TransactionStore(str(tmp_path))
+    store.replace_source("user", "jan", JANUARY)
+    store.replace_source("user", "feb", FEBRUARY)
+
+    # Re-ingesting is idempotent
+    assert store.replace_source("user", "feb", FEBRUARY) == 6
+
+    # Dropping January keeps February's copy of the overlapping salary row
+    assert store.replace_source("user", "jan", None) == 3
+    overview = store.get_overview("user")
+    assert overview["row_count"] == 3
+    assert store.summarize("user", group_by=[], direction="in")["total"] == 50000.0
+
+    # Reopening the directory sees the latest version
+    assert TransactionStore(str(tmp_path)).get_overview("user")["row_count"] == 3
+    assert store.get_overview("someone-else") == {"row_count": 0}
+
+
+def _add_source(root, source_id):
+    TransactionStore(root).replace_source("user", source_id, JANUARY)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork and flock")
+def test_writers_in_other_processes_keep_each_others_rows(tmp_path):
+    """Test that the file lock serializes writers of separate processes"""
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=4, mp_context=context) as executor:
+        list(executor.map(_add_source, [str(tmp_path)] * 8, map(str, range(8))))
+    assert sorted(TransactionStore(str(tmp_path)).load("user").sources) == [
+        str(source) for source in range(8)
+    ]
+
+
+def test_replaced_versions_are_collected_lazily(tmp_path):
+    """Test the grace period and the reload when a version vanished"""
+    store = TransactionStore(str(tmp_path), version_grace_seconds=3600)
+    store.replace_source("user", "jan", JANUARY)
+    stale = store._read_manifest("user")
+    store.replace_source("user", "feb", FEBRUARY)
+    assert os.path.isdir(tmp_path / "user" / stale["version"])
+
+    store.version_grace_seconds = 0
+    store.replace_source("user", "jan", JANUARY)
+    assert not os.path.isdir(tmp_path / "user" / stale["version"])
+
+    # A reader that read the manifest just before a write reloads
+    reader = TransactionStore(str(tmp_path))
+    manifests = [stale]
+    read_manifest = reader._read_manifest
+    reader._read_manifest = lambda user_id: (
+        manifests.pop() if manifests else read_manifest(user_id)
+    )
+    assert reader.load("user").version == store._read_manifest("user")["version"]
@@ -0,0 +1,240 @@
+import gc
+import hashlib
+import json
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from google.api_core.exceptions import NotFound
+
+from src.apis import artifacts
+from src.models.artifact import ArtifactBlob, ArtifactType
+from src.services.artifact_service import ArtifactService, UploadTooLargeError
+from src.services.artifact_storage import GCSArtifactStorage, LocalArtifactStorage
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def test_upload_is_streamed_hashed_and_limited(tmp_path, monkeypatch):
+    """Test chunked uploads are hashed, sized, and removed when too large"""
+    monkeypatch.setenv("UPLOAD_SIZE_LIMITS_MB", '{"csv": 0.00001}')
+    storage = LocalArtifactStorage(str(tmp_path))
+    service = ArtifactService(None, None, None, storage)
+
+    upload = await service._save_uploaded_file(
+        _chunks(b"a,b\n", b"1,2\n"),
+        "user/ok.csv",
+        service.get_upload_size_limit("x.csv"),
+    )
+    assert upload.file_size == 8
+    assert upload.sha256 == hashlib.sha256(b"a,b\n1,2\n").hexdigest()
+    with open(upload.file_path, "rb") as f:
+        assert f.read() == b"a,b\n1,2\n"
+
+    with pytest.raises(UploadTooLargeError):
+        await service._save_uploaded_file(_chunks(b"x" * 8, b"x" * 8), "big.csv", 10)
+    assert not await storage.exists("big.csv")
+    assert not os.path.exists(tmp_path / "big.csv")
+
+    with pytest.raises(UploadTooLargeError):
+        service.check_upload_size("statement.csv", 11)
+
+
+async def test_local_storage_range_reads(tmp_path):
+    """Test streamed range reads and traversal-safe keys"""
+    storage = LocalArtifactStorage(str(tmp_path))
+    await storage.write_stream("a/blob", _chunks(b"0123456789"))
+
+    chunks = [c async for c in storage.read_stream("a/blob", 2, 7, chunk_size=4)]
+    assert chunks == [b"2345", b"67"]
+    assert storage.storage_uri("a/blob").startswith("file://")
+    assert await storage.presigned_url("a/blob") is None
+    assert await storage.delete("a/blob")
+    assert not await storage.exists("a/blob")
+    with pytest.raises(ValueError):
+        storage.local_path("../outside")
+
+
+class InMemoryBlobRepository:
+    """Reference counts kept in a dict instead of Firestore"""
+
+    def __init__(self):
+        self.blobs = {}
+
+    async def acquire(self, content_hash, storage_key, size, mime_type=None):
+        created = content_hash not in self.blobs
+        blob = self.blobs.setdefault(
+            content_hash,
+            ArtifactBlob(
+                id=content_hash,
+                storage_key=storage_key,
+                size=size,
+                mime_type=mime_type,
+                ref_count=0,
+                created_at=datetime.now(),
+                updated_at=datetime.now(),
+            ),
+        )
+        blob.ref_count += 1
+        return created
+
+    async def get_by_id(self, content_hash):
+        return self.blobs.get(content_hash)
+
+    async def release(self, content_hash):
+        blob = self.blobs[content_hash]
+        blob.ref_count -= 1
+        if blob.ref_count == 0:
+            return self.blobs.pop(content_hash)
+        return None
+
+
+class FakeBucket:
+    """A bucket whose writers finalize whatever was written when closed"""
+
+    name = "bucket"
+
+    def __init__(self):
+        self.objects = {}
+
+    def blob(self, name):
+        bucket = self
+
+        class Writer:
+            def __init__(self):
+                self.data = b""
+                self.closed = False
+
+            def write(self, chunk):
+                self.data += chunk
+
+            def close(self):
+                if not self.closed:
+                    self.closed = True
+                    bucket.objects[name] = self.data
+
+            # Like BlobWriter, which inherits it from io.IOBase
+            __del__ = close
+
+        def delete():
+            if name not in bucket.objects:
+                raise NotFound(name)
+            del bucket.objects[name]
+
+        return SimpleNamespace(
+            open=lambda mode, **kwargs: Writer(),
+            delete=delete,
+            exists=lambda: name in bucket.objects,
+        )
+
+
+async def test_gcs_stream_leaves_nothing_when_it_raises():
+    """Test that an aborted GCS upload doesn't leave a truncated object"""
+    storage = GCSArtifactStorage.__new__(GCSArtifactStorage)
+    storage.bucket = FakeBucket()
+    storage.prefix = ""
+
+    async def too_large():
+        yield b"x" * 8
+        raise UploadTooLargeError(ArtifactType.CSV, 8)
+
+    with pytest.raises(UploadTooLargeError):
+        await storage.write_stream("staging/big.csv", too_large())
+    gc.collect()
+    assert storage.bucket.objects == {}
+
+    assert await storage.write_stream("staging/ok.csv", _chunks(b"a,b\n")) == 4
+    assert storage.bucket.objects == {"staging/ok.csv": b"a,b\n"}
+
+
+async def test_duplicate_uploads_share_one_blob(tmp_path):
+    """Test that identical uploads are stored once and freed with the last ref"""
+    storage = LocalArtifactStorage(str(tmp_path))
+    blobs = InMemoryBlobRepository()
+    service = ArtifactService(None, None, None, storage, blobs)
+
+    stored = []
+    for name in ("a.csv", "b.csv"):
+        upload = await service._save_uploaded_file(
+            _chunks(b"a,b\n1,2\n"), f"staging/{name}", 100
+        )
+        stored.append(await service._store_content_addressed(upload, "text/csv"))
+
+    (first, first_dedup), (second, second_dedup) = stored
+    assert (first_dedup, second_dedup) == (False, True)
+    assert first.storage_key == second.storage_key
+    assert os.listdir(tmp_path / "staging") == []
+    assert blobs.blobs[first.sha256].ref_count == 2
+
+    artifact = SimpleNamespace(content_hash=first.sha256, metadata={})
+    await service._release_stored_file(artifact)
+    assert await storage.exists(first.storage_key)
+    await service._release_stored_file(artifact)
+    assert not await storage.exists(first.storage_key)
+
+
+async def test_reupload_survives_a_late_release(tmp_path):
+    """Test that deleting a released blob's file spares content stored since"""
+    storage = LocalArtifactStorage(str(tmp_path))
+    blobs = InMemoryBlobRepository()
+    service = ArtifactService(None, None, None, storage, blobs)
+
+    async def store(name):
+        upload = await service._save_uploaded_file(
+            _chunks(b"a,b\n1,2\n"), f"staging/{name}", 100
+        )
+        return (await service._store_content_addressed(upload, "text/csv"))[0]
+
+    old = await store("a.csv")
+    # The last reference is released, but its file isn't deleted yet...
+    released = await blobs.release(old.sha256)
+    # ...when the same content is uploaded again
+    new = await store("b.csv")
+    await storage.delete(released.storage_key)
+
+    assert new.storage_key != old.storage_key
+    assert await storage.read_bytes(new.storage_key) == b"a,b\n1,2\n"
+
+
+async def test_oversized_upload_bodies_are_refused_while_streaming(monkeypatch):
+    """Test the body cap before the multipart form is parsed"""
+    limits = {artifact_type.value: 0.01 for artifact_type in ArtifactType}
+    monkeypatch.setenv("UPLOAD_SIZE_LIMITS_MB", json.dumps(limits))
+    app = FastAPI()
+    app.include_router(artifacts.router, prefix="/sessions")
+    body_read = 0
+
+    async def body():
+        nonlocal body_read
+        yield (
+            b"--x\r\nContent-Disposition: form-data; name=file; "
+            b'filename="big.pdf"\r\nContent-Type: application/pdf\r\n\r\n'
+        )
+        for _ in range(200):
+            body_read += 64 * 1024
+            yield b"x" * (64 * 1024)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        declared = await client.post(
+            "/sessions/s/artifacts/upload",
+            files={"file": ("big.pdf", b"x" * 200 * 1024, "application/pdf")},
+            data={"message_id": "m"},
+        )
+        # Chunked, so only the running count can stop it
+        streamed = await client.post(
+            "/sessions/s/artifacts/upload",
+            content=body(),
+            headers={"content-type": "multipart/form-data; boundary=x"},
+        )
+
+    assert declared.status_code == streamed.status_code == 413
+    assert "10485 bytes" in declared.json()["detail"]
+    assert body_read < 200 * 64 * 1024
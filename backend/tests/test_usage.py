@@ -0,0 +1,105 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src.auth.firebase_auth import get_current_user
+from src.dependencies.services import get_usage_service
+from src.main import app
+from src.models.message import UsageMetadata
+from src.models.user import User
+from src.repositories import UsageRepository
+from src.services.usage_service import UsageService
+from src.testing import InMemoryFirestore
+
+
+def test_cost_is_priced_per_model():
+    """Test that each model's tokens are priced from its own row"""
+    service = UsageService(
+        UsageRepository(db=InMemoryFirestore()),
+        pricing={
+            "cheap": {"prompt": 0.10, "response": 0.40},
+            "dear": {"prompt": 1.25, "response": 10.00},
+        },
+    )
+
+    assert service.estimate_cost("cheap", 1_000_000, 500_000) == pytest.approx(0.30)
+    assert service.estimate_cost("dear", 200_000, 100_000) == pytest.approx(1.25)
+    assert service.estimate_cost("dear", None, None) == 0.0
+    assert service.estimate_cost("unknown", 1000, 1000) is None
+    assert service.estimate_cost(None, 1000, 1000) is None
+
+
+def test_model_pricing_override(monkeypatch):
+    """Test that MODEL_PRICING extends and overrides the default table"""
+    monkeypatch.setenv(
+        "MODEL_PRICING",
+        '{"gemini-2.0-flash": {"prompt": 1, "response": 2}, "local": {}}',
+    )
+    service = UsageService(UsageRepository(db=InMemoryFirestore()))
+
+    assert service.estimate_cost("gemini-2.0-flash", 1_000_000, 1_000_000) == 3.0
+    assert service.estimate_cost("gemini-2.5-pro", 1_000_000, 0) == 1.25
+    assert service.estimate_cost("local", 1_000_000, 1_000_000) == 0.0
+
+
+async def test_turns_add_up_per_session_and_user_day():
+    """Test that increment_turn_usage aggregates into both counters"""
+    repository = UsageRepository(db=InMemoryFirestore())
+    turn = UsageMetadata(
+        prompt_token_count=100,
+        response_token_count=20,
+        total_token_count=120,
+        processing_time=1.5,
+        cost_estimate=0.25,
+    )
+    await repository.increment_turn_usage("u1", "s1", "2026-10-18", turn)
+    await repository.increment_turn_usage("u1", "s1", "2026-10-18", turn)
+    await repository.increment_turn_usage("u1", "s2", "2026-10-18", turn)
+    await repository.increment_turn_usage("u1", "s2", "2026-10-19", turn)
+
+    session = await repository.get_session_usage("s1")
+    assert session.user_id == "u1"
+    assert session.turn_count == 2
+    assert session.prompt_token_count == 200
+    assert session.response_token_count == 40
+    assert session.total_token_count == 240
+    assert session.processing_time == pytest.approx(3.0)
+    assert session.cost_estimate == pytest.approx(0.5)
+
+    day = await repository.get_user_day_usage("u1", "2026-10-18")
+    assert day.turn_count == 3
+    assert day.total_token_count == 360
+    assert day.cost_estimate == pytest.approx(0.75)
+    assert (await repository.get_user_day_usage("u1", "2026-10-19")).turn_count == 1
+    assert await repository.get_user_day_usage("u2", "2026-10-18") is None
+
+    sessions = await repository.get_most_expensive_sessions("u1")
+    assert [counter.session_id for counter in sessions] == ["s1", "s2"]
+
+
+async def test_usage_routes_only_show_the_current_users_counters():
+    """Test that /usage never returns another user's totals"""
+    service = UsageService(UsageRepository(db=InMemoryFirestore()))
+    turn = UsageMetadata(total_token_count=10, cost_estimate=0.01)
+    await service.record_turn("u1", "mine", turn)
+    await service.record_turn("u2", "theirs", turn)
+    await service.record_turn("u2", "theirs", turn)
+
+    app.dependency_overrides[get_current_user] = lambda: User(uid="u1")
+    app.dependency_overrides[get_usage_service] = lambda: service
+    try:
+        client = TestClient(app)
+
+        today = client.get("/usage/today")
+        assert today.status_code == 200
+        assert today.json()["user_id"] == "u1"
+        assert today.json()["turn_count"] == 1
+
+        sessions = client.get("/usage/sessions")
+        assert sessions.status_code == 200
+        assert [s["session_id"] for s in sessions.json()] == ["mine"]
+
+        assert client.get("/usage/sessions/mine").status_code == 200
+        assert client.get("/usage/sessions/theirs").status_code == 404
+        assert client.get("/usage/sessions/missing").status_code == 404
+    finally:
+        app.dependency_overrides.clear()